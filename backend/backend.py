@@ -1,90 +1,144 @@
-from flask import Flask, jsonify, request
+import time
+# Startup is timed from the first import, /api/ready reports it
+IMPORT_STARTED = time.perf_counter()
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
-import pandas as pd
-from binance.client import Client
-import pandas_ta as ta
+import numpy as np
 from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
-import sys
 import logging
-import traceback
-
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s %(levelname)s: %(message)s',
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
-
-# Force stdout to be unbuffered
-sys.stdout.reconfigure(line_buffering=True)
+import json
+import copy
+import threading
+import queue
+from candles import Candles
+from kline_store import KlineStore
+from kline_fetcher import fetch_klines
+from resample import MINUTE_MS, RESAMPLE_MAX_MINUTES, RESAMPLED_INTERVALS, rollup_cache
+from backtest_engine import INITIAL_BALANCE, WARMUP_BARS, TradeLog, frame_columns, open_times_ms, paginate_trade_log, risk_metrics, vectorized_backtest
+from signal_plan import compile_plan, holds_at, signal_plans, signals_at
+from optimizer import run_grid
+from walk_forward import run_walk_forward
+from batch import run_batch
+from backtest_stream import STREAM_CHUNK_CANDLES, chunk_windows, stream_backtest
+from backtest_jobs import BacktestJobQueue
+from live_store import LiveTestNotFound, create_live_test_store
+from live_scheduler import LiveTestScheduler
+from live_replay import LiveReplay, ReplayManager
+from streaming_indicators import IndicatorState
+from kline_stream import BinanceKlineSource, Broadcaster, KlineHub
+from indicators import bollinger_bands, ema_matrix, macd_lines, rsi_column, rsi_matrix, rsi_period, sma_matrix
+from indicator_cache import candle_fingerprint, indicator_cache
+from log_config import configure_logging
+from startup import ImportWarmUp
+import metrics
 
 # Load environment variables
 load_dotenv()
 
+# Configure logging, LOG_LEVEL / LOG_LEVELS control what is emitted (see log_config.py)
+configure_logging()
+api_log = logging.getLogger('api')
+indicator_log = logging.getLogger('indicators')
+backtest_log = logging.getLogger('backtest')
+live_log = logging.getLogger('livetest')
+
 # Initialize Flask app
 app = Flask(__name__)
-app.logger.setLevel(logging.DEBUG)  # Set Flask logger to DEBUG level
 
 CORS(app, resources={r"/api/*": {"origins": [
     "http://localhost:3000",  # Local frontend
     "http://127.0.0.1:3000",  # Alternative local frontend URL
     "https://trading-bot-econ.vercel.app"  # Production frontend
 ]}})
-app.live_tests = {}
+# Live test sessions, LIVE_TEST_STORE=sqlite shares them between workers and restarts
+live_test_store = create_live_test_store()
 
 # API credentials
 api_key = os.getenv('binance-api-key')
 api_secret = os.getenv('binance-api-secret')
 
-# Add some debug logging
-print("API Key present:", bool(api_key))
-print("API Secret present:", bool(api_secret))
-
-try:
-    client = Client(api_key, api_secret)
-except Exception as e:
-    print("Error initializing Binance client:", str(e))
-
-def get_historical_klines(symbol, interval, start_time, end_time):
-    limit = 1000
-    klines = []
-    while True:
-        temp_klines = client.get_klines(symbol=symbol, interval=interval, limit=limit, startTime=start_time, endTime=end_time)
-        if not temp_klines:
-            break
-        klines.extend(temp_klines)
-        start_time = temp_klines[-1][0] + 1
-        if len(temp_klines) < limit:
-            break
-    df = pd.DataFrame(klines, columns=['Open Time', 'Open', 'High', 'Low', 'Close', 'Volume',
-                                       'Close Time', 'Quote Asset Volume', 'Number of Trades',
-                                       'Taker Buy Base Asset Volume', 'Taker Buy Quote Asset Volume', 'Ignore'])
-    df['Open Time'] = pd.to_datetime(df['Open Time'], unit='ms')
-    df.set_index('Open Time', inplace=True)
-    df = df[['Open', 'High', 'Low', 'Close', 'Volume']]
-    df = df.astype(float)
-    return df
+api_log.info("API key present: %s, API secret present: %s", bool(api_key), bool(api_secret))
+
+# Created on first use in each worker process, a client built before a fork
+# would share its HTTP connections between the gunicorn workers
+client = None
+client_error = None
+client_lock = threading.Lock()
+
+def get_client():
+    global client, client_error
+    with client_lock:
+        if client is None:
+            try:
+                # python-binance pulls in aiohttp and dateparser, and its constructor pings the exchange
+                from binance.client import Client
+                client = Client(api_key, api_secret)
+                client_error = None
+            except Exception as e:
+                client_error = str(e)
+                api_log.error("Error initializing Binance client: %s", e)
+                raise
+        return client
+
+# Local candle store, set KLINE_STORE_DIR to an empty string to disable it
+kline_store_dir = os.getenv('KLINE_STORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'klines'))
+kline_store = KlineStore(kline_store_dir) if kline_store_dir else None
+
+# Higher timeframes are rolled up from the stored 1m candles when few of them are missing, so one download serves every timeframe
+CANDLE_RESAMPLE = os.getenv('CANDLE_RESAMPLE', '1') == '1'
+
+def get_candles(symbol, interval, start_time, end_time, on_page=None, resample=True, fill_store=True):
+    """Columnar candles for the range, from the local kline store when it is enabled.
+
+    Resampled intervals are rolled up from the stored 1m candles when at most
+    RESAMPLE_MAX_MINUTES of them have to be downloaded, a cold or long range
+    downloads the interval itself. resample=False always does, for short
+    windows like a live warm-up where the 1m candles would be most of the
+    download.
+
+    fill_store=False reads the interval from the store but downloads what it
+    lacks for this range only and doesn't write it, so a streamed backtest's
+    memory stays bounded by its chunk.
+    """
+    if kline_store is not None:
+        if not fill_store:
+            return kline_store.read_klines(get_client(), symbol, interval, start_time, end_time, on_page)
+        if (resample and CANDLE_RESAMPLE and interval in RESAMPLED_INTERVALS
+                and kline_store.missing_ms(symbol, '1m', start_time, end_time) // MINUTE_MS <= RESAMPLE_MAX_MINUTES):
+            minutes = kline_store.get_klines(get_client(), symbol, '1m', start_time, end_time, on_page)
+            with metrics.stage('resample'):
+                rolled = rollup_cache.get(symbol, interval, minutes)
+            # Like Binance, only candles opening at or after start_time
+            return rolled.between(start_time, end_time)
+        return kline_store.get_klines(get_client(), symbol, interval, start_time, end_time, on_page)
+    return Candles.from_klines(fetch_klines(get_client(), symbol, interval, start_time, end_time, on_page))
+
+def get_historical_klines(symbol, interval, start_time, end_time, on_page=None, resample=True):
+    return get_candles(symbol, interval, start_time, end_time, on_page, resample).to_frame()
 
 def get_interval_string(timeframe):
     """Convert frontend timeframe to Binance interval string"""
+    # Same strings as Client.KLINE_INTERVAL_*, spelled out so python-binance isn't needed to build a request
     intervals = {
-        '1m': Client.KLINE_INTERVAL_1MINUTE,
-        '5m': Client.KLINE_INTERVAL_5MINUTE,
-        '15m': Client.KLINE_INTERVAL_15MINUTE,
-        '30m': Client.KLINE_INTERVAL_30MINUTE,
-        '1h': Client.KLINE_INTERVAL_1HOUR,
-        '4h': Client.KLINE_INTERVAL_4HOUR,
-        '1d': Client.KLINE_INTERVAL_1DAY,
+        '1m': '1m',
+        '5m': '5m',
+        '15m': '15m',
+        '30m': '30m',
+        '1h': '1h',
+        '4h': '4h',
+        '1d': '1d',
     }
-    return intervals.get(timeframe, Client.KLINE_INTERVAL_1HOUR)
+    return intervals.get(timeframe, '1h')
 
 def calculate_dynamic_indicators(df, buy_indicators, sell_indicators):
     try:
-        print("\n=== Calculating Indicators ===")
-        # RSI için sabit period kullan
-        rsi_period = 14
+        indicator_log.debug("Calculating indicators")
+        
+        # Series are cached by close price fingerprint + parameters and shared between requests
+        close = df['Close'].to_numpy()
+        fingerprint = candle_fingerprint(close)
         
         # Combine active indicators from both buy and sell configurations
         all_indicators = {}
@@ -99,298 +153,161 @@ def calculate_dynamic_indicators(df, buy_indicators, sell_indicators):
             if value['active']:
                 all_indicators[f"sell_{key}"] = value
         
-        # RSI'ı bir kere hesapla
-        if any(ind['active'] for ind in all_indicators.values() if ind.get('name') == 'RSI'):
-            print(f"\nCalculating RSI with period {rsi_period}")
-            df['RSI'] = ta.rsi(df['Close'], length=rsi_period)
-            print("RSI calculated")
-            print(f"RSI range: {df['RSI'].min():.2f} - {df['RSI'].max():.2f}")
+        def cached_periods(name, periods, kernel):
+            # Periods missing from the cache are computed together in one kernel call
+            periods = sorted(periods)
+            keys = [(name, period) for period in periods]
+            rows = indicator_cache.get_many(fingerprint, keys, lambda missing: kernel(close, [key[1] for key in missing]))
+            return zip(periods, rows)
+        
+        # RSI'ı her periyot için bir kere hesapla
+        rsi_periods = {rsi_period(ind) for ind in all_indicators.values() if ind.get('name') == 'RSI'}
+        for period, values in cached_periods('rsi', rsi_periods, rsi_matrix):
+            column = rsi_column(period)
+            df[column] = values
+            if indicator_log.isEnabledFor(logging.DEBUG):
+                indicator_log.debug("RSI(%d) range: %.2f - %.2f", period, df[column].min(), df[column].max())
             
-        # Collect all unique SMA periods
-        sma_periods = set()
+        # Collect all unique SMA and EMA periods
+        periods = {'sma': set(), 'ema': set()}
         for key, config in all_indicators.items():
-            if config['active'] and ('sma' in key.lower()):
-                sma_periods.add(int(config['value']))
+            indicator = key.split('_')[1]
+            if indicator in periods:
+                periods[indicator].add(int(config['value']))
                 
-        # Calculate all SMA periods at once
-        for period in sma_periods:
-            print(f"\nCalculating SMA with period {period}")
-            df[f'SMA_{period}'] = ta.sma(df['Close'], length=period)
-            print(f"SMA-{period} calculated")
+        # Calculate all SMA and EMA periods at once
+        for period, values in cached_periods('sma', periods['sma'], sma_matrix):
+            df[f'SMA_{period}'] = values
+            indicator_log.debug("SMA-%d calculated", period)
+        for length, values in cached_periods('ema', periods['ema'], ema_matrix):
+            df[f'EMA_{length}'] = values
+            indicator_log.debug("EMA-%d calculated", length)
             
         for key, config in all_indicators.items():
             indicator = key.split('_')[1] if '_' in key else key
-            if config['active'] and indicator not in ['rsi', 'sma']:  # RSI ve SMA'yı atla çünkü zaten hesaplandı
-                print(f"\nCalculating {indicator.upper()}:")
-                print(f"Config: {config}")
+            if config['active'] and indicator not in ['rsi', 'sma', 'ema']:  # RSI, SMA ve EMA'yı atla çünkü zaten hesaplandı
+                indicator_log.debug("Calculating %s with config %s", indicator.upper(), config)
                 
                 if indicator == 'bollinger':
                     period = int(config.get('value', 20))
                     std_dev = float(config.get('std_dev', 2.0))
-                    print(f"Period: {period}, StdDev: {std_dev}")
-                    
-                    df['middle_band'] = df['Close'].rolling(window=period).mean()
-                    df['std'] = df['Close'].rolling(window=period).std()
-                    df['upper_band'] = df['middle_band'] + (df['std'] * std_dev)
-                    df['lower_band'] = df['middle_band'] - (df['std'] * std_dev)
-                    print("Bollinger Bands calculated")
+                    df['middle_band'], df['std'], df['upper_band'], df['lower_band'] = indicator_cache.get(
+                        fingerprint, ('bollinger', period, std_dev), lambda: bollinger_bands(close, period, std_dev))
+                    indicator_log.debug("Bollinger Bands calculated, period %d, std dev %s", period, std_dev)
                 
                 elif indicator == 'macd':
                     try:
                         fast = int(config['values'][0])
                         slow = int(config['values'][1])
                         signal = int(config['values'][2])
-                        print(f"Fast: {fast}, Slow: {slow}, Signal: {signal}")
-                        
-                        exp1 = df['Close'].ewm(span=fast, adjust=False).mean()
-                        exp2 = df['Close'].ewm(span=slow, adjust=False).mean()
-                        macd_line = exp1 - exp2
-                        signal_line = macd_line.ewm(span=signal, adjust=False).mean()
+                        macd_line, signal_line = indicator_cache.get(
+                            fingerprint, ('macd', fast, slow, signal), lambda: macd_lines(close, fast, slow, signal))
                         
                         df['MACD'] = macd_line
                         df['MACD_signal'] = signal_line
-                        print("MACD calculated")
+                        indicator_log.debug("MACD calculated, fast %d, slow %d, signal %d", fast, slow, signal)
                         
                     except Exception as e:
-                        print(f"Error calculating MACD: {str(e)}")
+                        indicator_log.error("Error calculating MACD: %s", e)
                         return None
-                
-                elif indicator == 'ema':
-                    length = int(config['value'])
-                    print(f"Length: {length}")
-                    df[f'EMA_{length}'] = ta.ema(df['Close'], length=length)
-                    print("EMA calculated")
-        
-        print("\nAll indicators calculated successfully")
-        print("Available columns:", df.columns.tolist())
         
-        # RSI değerlerini yazdır
-        if 'RSI' in df.columns:
-            print("\nRSI Statistics:")
-            print(f"Last 5 RSI values:\n{df['RSI'].tail()}")
-        
-        print("=== Indicator Calculation Complete ===\n")
+        indicator_log.debug("All indicators calculated, columns: %s", list(df.columns))
         return df
         
     except Exception as e:
-        print(f"\nError calculating indicators: {str(e)}")
-        traceback.print_exc()
+        indicator_log.exception("Error calculating indicators: %s", e)
         return None
 
-def backtest_strategy(df, buy_indicators, sell_indicators):
+SIGNAL_DESCRIPTIONS = {
+    'buy': {
+        'RSI': "RSI: {1:.2f} <= {2}",
+        'MACD': "MACD: {1:.2f} > Signal: {2:.2f}",
+        'Bollinger': "Price: {1:.2f} <= Lower Band: {2:.2f}",
+        'SMA': "Price: {1:.2f} > SMA: {2:.2f}",
+        'EMA': "Price: {1:.2f} > EMA: {2:.2f}"
+    },
+    'sell': {
+        'RSI': "RSI: {1:.2f} >= {2}",
+        'MACD': "MACD: {1:.2f} < Signal: {2:.2f}",
+        'Bollinger': "Price: {1:.2f} >= Upper Band: {2:.2f}",
+        'SMA': "Price: {1:.2f} < SMA: {2:.2f}",
+        'EMA': "Price: {1:.2f} < EMA: {2:.2f}"
+    }
+}
+
+def describe_signals(signals, side):
+    return ', '.join(SIGNAL_DESCRIPTIONS[side][signal[0]].format(*signal) for signal in signals)
+
+# Simulated bars between progress reports of the loop engine
+BACKTEST_PROGRESS_BARS = 1000
+
+def backtest_strategy(df, buy_indicators, sell_indicators, progress=None):
     try:
-        initial_balance = 10000
+        initial_balance = INITIAL_BALANCE
         balance = initial_balance
         trades = 0
         wins = 0
-        trade_history = []
+        trade_log = TradeLog()
+        times = open_times_ms(df.index)
+        executed = []
+        entry_bar = None
         position = 0  # 0: pozisyon yok, 1: pozisyon var
         current_amount = 0
         current_buy_price = 0
 
-        print("\nStarting backtest with:")
-        print(f"Initial balance: ${initial_balance}")
+        # Trade level messages are only formatted when debug logging is on
+        debug = backtest_log.isEnabledFor(logging.DEBUG)
 
-        # Satış göstergelerini ayarla
-        for indicator, config in buy_indicators.items():
-            if config['active']:
-                # RSI için özel durum
-                if indicator == 'rsi' and 'rsi' in sell_indicators:
-                    continue  # RSI zaten ayarlanmış, değiştirme
-                
-                # Diğer göstergeler için satış ayarlarını kopyala
-                sell_indicators[indicator] = config.copy()
-                sell_indicators[indicator]['active'] = True
-                
-                # Göstergeye özel değerleri ayarla
-                if indicator == 'bollinger':
-                    sell_indicators[indicator]['value'] = config['value']
-                    sell_indicators[indicator]['std_dev'] = config['std_dev']
-                elif indicator == 'macd':
-                    sell_indicators[indicator]['values'] = config['values'].copy()
-                else:
-                    sell_indicators[indicator]['value'] = config['value']
-
-        print("\nUpdated Sell Indicators:", sell_indicators)  # Debug için eklendi
-
-        # Bollinger Bands için satış indikatörünü otomatik olarak ekle
-        if 'bollinger' in buy_indicators and buy_indicators['bollinger']['active']:
-            if 'bollinger' not in sell_indicators:
-                sell_indicators['bollinger'] = buy_indicators['bollinger'].copy()
-            sell_indicators['bollinger']['active'] = True
-            sell_indicators['bollinger']['value'] = buy_indicators['bollinger']['value']
-            sell_indicators['bollinger']['std_dev'] = buy_indicators['bollinger']['std_dev']
-
-        # EMA göstergesi için satış sinyallerini otomatik olarak ayarla
-        if 'ema' in buy_indicators and buy_indicators['ema']['active']:
-            if 'ema' not in sell_indicators:
-                sell_indicators['ema'] = buy_indicators['ema'].copy()
-            sell_indicators['ema']['active'] = True
-            sell_indicators['ema']['value'] = buy_indicators['ema']['value']
-
-        # MACD göstergesi için satış sinyallerini otomatik olarak ayarla
-        if 'macd' in buy_indicators and buy_indicators['macd']['active']:
-            if 'macd' not in sell_indicators:
-                sell_indicators['macd'] = buy_indicators['macd'].copy()
-            sell_indicators['macd']['active'] = True
-            sell_indicators['macd']['values'] = buy_indicators['macd']['values']
-
-        # SMA göstergesi için satış sinyallerini otomatik olarak ayarla
-        if 'sma' in buy_indicators and buy_indicators['sma']['active']:
-            if 'sma' not in sell_indicators:
-                sell_indicators['sma'] = buy_indicators['sma'].copy()
-            sell_indicators['sma']['active'] = True
-            sell_indicators['sma']['value'] = buy_indicators['sma']['value']
-
-        for i in range(26, len(df)):  # MACD için minimum 26 periyot gerekli
-            current_time = df.index[i]
-            current_price = df['Close'].iloc[i]
-            
-            # Initialize signals
-            buy_signals = []
-            sell_signals = []
-            
-            # RSI sinyallerini kontrol et
-            if 'rsi' in buy_indicators and buy_indicators['rsi']['active']:
-                current_rsi = df['RSI'].iloc[i]
-                buy_threshold = buy_indicators['rsi']['value']
-                if current_rsi <= buy_threshold:
-                    buy_signals.append(('RSI', current_rsi, buy_threshold))
-            
-            if 'rsi' in sell_indicators and sell_indicators['rsi']['active']:
-                current_rsi = df['RSI'].iloc[i]
-                sell_threshold = sell_indicators['rsi']['value']
-                if current_rsi >= sell_threshold:
-                    sell_signals.append(('RSI', current_rsi, sell_threshold))
-            
-            # MACD sinyallerini kontrol et
-            if 'macd' in buy_indicators and buy_indicators['macd']['active']:
-                current_macd = df['MACD'].iloc[i]
-                current_signal = df['MACD_signal'].iloc[i]
-                if current_macd > current_signal:
-                    buy_signals.append(('MACD', current_macd, current_signal))
-
-            if 'macd' in sell_indicators and sell_indicators['macd']['active']:
-                current_macd = df['MACD'].iloc[i]
-                current_signal = df['MACD_signal'].iloc[i]
-                if current_macd < current_signal:
-                    sell_signals.append(('MACD', current_macd, current_signal))
-
-            # Bollinger Bands sinyallerini kontrol et
-            if 'bollinger' in buy_indicators and buy_indicators['bollinger']['active']:
-                if df['Close'].iloc[i] <= df['lower_band'].iloc[i]:
-                    buy_signals.append(('Bollinger', df['Close'].iloc[i], df['lower_band'].iloc[i]))
-
-            if 'bollinger' in sell_indicators and sell_indicators['bollinger']['active']:
-                if df['Close'].iloc[i] >= df['upper_band'].iloc[i]:
-                    sell_signals.append(('Bollinger', df['Close'].iloc[i], df['upper_band'].iloc[i]))
-
-            # SMA sinyallerini kontrol et
-            if 'sma' in buy_indicators and buy_indicators['sma']['active']:
-                current_price = df['Close'].iloc[i]
-                sma_value = df[f"SMA_{buy_indicators['sma']['value']}"].iloc[i]
-                if current_price > sma_value:  # Fiyat SMA'nın üzerine çıktığında al
-                    buy_signals.append(('SMA', current_price, sma_value))
-
-            if 'sma' in sell_indicators and sell_indicators['sma']['active']:
-                current_price = df['Close'].iloc[i]
-                sma_value = df[f"SMA_{sell_indicators['sma']['value']}"].iloc[i]
-                if current_price < sma_value:  # Fiyat SMA'nın altına düştüğünde sat
-                    sell_signals.append(('SMA', current_price, sma_value))
-
-            # EMA sinyallerini kontrol et
-            if 'ema' in buy_indicators and buy_indicators['ema']['active']:
-                length = str(buy_indicators['ema']['value'])
-                col_name = f'EMA_{length}'
-                if col_name in df.columns:
-                    # Alış sinyali: Fiyat EMA'nın üstüne çıktığında
-                    if df['Close'].iloc[i] > df[col_name].iloc[i]:
-                        buy_signals.append(('EMA', df['Close'].iloc[i], df[col_name].iloc[i]))
-
-            if 'ema' in sell_indicators and sell_indicators['ema']['active']:
-                length = str(sell_indicators['ema']['value'])
-                col_name = f'EMA_{length}'
-                if col_name in df.columns:
-                    # Satış sinyali: Fiyat EMA'nın altına düştüğünde
-                    if df['Close'].iloc[i] < df[col_name].iloc[i]:
-                        sell_signals.append(('EMA', df['Close'].iloc[i], df[col_name].iloc[i]))
+        # Göstergeler bir kez derlenir, bar döngüsünde sadece dizi erişimi kalır
+        plan = compile_plan(buy_indicators, sell_indicators)
+        columns = frame_columns(df)
+        close = columns['Close']
+        buy_rules = plan.bind('buy', columns)
+        sell_rules = plan.bind('sell', columns)
+
+        backtest_log.debug("Starting backtest, initial balance $%s, sell indicators: %s", initial_balance, plan.sell_indicators)
+
+        for i in range(WARMUP_BARS, len(df)):  # MACD için minimum 26 periyot gerekli
+            if progress is not None and i % BACKTEST_PROGRESS_BARS == 0:
+                progress(i)
+            current_price = close[i]
 
             # Alım sinyali kontrolü - tüm aktif indikatörler alım sinyali veriyorsa al
-            if position == 0 and balance > 0:
-                should_buy = True
-                for indicator, config in buy_indicators.items():
-                    if config['active']:
-                        indicator_signal = False
-                        for signal in buy_signals:
-                            if signal[0].lower() == indicator.lower():
-                                indicator_signal = True
-                                break
-                        should_buy &= indicator_signal
-                
-                if should_buy and len(buy_signals) > 0:
-                    current_buy_price = current_price
-                    current_amount = balance / current_price
-                    balance = 0
-                    position = 1
-                    trades += 1
-                    
-                    print(f"\nBuy Signal at {current_time}")
-                    for signal in buy_signals:
-                        if signal[0] == 'RSI':
-                            print(f"RSI: {signal[1]:.2f} <= {signal[2]}")
-                        elif signal[0] == 'MACD':
-                            print(f"MACD: {signal[1]:.2f} > Signal: {signal[2]:.2f}")
-                        elif signal[0] == 'Bollinger':
-                            print(f"Price: {signal[1]:.2f} <= Lower Band: {signal[2]:.2f}")
-                        elif signal[0] == 'SMA':
-                            print(f"Price: {signal[1]:.2f} > SMA: {signal[2]:.2f}")
-                        elif signal[0] == 'EMA':
-                            print(f"Price: {signal[1]:.2f} < EMA: {signal[2]:.2f}")
-                    print(f"Price: {current_price:.2f}, Amount: {current_amount:.8f}")
-                    
-                    trade_history.append(f"<span style='color: #22c55e'>Buy Signal: Date: {current_time}, Price: {current_price:.2f}, Amount: {current_amount:.8f}</span>")
+            if position == 0 and balance > 0 and holds_at(buy_rules, i):
+                current_buy_price = current_price
+                current_amount = balance / current_price
+                balance = 0
+                position = 1
+                trades += 1
+
+                if debug:
+                    backtest_log.debug("Buy signal at %s (%s), price: %.2f, amount: %.8f", df.index[i],
+                                       describe_signals(signals_at(buy_rules, i), 'buy'), current_price, current_amount)
+
+                trade_log.add(times[i], 'buy', current_price, current_amount, None, current_amount * current_price)
+                entry_bar = i
 
             # Satış sinyali kontrolü - tüm aktif indikatörler satış sinyali veriyorsa sat
-            if position == 1:
-                should_sell = True
-                for indicator, config in sell_indicators.items():
-                    if config['active']:
-                        indicator_signal = False
-                        for signal in sell_signals:
-                            if signal[0].lower() == indicator.lower():
-                                indicator_signal = True
-                                break
-                        should_sell &= indicator_signal
-                
-                if should_sell and len(sell_signals) > 0:
-                    position_value = current_amount * current_price
-                    profit_percent = ((current_price - current_buy_price) / current_buy_price) * 100
-                    balance = position_value
-                    if profit_percent > 0:
-                        wins += 1
-                    position = 0
-                    trades += 1
-                    
-                    print(f"\nSell Signal at {current_time}")
-                    for signal in sell_signals:
-                        if signal[0] == 'RSI':
-                            print(f"RSI: {signal[1]:.2f} >= {signal[2]}")
-                        elif signal[0] == 'MACD':
-                            print(f"MACD: {signal[1]:.2f} < Signal: {signal[2]:.2f}")
-                        elif signal[0] == 'Bollinger':
-                            print(f"Price: {signal[1]:.2f} >= Upper Band: {signal[2]:.2f}")
-                        elif signal[0] == 'SMA':
-                            print(f"Price: {signal[1]:.2f} < SMA: {signal[2]:.2f}")
-                        elif signal[0] == 'EMA':
-                            print(f"Price: {signal[1]:.2f} > EMA: {signal[2]:.2f}")
-                    print(f"Price: {current_price:.2f}, Profit: {profit_percent:.2f}%")
-                    print(f"Position Value: ${position_value:.2f}")
-                    
-                    trade_history.append(f"<span style='color: #ef4444'>Sell Signal: Date: {current_time}, Price: {current_price:.2f}, Profit: {profit_percent:.2f}%, Balance: ${balance:.2f}</span>")
+            if position == 1 and holds_at(sell_rules, i):
+                position_value = current_amount * current_price
+                profit_percent = ((current_price - current_buy_price) / current_buy_price) * 100
+                balance = position_value
+                if profit_percent > 0:
+                    wins += 1
+                position = 0
+                trades += 1
+
+                if debug:
+                    backtest_log.debug("Sell signal at %s (%s), price: %.2f, profit: %.2f%%, position value: $%.2f",
+                                       df.index[i], describe_signals(signals_at(sell_rules, i), 'sell'), current_price,
+                                       profit_percent, position_value)
+
+                trade_log.add(times[i], 'sell', current_price, current_amount, profit_percent, balance)
+                executed.append((entry_bar, i, current_amount))
 
         # Kalan pozisyonu kapat
         if position == 1:
-            final_price = df['Close'].iloc[-1]
+            final_price = close[-1]
             position_value = current_amount * final_price
             profit_percent = ((final_price - current_buy_price) / current_buy_price) * 100
             balance = position_value
@@ -398,103 +315,431 @@ def backtest_strategy(df, buy_indicators, sell_indicators):
                 wins += 1
             trades += 1
             
-            print(f"\nClosing final position at {df.index[-1]}")
-            print(f"Entry Price: {current_buy_price:.2f}, Exit Price: {final_price:.2f}")
-            print(f"Profit: {profit_percent:.2f}%")
-            print(f"Position Value: ${position_value:.2f}")
+            backtest_log.debug("Closing final position at %s, entry: %.2f, exit: %.2f, profit: %.2f%%, position value: $%.2f",
+                               df.index[-1], current_buy_price, final_price, profit_percent, position_value)
             
-            trade_history.append(f"<span style='color: #ef4444'>Position Closed: Entry Price: {current_buy_price:.2f}, Exit Price: {final_price:.2f}, Profit: {profit_percent:.2f}%, Final Value: ${position_value:.2f}</span>")
+            trade_log.add(times[-1], 'close', final_price, current_amount, profit_percent, position_value)
+            executed.append((entry_bar, None, current_amount))
 
         profit = balance - initial_balance
         win_rate = (wins / trades * 100) if trades > 0 else 0
 
-        print("\nBacktest Summary:")
-        print(f"Total Trades: {trades}")
-        print(f"Win Rate: {win_rate:.2f}%")
-        print(f"Final Balance: ${balance:.2f}")
-        print(f"Total Profit: ${profit:.2f}")
-        print(f"Return on Investment: {(profit/initial_balance)*100:.2f}%")
-        print(f"Average Profit per Trade: ${profit/trades:.2f}" if trades > 0 else "No trades executed")
+        backtest_log.info("Backtest finished: %d trades, win rate %.2f%%, final balance $%.2f, profit $%.2f (%.2f%%)",
+                          trades, win_rate, balance, profit, profit / initial_balance * 100)
 
         return {
             'success': True,
             'profit': profit,
             'trades': trades,
             'winRate': round(win_rate, 2),
-            'logs': trade_history
+            'tradeLog': trade_log.to_dict(),
+            # Equity curve and risk figures from array operations over the recorded trades
+            **risk_metrics(times, close, executed, initial_balance)
         }
 
     except Exception as e:
-        print(f"\nError in backtest strategy: {str(e)}")
-        traceback.print_exc()
+        backtest_log.exception("Error in backtest strategy: %s", e)
         raise Exception(f"Error in backtest strategy: {str(e)}")
 
-def trade(balance_history, interval):
-    logs = []
-    for trade in balance_history:
-        action = trade['Action']
-        date = trade['Date']
-        price = trade['Price']
-        balance = trade['Balance']
-        log_entry = f"<span style='color: #94a3b8'>[{date}]</span> {action} Signal: Price: {price}, Balance: ${balance:.2f}"
-        logs.append(log_entry)
-    return logs
+def execute_backtest(data, job=None):
+    """Fetch candles, calculate indicators and simulate one backtest request, reporting progress to job"""
+    backtest_log.debug("Backtest request: %s", data)
+    
+    # Calculate date range based on frontend period
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=int(data['period']))
+    start_time = int(start_date.timestamp() * 1000)
+    end_time = int(end_date.timestamp() * 1000)
+    
+    # Get historical data with dynamic symbol and timeframe
+    symbol = f"{data['coin']}USDT"
+    interval = get_interval_string(data['timeFrame'])
+    backtest_log.info("Starting backtest for %s %s from %s to %s", symbol, interval, start_date, end_date)
+    if job is not None:
+        job.update(stage='fetching')
+    with metrics.stage('fetch'):
+        candles = get_candles(symbol, interval, start_time, end_time,
+                              on_page=job.add_candles if job is not None else None)
+    with metrics.stage('frame'):
+        df = candles.to_frame()
+    
+    if df is None:
+        backtest_log.error("Failed to fetch historical data")
+        raise Exception("No historical data available")
+    backtest_log.debug("Fetched %d candles", len(df))
+    
+    if job is not None:
+        job.update(stage='indicators', candles=len(df), totalBars=len(df))
+    with metrics.stage('indicators'):
+        df = calculate_dynamic_indicators(df, data['buyIndicators'], data['sellIndicators'])
+    
+    if df is None:
+        raise Exception("Failed to calculate indicators")
+    
+    # Run backtest, 'vectorized' engine can be selected per request for A/B comparison
+    engine = data.get('engine', 'loop')
+    backtest_log.debug("Running backtest strategy with %s engine", engine)
+    if job is not None:
+        job.update(stage='simulating')
+    if engine not in ('loop', 'vectorized'):
+        raise Exception(f"Unknown backtest engine: {engine}")
+    with metrics.stage('simulate'):
+        if engine == 'vectorized':
+            results = vectorized_backtest(df, data['buyIndicators'], data['sellIndicators'])
+        else:
+            results = backtest_strategy(df, data['buyIndicators'], data['sellIndicators'],
+                                        progress=(lambda bars: job.update(bars=bars)) if job is not None else None)
+    metrics.count('backtest_bars', len(df), 'Bars simulated by backtests')
+    metrics.count('backtest_trades', results['trades'], 'Trades taken by backtests')
+    # Long trade logs can be fetched page by page, tradeLogLimit=0 leaves only the totals
+    offset, limit = int(data.get('tradeLogOffset', 0)), data.get('tradeLogLimit')
+    if offset or limit is not None:
+        results['tradeLog'] = paginate_trade_log(results['tradeLog'], offset, None if limit is None else int(limit))
+    if job is not None:
+        job.update(bars=len(df))
+    backtest_log.debug("Backtest results: %s", results)
+    return results
 
 @app.route('/api/backtest', methods=['POST'])
 def run_backtest():
     try:
         data = request.get_json()
-        print("\n=== Starting Backtest ===")
-        print("Request Data:", data)
+        return jsonify(execute_backtest(data))
         
-        # Calculate date range based on frontend period
+    except Exception as e:
+        backtest_log.exception("Error in backtest: %s", e)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+def run_backtest_job(data, job):
+    # Jobs run outside of a request, their timings are traced on the worker thread
+    with metrics.request_trace() as trace:
+        results = execute_backtest(data, job)
+    if data.get('timings'):
+        results = dict(results, timings=trace.summary())
+    return results
+
+# Long backtests run in the background, the client polls the job for progress and the result
+backtest_jobs = BacktestJobQueue(run_backtest_job)
+
+@app.route('/api/backtest/jobs', methods=['POST'])
+def submit_backtest_job():
+    try:
+        data = request.get_json()
+        for field in ('coin', 'timeFrame', 'period', 'buyIndicators', 'sellIndicators'):
+            if field not in data:
+                raise Exception(f"Missing field: {field}")
+        job, deduplicated = backtest_jobs.submit(data)
+        backtest_log.info("Backtest job %s %s", job.id, 'joined' if deduplicated else 'queued')
+        response = job.to_dict(include_result=False)
+        response.update({'success': True, 'deduplicated': deduplicated})
+        return jsonify(response), 202
+
+    except Exception as e:
+        backtest_log.warning("Error submitting backtest job: %s", e)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/backtest/jobs', methods=['GET'])
+def list_backtest_jobs():
+    return jsonify({
+        'success': True,
+        'jobs': [job.to_dict(include_result=False) for job in backtest_jobs.jobs()]
+    })
+
+@app.route('/api/backtest/jobs/<job_id>', methods=['GET'])
+def get_backtest_job(job_id):
+    job = backtest_jobs.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Backtest job not found'
+        }), 404
+    response = job.to_dict()
+    response['success'] = True
+    return jsonify(response)
+
+@app.route('/api/optimize', methods=['POST'])
+def run_optimize():
+    try:
+        data = request.get_json()
+        backtest_log.debug("Optimization grid: %s", data['grid'])
+
         end_date = datetime.now()
         start_date = end_date - timedelta(days=int(data['period']))
         start_time = int(start_date.timestamp() * 1000)
         end_time = int(end_date.timestamp() * 1000)
-        print(f"Date Range: {start_date} to {end_date}")
-        
-        # Get historical data with dynamic symbol and timeframe
+
+        # Candles are fetched once and shared by every combination
         symbol = f"{data['coin']}USDT"
         interval = get_interval_string(data['timeFrame'])
-        print(f"\nFetching data for {symbol}")
-        print(f"Timeframe: {interval}")
-        df = get_historical_klines(symbol, interval, start_time, end_time)
-        
-        if df is not None:
-            print(f"Fetched {len(df)} candles")
-            print("Sample data:")
-            print(df.head())
-        else:
-            print("Failed to fetch historical data")
+        with metrics.stage('fetch'):
+            candles = get_candles(symbol, interval, start_time, end_time)
+        with metrics.stage('frame'):
+            df = candles.to_frame()
+        if df is None or df.empty:
             raise Exception("No historical data available")
-        
-        # Calculate indicators
-        print("\nActive Indicators:")
-        print("Buy:", {k: v for k, v in data['buyIndicators'].items() if v['active']})
-        print("Sell:", {k: v for k, v in data['sellIndicators'].items() if v['active']})
-        
-        df = calculate_dynamic_indicators(df, data['buyIndicators'], data['sellIndicators'])
-        
-        if df is None:
-            raise Exception("Failed to calculate indicators")
-        
-        # Run backtest
-        print("\nRunning backtest strategy...")
-        results = backtest_strategy(df, data['buyIndicators'], data['sellIndicators'])
-        print("Backtest Results:", results)
-        print("=== Backtest Complete ===\n")
-        
+        backtest_log.debug("Fetched %d candles for %s %s", len(df), symbol, interval)
+
+        with metrics.stage('optimize'):
+            results = run_grid(df, data.get('buyIndicators', {}), data.get('sellIndicators', {}), data['grid'],
+                               top=int(data.get('top', 20)), sort_by=data.get('sortBy', 'profit'))
+        results['candles'] = len(df)
+        backtest_log.info("Evaluated %d combinations using %d indicator series",
+                          results['combinations'], results['series_computed'])
+
         return jsonify(results)
-        
+
+    except Exception as e:
+        backtest_log.exception("Error in optimization: %s", e)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/walkforward', methods=['POST'])
+def run_walkforward():
+    try:
+        data = request.get_json()
+        for field in ('coin', 'timeFrame', 'period', 'buyIndicators', 'sellIndicators', 'trainBars', 'testBars'):
+            if field not in data:
+                raise Exception(f"Missing field: {field}")
+
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=int(data['period']))
+        start_time = int(start_date.timestamp() * 1000)
+        end_time = int(end_date.timestamp() * 1000)
+
+        # One download and one indicator pass over the full history serve every window
+        symbol = f"{data['coin']}USDT"
+        interval = get_interval_string(data['timeFrame'])
+        with metrics.stage('fetch'):
+            candles = get_candles(symbol, interval, start_time, end_time)
+        with metrics.stage('frame'):
+            df = candles.to_frame()
+        if df.empty:
+            raise Exception("No historical data available")
+
+        with metrics.stage('walkforward'):
+            results = run_walk_forward(df, data['buyIndicators'], data['sellIndicators'], data.get('grid', {}),
+                                       int(data['trainBars']), int(data['testBars']),
+                                       step_bars=int(data['stepBars']) if data.get('stepBars') else None,
+                                       anchored=bool(data.get('anchored', False)), sort_by=data.get('sortBy', 'profit'))
+        results['candles'] = len(df)
+        backtest_log.info("Walk-forward over %d candles: %d folds, %s%% compounded out-of-sample return",
+                          len(df), results['outOfSample']['folds'], results['outOfSample']['compoundedReturnPct'])
+        return jsonify(results)
+
     except Exception as e:
-        print(f"\nError in backtest: {str(e)}")
-        traceback.print_exc()  # Print the full error traceback
+        backtest_log.exception("Error in walk-forward: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
         }), 400
 
+@app.route('/api/backtest/batch', methods=['POST'])
+def run_backtest_batch():
+    try:
+        data = request.get_json()
+        coins = data['coins']
+        timeframes = data['timeFrames']
+        strategies = data['strategies']
+        include_logs = bool(data.get('includeLogs', False))
+        backtest_log.info("Starting batch backtest: %d coins x %d timeframes x %d strategies",
+                          len(coins), len(timeframes), len(strategies))
+
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=int(data['period']))
+        start_time = int(start_date.timestamp() * 1000)
+        end_time = int(end_date.timestamp() * 1000)
+
+        def load_candles(coin, timeframe):
+            return get_historical_klines(f"{coin}USDT", get_interval_string(timeframe), start_time, end_time)
+
+        # Validates the payload here, a bad batch is a 400 and not a cut off stream
+        results = run_batch(load_candles, coins, timeframes, strategies, include_logs)
+
+        # One JSON object per line, written as soon as each job finishes
+        def generate():
+            jobs = 0
+            for result in results:
+                jobs += 1
+                yield json.dumps(result, default=str) + '\n'
+            yield json.dumps({'done': True, 'jobs': jobs}) + '\n'
+            backtest_log.info("Batch backtest complete, %d jobs", jobs)
+
+        return Response(generate(), mimetype='application/x-ndjson')
+
+    except Exception as e:
+        backtest_log.exception("Error in batch backtest: %s", e)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/backtest/stream', methods=['POST'])
+def run_backtest_stream():
+    try:
+        data = request.get_json()
+        for field in ('coin', 'timeFrame', 'period', 'buyIndicators', 'sellIndicators'):
+            if field not in data:
+                raise Exception(f"Missing field: {field}")
+
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=int(data['period']))
+        start_time = int(start_date.timestamp() * 1000)
+        end_time = int(end_date.timestamp() * 1000)
+
+        symbol = f"{data['coin']}USDT"
+        interval = get_interval_string(data['timeFrame'])
+        interval_ms = get_timeframe_minutes(data['timeFrame']) * 60 * 1000
+        windows = chunk_windows(start_time, end_time, interval_ms, int(data.get('chunkCandles', STREAM_CHUNK_CANDLES)))
+        backtest_log.info("Starting streamed backtest for %s %s in %d chunks", symbol, interval, len(windows))
+
+        def load_chunk(window_start, window_end):
+            with metrics.stage('fetch'):
+                return get_candles(symbol, interval, window_start, window_end, fill_store=False)
+
+        # ?format=sse sends the same objects as server-sent events, NDJSON otherwise
+        sse = request.args.get('format') == 'sse'
+
+        def generate():
+            bars = trades = 0
+            try:
+                for update in stream_backtest(load_chunk, windows, data['buyIndicators'], data['sellIndicators']):
+                    bars, trades = update['bars'], update['trades']
+                    line = json.dumps(update, default=str)
+                    yield f"data: {line}\n\n" if sse else line + '\n'
+            except Exception as e:
+                backtest_log.exception("Error in streamed backtest: %s", e)
+                line = json.dumps({'type': 'error', 'success': False, 'error': str(e)})
+                yield f"data: {line}\n\n" if sse else line + '\n'
+            metrics.count('backtest_bars', bars, 'Bars simulated by backtests')
+            metrics.count('backtest_trades', trades, 'Trades taken by backtests')
+            backtest_log.info("Streamed backtest complete, %d bars, %d trades", bars, trades)
+
+        if sse:
+            return Response(generate(), mimetype='text/event-stream', headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'
+            })
+        return Response(generate(), mimetype='application/x-ndjson')
+
+    except Exception as e:
+        backtest_log.exception("Error in streamed backtest: %s", e)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/indicator-cache', methods=['GET'])
+def get_indicator_cache_stats():
+    return jsonify({
+        'success': True,
+        'cache': indicator_cache.stats()
+    })
+
+@app.route('/api/rollup-cache', methods=['GET'])
+def get_rollup_cache_stats():
+    return jsonify({
+        'success': True,
+        'enabled': CANDLE_RESAMPLE and kline_store is not None,
+        'cache': rollup_cache.stats()
+    })
+
+# ?profile=1 samples the request's stack, only honoured when explicitly allowed on the server
+ALLOW_REQUEST_PROFILING = os.getenv('ALLOW_REQUEST_PROFILING', '0') == '1'
+
+@app.before_request
+def begin_request_trace():
+    g.trace = metrics.begin_trace()
+    g.profiler = None
+    if ALLOW_REQUEST_PROFILING and request.args.get('profile') == '1':
+        g.profiler = metrics.SamplingProfiler().start()
+
+@app.after_request
+def record_request_metrics(response):
+    trace = g.get('trace')
+    if trace is None:
+        return response
+    endpoint = request.endpoint or 'unmatched'
+    metrics.registry.inc('http_requests_total', 1, 'HTTP requests handled',
+                         endpoint=endpoint, method=request.method, status=response.status_code)
+    metrics.registry.observe('http_request_duration_seconds', time.perf_counter() - trace.started,
+                             'HTTP request latency until the response is returned', endpoint=endpoint)
+    if trace.stages:
+        response.headers['Server-Timing'] = trace.server_timing()
+
+    profiler = g.get('profiler')
+    if profiler is not None:
+        profiler.stop()
+    # Streamed responses are already on their way, only complete JSON bodies get the breakdown
+    if (request.args.get('timings') == '1' or profiler is not None) and response.is_json and not response.is_streamed:
+        payload = response.get_json()
+        if isinstance(payload, dict):
+            payload['timings'] = trace.summary()
+            if profiler is not None:
+                payload['profile'] = profiler.report()
+            response.set_data(app.json.dumps(payload))
+    return response
+
+@app.teardown_request
+def end_request_trace(exc):
+    metrics.end_trace()
+
+metrics.registry.gauge('indicator_cache_bytes', lambda: indicator_cache.stats()['bytes'], 'Bytes held by the indicator cache')
+metrics.registry.gauge('indicator_cache_entries', lambda: indicator_cache.stats()['entries'], 'Series held by the indicator cache')
+metrics.registry.gauge('backtest_jobs_active', lambda: sum(job.status in ('queued', 'running') for job in backtest_jobs.jobs()),
+                       'Backtest jobs queued or running in this process')
+metrics.registry.gauge('signal_plan_cache_entries', lambda: signal_plans.stats()['entries'], 'Compiled signal plans held in this process')
+metrics.registry.gauge('live_test_sessions', lambda: len(live_test_store.sessions()), 'Active live test sessions')
+metrics.registry.gauge('livetest_streams_open', lambda: live_updates.count(), 'Open live test streams in this process')
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    # Counters are per process, with several gunicorn workers each scrape sees one worker
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
+# pandas and python-binance are imported in the background once the worker serves requests
+WARM_UP_IMPORTS = os.getenv('WARM_UP_IMPORTS', '1') == '1'
+import_warm_up = ImportWarmUp()
+
+@app.before_request
+def start_import_warm_up():
+    if WARM_UP_IMPORTS:
+        import_warm_up.start()
+
+@app.route('/api/health', methods=['GET'])
+def health():
+    # Liveness only, answers as soon as the app is imported
+    return jsonify({'success': True, 'status': 'ok'})
+
+@app.route('/api/ready', methods=['GET'])
+def readiness():
+    """Ready once the live test store answers, the exchange client and deferred imports are only reported"""
+    checks = {}
+    try:
+        live_test_store.sessions()
+        checks['liveTestStore'] = 'ok'
+    except Exception as e:
+        checks['liveTestStore'] = f'error: {e}'
+    ready = all(value == 'ok' for value in checks.values())
+    # The client connects on first use, an offline worker can still serve stored candles
+    checks['exchangeClient'] = 'connected' if client is not None else (f'error: {client_error}' if client_error else 'deferred')
+    checks['klineStore'] = 'enabled' if kline_store is not None else 'disabled'
+    return jsonify({
+        'success': ready,
+        'ready': ready,
+        'startupSeconds': STARTUP_SECONDS,
+        'uptimeSeconds': round(time.perf_counter() - IMPORT_STARTED, 3),
+        'checks': checks,
+        'imports': import_warm_up.status()
+    }), 200 if ready else 503
+
 @app.route('/api/routes', methods=['GET'])
 def list_routes():
     routes = []
@@ -510,274 +755,452 @@ def list_routes():
 def get_initial_balance():
     return jsonify({
         'success': True,
-        'initial_balance': 10000
+        'initial_balance': INITIAL_BALANCE
     })
 
+# Candles used to warm up a live test's indicator state on its first check
+LIVE_WARMUP_CANDLES = 1000
+# Evaluations kept per live test session for /api/livetest/log
+LIVE_LOG_SIZE = 100
+# Sessions a single replay request may start, they run concurrently on the replay thread pool
+MAX_REPLAY_SESSIONS = 100
+
+def update_live_indicators(live_test, end_time=None):
+    """Feed newly closed candles into the live test's indicator state, return (open_time, row) of the latest candle"""
+    if end_time is None:
+        end_time = int(datetime.now().timestamp() * 1000)
+    interval_ms = get_timeframe_minutes(live_test['timeframe']) * 60 * 1000
+    # A 4h warm-up of LIVE_WARMUP_CANDLES would be 240k one minute candles, live tests fetch their own interval
+    df = get_historical_klines(live_test['symbol'], live_test['timeframe'], live_test['last_candle_time'] + 1, end_time,
+                               resample=False)
+    if df is None or df.empty:
+        return None
+
+    open_times = df.index.values.astype('datetime64[ms]').astype('int64')
+    closed = open_times + interval_ms <= end_time
+    state = live_test['indicator_state']
+    row = None
+    for close in df['Close'].to_numpy()[closed]:
+        row = state.update(close)
+    if closed.any():
+        live_test['last_candle_time'] = int(open_times[closed][-1])
+
+    # The still-forming candle is evaluated at its current price without being committed
+    if not closed[-1]:
+        row = state.peek(df['Close'].iloc[-1])
+    return int(open_times[-1]), row
+
+def append_live_log(live_test, result):
+    """Add an evaluation to the session's bounded log under the next sequence number"""
+    live_test['log_seq'] = live_test.get('log_seq', 0) + 1
+    log = live_test.setdefault('log', [])
+    log.append(dict(result, seq=live_test['log_seq']))
+    del log[:-LIVE_LOG_SIZE]
+
+def advance_live_test(live_test, open_times, closes):
+    """Feed closed candles the live test hasn't seen yet, evaluating and logging after each one"""
+    new = open_times > live_test['last_candle_time']
+    if not new.any():
+        return []
+    interval_ms = get_timeframe_minutes(live_test['timeframe']) * 60 * 1000
+    if open_times[new][0] > live_test['last_candle_time'] + interval_ms:
+        # Missed candles (new session, restart or reconnect), fill them over REST first
+        update_live_indicators(live_test, end_time=int(open_times[new][0]))
+
+    results = []
+    for open_time, close in zip(open_times[new], closes[new]):
+        if open_time <= live_test['last_candle_time']:
+            continue
+        row = live_test['indicator_state'].update(close)
+        live_test['last_candle_time'] = int(open_time)
+        result = evaluate_live_test(live_test, int(open_time), row)
+        append_live_log(live_test, result)
+        results.append(result)
+    return results
+
+def fetch_closes(symbol, timeframe, start_time, end_time):
+    candles = get_candles(symbol, timeframe, start_time, end_time)
+    return candles.open_time, candles.close
+
+def new_live_test(data):
+    """Initial live test session state for a start or replay request"""
+    timeframe = data['timeFrame']
+    return {
+        'coin': data['coin'],
+        'symbol': f"{data['coin']}USDT",
+        'timeframe': timeframe,
+        'buy_indicators': data['buyIndicators'],
+        'sell_indicators': data['sellIndicators'],
+        'position': 0,
+        'balance': INITIAL_BALANCE,
+        'amount': 0,
+        'trades': 0,
+        'wins': 0,
+        'buy_price': 0,
+        'start_time': datetime.now(),
+        # Indicators are updated incrementally from closed candles, the first
+        # check warms them up with LIVE_WARMUP_CANDLES of history
+        'indicator_state': IndicatorState(data['buyIndicators'], data['sellIndicators']),
+        'signal_plan': compile_plan(data['buyIndicators'], data['sellIndicators']),
+        'last_candle_time': int(datetime.now().timestamp() * 1000)
+                            - LIVE_WARMUP_CANDLES * get_timeframe_minutes(timeframe) * 60 * 1000 - 1
+    }
+
 @app.route('/api/livetest/start', methods=['POST'])
 def start_livetest():
     try:
-        print("Received start live test request") # Debug log
         data = request.get_json()
         symbol = f"{data['coin']}USDT"
         timeframe = data['timeFrame']
         
-        print(f"Starting live test for {symbol} on {timeframe}") # Debug log
-        
         # Initialize live test parameters
-        live_test = {
-            'symbol': symbol,
-            'timeframe': timeframe,
-            'buy_indicators': data['buyIndicators'],
-            'sell_indicators': data['sellIndicators'],
-            'position': 0,
-            'balance': 10000,
-            'amount': 0,
-            'trades': 0,
-            'wins': 0,
-            'buy_price': 0,
-            'start_time': datetime.now()
-        }
+        live_test = new_live_test(data)
         
-        # Store live test configuration in memory
-        app.live_tests[symbol] = live_test
-        print(f"Live test configuration stored: {app.live_tests}") # Debug log
+        session_id = live_test_store.create(live_test)
+        live_log.info("Live test session %s started for %s %s", session_id, symbol, timeframe)
         
         return jsonify({
             'success': True,
+            'sessionId': session_id,
             'message': f'Live test started for {symbol} on {timeframe} timeframe'
         })
         
     except Exception as e:
-        print(f"Error in start_livetest: {str(e)}") # Debug log
+        live_log.warning("Error in start_livetest: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
         }), 400
 
+def evaluate_live_test(live_test, open_time, row):
+    """Evaluate a live test on one row of indicator values and apply any trade"""
+    plan = live_test.get('signal_plan')
+    if plan is None:
+        # Sessions stored before signal plans existed compile theirs on first use
+        plan = live_test['signal_plan'] = compile_plan(live_test['buy_indicators'], live_test['sell_indicators'])
+    current_price = row['Close']
+
+    indicator_values = {
+        'time': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(open_time // 1000)),
+        'price': float(current_price),
+        'buy_indicators': plan.report('buy', row),
+        'sell_indicators': plan.report('sell', row)
+    }
+
+    buy_signal = plan.signal('buy', row)
+    sell_signal = plan.signal('sell', row)
+
+    trade_executed = False
+    trade = None
+
+    if buy_signal and live_test['position'] == 0:
+        live_test['buy_price'] = current_price
+        live_test['amount'] = live_test['balance'] / current_price
+        live_test['balance'] = 0
+        live_test['position'] = 1
+        live_test['trades'] += 1
+        trade_executed = True
+        trade = {'time': open_time, 'side': 'buy', 'price': float(current_price), 'amount': float(live_test['amount']),
+                 'pnl': None, 'balance': float(live_test['amount'] * current_price)}
+
+    elif sell_signal and live_test['position'] == 1:
+        live_test['balance'] = live_test['amount'] * current_price
+        profit = ((current_price - live_test['buy_price']) / live_test['buy_price']) * 100
+        if current_price > live_test['buy_price']:
+            live_test['wins'] += 1
+        trade = {'time': open_time, 'side': 'sell', 'price': float(current_price), 'amount': float(live_test['amount']),
+                 'pnl': float(profit), 'balance': float(live_test['balance'])}
+        live_test['amount'] = 0
+        live_test['position'] = 0
+        trade_executed = True
+
+    # Current status is sent with every evaluation, the client decides how to show it
+    status = {
+        'holding': live_test['position'] == 1,
+        'coin': live_test['coin'],
+        'amount': float(live_test['amount']),
+        'price': float(current_price),
+        'balance': float(live_test['balance'])
+    }
+    if live_test['position'] == 1:
+        status['entryPrice'] = float(live_test['buy_price'])
+        status['unrealizedPnl'] = float((current_price - live_test['buy_price']) / live_test['buy_price'] * 100)
+
+    return {
+        'success': True,
+        'trade_executed': trade_executed,
+        'trade': trade,
+        'status': status,
+        'current_price': current_price,
+        'position': live_test['position'],
+        'balance': live_test['balance'],
+        'trades': live_test['trades'],
+        'win_rate': (live_test['wins'] / live_test['trades'] * 100) if live_test['trades'] > 0 else 0,
+        'indicator_values': indicator_values  # Add indicator values to response
+    }
+
 @app.route('/api/livetest/check', methods=['POST'])
 def check_livetest():
     try:
-        print("Received check live test request") # Debug log
         data = request.get_json()
-        symbol = f"{data['coin']}USDT"
+        session_id = data.get('sessionId')
+        
+        live_log.debug("Checking live test session %s", session_id)
         
-        print(f"Checking live test for {symbol}") # Debug log
-        print(f"Current live tests: {app.live_tests}") # Debug log
+        def check(live_test):
+            # Only candles closed since the last check are fetched and fed to the indicators
+            latest = update_live_indicators(live_test)
+            if latest is None:
+                return None
+            result = evaluate_live_test(live_test, *latest)
+            append_live_log(live_test, result)
+            return result
         
-        if symbol not in app.live_tests:
-            print(f"No live test found for {symbol}") # Debug log
+        try:
+            result = live_test_store.update(session_id, check)
+        except LiveTestNotFound:
+            live_log.debug("No live test found for session %s", session_id)
             return jsonify({
                 'success': False,
-                'error': 'No active live test found for this symbol'
+                'error': 'No active live test found for this session'
             }), 404
             
-        live_test = app.live_tests[symbol]
-        
-        # Get last 100 candles
-        end_time = int(datetime.now().timestamp() * 1000)
-        minutes_multiplier = get_timeframe_minutes(live_test['timeframe'])
-        start_time = end_time - (minutes_multiplier * 60 * 1000 * 100)
-        
-        df = get_historical_klines(symbol, live_test['timeframe'], start_time, end_time)
-        
-        if df is None or df.empty:
+        if result is None:
             return jsonify({
                 'success': False,
                 'error': 'No data available for the specified timeframe'
             }), 400
-            
-        df = calculate_dynamic_indicators(df, live_test['buy_indicators'], live_test['sell_indicators'])
         
-        # Collect indicator values
-        latest_data = df.iloc[-1]
-        current_price = latest_data['Close']
-        current_time = df.index[-1].strftime('%Y-%m-%d %H:%M:%S')
-        
-        indicator_values = {
-            'time': current_time,
-            'price': float(current_price),
-            'buy_indicators': {},
-            'sell_indicators': {}
-        }
-        
-        # Collect buy indicator values
-        for indicator, config in live_test['buy_indicators'].items():
-            if config['active']:
-                if indicator == 'rsi':
-                    indicator_values['buy_indicators']['rsi'] = {
-                        'value': float(latest_data['RSI']),
-                        'threshold': config['value']
-                    }
-                elif indicator == 'macd':
-                    indicator_values['buy_indicators']['macd'] = {
-                        'macd': float(latest_data['MACD']),
-                        'signal': float(latest_data['MACD_signal'])
-                    }
-                elif indicator == 'bollinger':
-                    indicator_values['buy_indicators']['bollinger'] = {
-                        'price': float(latest_data['Close']),
-                        'lower': float(latest_data['lower_band'])
-                    }
-                elif indicator == 'sma':
-                    indicator_values['buy_indicators']['sma'] = {
-                        'price': float(latest_data['Close']),
-                        'sma': float(latest_data[f"SMA_{config['value']}"]),
-                        'period': config['value']
-                    }
-                elif indicator == 'ema':
-                    indicator_values['buy_indicators']['ema'] = {
-                        'price': float(latest_data['Close']),
-                        'ema': float(latest_data[f"EMA_{config['value']}"]),
-                        'period': config['value']
-                    }
-
-        # Collect sell indicator values
-        for indicator, config in live_test['sell_indicators'].items():
-            if config['active']:
-                if indicator == 'rsi':
-                    indicator_values['sell_indicators']['rsi'] = {
-                        'value': float(latest_data['RSI']),
-                        'threshold': config['value']
-                    }
-                elif indicator == 'macd':
-                    indicator_values['sell_indicators']['macd'] = {
-                        'macd': float(latest_data['MACD']),
-                        'signal': float(latest_data['MACD_signal'])
-                    }
-                elif indicator == 'bollinger':
-                    indicator_values['sell_indicators']['bollinger'] = {
-                        'price': float(latest_data['Close']),
-                        'upper': float(latest_data['upper_band'])
-                    }
-                elif indicator == 'sma':
-                    indicator_values['sell_indicators']['sma'] = {
-                        'price': float(latest_data['Close']),
-                        'sma': float(latest_data[f"SMA_{config['value']}"]),
-                        'period': config['value']
-                    }
-                elif indicator == 'ema':
-                    indicator_values['sell_indicators']['ema'] = {
-                        'price': float(latest_data['Close']),
-                        'ema': float(latest_data[f"EMA_{config['value']}"]),
-                        'period': config['value']
-                    }
-
-        # Check for signals using the last row of data
-        buy_signal = check_buy_signals(df.iloc[-1:], live_test['buy_indicators'])
-        sell_signal = check_sell_signals(df.iloc[-1:], live_test['sell_indicators'])
-        
-        trade_executed = False
-        message = None
-        
-        if buy_signal and live_test['position'] == 0:
-            live_test['buy_price'] = current_price
-            live_test['amount'] = live_test['balance'] / current_price
-            live_test['balance'] = 0
-            live_test['position'] = 1
-            live_test['trades'] += 1
-            trade_executed = True
-            message = f"<span style='color: #22c55e'>Buy Signal: Date: {current_time}, Price: {current_price:.2f}, Amount: {live_test['amount']:.8f} {data['coin']}</span>"
-            
-        elif sell_signal and live_test['position'] == 1:
-            live_test['balance'] = live_test['amount'] * current_price
-            profit = ((current_price - live_test['buy_price']) / live_test['buy_price']) * 100
-            if current_price > live_test['buy_price']:
-                live_test['wins'] += 1
-            live_test['amount'] = 0
-            live_test['position'] = 0
-            trade_executed = True
-            message = f"<span style='color: #ef4444'>Sell Signal: Date: {current_time}, Price: {current_price:.2f}, Profit: {profit:.2f}%</span>"
-        
-        # Add current status even if no trade was executed
-        status_message = None
-        if not trade_executed:
-            if live_test['position'] == 1:
-                unrealized_profit = ((current_price - live_test['buy_price']) / live_test['buy_price']) * 100
-                status_message = f"<span style='color: #94a3b8'>Current Status: Holding {live_test['amount']:.8f} {data['coin']}, Entry: {live_test['buy_price']:.2f}, Current: {current_price:.2f}, Unrealized Profit: {unrealized_profit:.2f}%</span>"
-            else:
-                status_message = f"<span style='color: #94a3b8'>Current Status: Waiting for buy signal. Balance: ${live_test['balance']:.2f}</span>"
+        return jsonify(result)
         
+    except Exception as e:
+        live_log.warning("Error checking live test: %s", e)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/livetest/stop', methods=['POST'])
+def stop_livetest():
+    try:
+        data = request.get_json()
+        session_id = data.get('sessionId')
+        if not live_test_store.delete(session_id):
+            return jsonify({
+                'success': False,
+                'error': 'No active live test found for this session'
+            }), 404
+        live_log.info("Live test session %s stopped", session_id)
+        return jsonify({'success': True})
+
+    except Exception as e:
+        live_log.warning("Error stopping live test: %s", e)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/livetest/log', methods=['GET'])
+def get_livetest_log():
+    try:
+        session_id = request.args.get('session', '')
+        since = int(request.args.get('since', 0))
+        live_test = live_test_store.get(session_id)
+        if live_test is None:
+            return jsonify({
+                'success': False,
+                'error': 'No active live test found for this session'
+            }), 404
         return jsonify({
             'success': True,
-            'trade_executed': trade_executed,
-            'message': message,
-            'status_message': status_message,
-            'current_price': current_price,
+            'seq': live_test.get('log_seq', 0),
+            'entries': [entry for entry in live_test.get('log', []) if entry['seq'] > since],
             'position': live_test['position'],
             'balance': live_test['balance'],
             'trades': live_test['trades'],
-            'win_rate': (live_test['wins'] / live_test['trades'] * 100) if live_test['trades'] > 0 else 0,
-            'indicator_values': indicator_values  # Add indicator values to response
+            'win_rate': (live_test['wins'] / live_test['trades'] * 100) if live_test['trades'] > 0 else 0
         })
-        
+
     except Exception as e:
-        print(f"Error checking live test: {str(e)}")
+        live_log.warning("Error reading live test log: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
         }), 400
 
-def check_buy_signals(df, buy_indicators):
-    if not any(ind['active'] for ind in buy_indicators.values()):
-        return False
-        
-    buy_signal = True
-    for indicator, config in buy_indicators.items():
-        if config['active']:
-            if indicator == 'rsi':
-                buy_signal &= df['RSI'].iloc[-1] <= config['value']
-            elif indicator == 'macd':
-                buy_signal &= df['MACD'].iloc[-1] > df['MACD_signal'].iloc[-1]
-            elif indicator == 'bollinger':
-                buy_signal &= df['Close'].iloc[-1] <= df['lower_band'].iloc[-1]
-            elif indicator == 'sma':
-                length = str(config['value'])  # Convert to string for column name
-                col_name = f'SMA_{length}'
-                if col_name in df.columns:  # Check if column exists
-                    buy_signal &= df['Close'].iloc[-1] > df[col_name].iloc[-1]
-                else:
-                    print(f"Column {col_name} not found in dataframe")
-                    return False
-            elif indicator == 'ema':
-                length = str(config['value'])  # Convert to string for column name
-                col_name = f'EMA_{length}'
-                if col_name in df.columns:  # Check if column exists
-                    buy_signal &= df['Close'].iloc[-1] > df[col_name].iloc[-1]
-                else:
-                    print(f"Column {col_name} not found in dataframe")
-                    return False
-    return buy_signal
-
-def check_sell_signals(df, sell_indicators):
-    if not any(ind['active'] for ind in sell_indicators.values()):
-        return False
-        
-    sell_signal = True
-    for indicator, config in sell_indicators.items():
-        if config['active']:
-            if indicator == 'rsi':
-                sell_signal &= df['RSI'].iloc[-1] >= config['value']
-            elif indicator == 'macd':
-                sell_signal &= df['MACD'].iloc[-1] < df['MACD_signal'].iloc[-1]
-            elif indicator == 'bollinger':
-                sell_signal &= df['Close'].iloc[-1] >= df['upper_band'].iloc[-1]
-            elif indicator == 'sma':
-                length = str(config['value'])
-                col_name = f'SMA_{length}'
-                if col_name in df.columns:
-                    sell_signal &= df['Close'].iloc[-1] < df[col_name].iloc[-1]
-                else:
-                    print(f"Column {col_name} not found in dataframe")
-                    return False
-            elif indicator == 'ema':
-                length = str(config['value'])
-                col_name = f'EMA_{length}'
-                if col_name in df.columns:
-                    sell_signal &= df['Close'].iloc[-1] < df[col_name].iloc[-1]
-                else:
-                    print(f"Column {col_name} not found in dataframe")
-                    return False
-    return sell_signal
+# Historical candles replayed through the live test path, see live_replay.py
+replay_manager = ReplayManager(advance_live_test)
+
+@app.route('/api/livetest/replay', methods=['POST'])
+def start_livetest_replay():
+    try:
+        data = request.get_json()
+        for field in ('coin', 'timeFrame', 'period', 'buyIndicators', 'sellIndicators'):
+            if field not in data:
+                raise Exception(f"Missing field: {field}")
+        speed = float(data['speed']) if data.get('speed') else None
+        if speed is not None and speed <= 0:
+            raise Exception("speed must be positive")
+
+        end_time = int(datetime.now().timestamp() * 1000)
+        start_time = end_time - int(data['period']) * 24 * 60 * 60 * 1000
+        interval_ms = get_timeframe_minutes(data['timeFrame']) * 60 * 1000
+        live_test = new_live_test(data)
+        candles = get_candles(live_test['symbol'], get_interval_string(data['timeFrame']), start_time, end_time)
+        # Only closed candles, a live session never evaluates a forming one
+        candles = candles.select(candles.open_time + interval_ms <= end_time)
+        if len(candles) == 0:
+            raise Exception("No historical data available")
+
+        replays = []
+        for _ in range(min(int(data.get('sessions', 1)), MAX_REPLAY_SESSIONS)):
+            # Each session gets its own state, the candle arrays are shared read-only
+            replay = LiveReplay(new_live_test(copy.deepcopy(data)), candles.open_time, candles.close, interval_ms,
+                                speed=speed, warmup=int(data.get('warmup', WARMUP_BARS)))
+            replays.append(replay_manager.start(replay))
+        live_log.info("Replaying %d candles of %s %s in %d session(s) at %s speed", len(candles),
+                      live_test['symbol'], data['timeFrame'], len(replays), speed or 'full')
+
+        return jsonify({
+            'success': True,
+            'replayIds': [replay.id for replay in replays],
+            'bars': len(candles)
+        }), 202
+
+    except Exception as e:
+        live_log.warning("Error starting live test replay: %s", e)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/livetest/replay', methods=['GET'])
+def list_livetest_replays():
+    return jsonify({
+        'success': True,
+        'replays': [{key: value for key, value in replay.to_dict().items() if key not in ('entries', 'tradeLog')}
+                    for replay in replay_manager.replays()]
+    })
+
+@app.route('/api/livetest/replay/<replay_id>', methods=['GET'])
+def get_livetest_replay(replay_id):
+    try:
+        since = int(request.args.get('since', 0))
+        replay = replay_manager.get(replay_id)
+        if replay is None:
+            return jsonify({
+                'success': False,
+                'error': 'Replay not found'
+            }), 404
+        response = replay.to_dict(since=since)
+        response['success'] = True
+        return jsonify(response)
+
+    except Exception as e:
+        live_log.warning("Error reading live test replay: %s", e)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/livetest/replay/<replay_id>/stop', methods=['POST'])
+def stop_livetest_replay(replay_id):
+    replay = replay_manager.get(replay_id)
+    if replay is None:
+        return jsonify({
+            'success': False,
+            'error': 'Replay not found'
+        }), 404
+    replay.stop()
+    return jsonify({'success': True})
+
+def on_closed_candle(event):
+    """Advance the live tests streamed from this process on the candle's symbol/timeframe and push the results"""
+    open_times = np.array([event['open_time']], dtype=np.int64)
+    closes = np.array([event['close']], dtype=np.float64)
+    for session_id in live_test_store.find(event['symbol'], event['interval']):
+        # Other sessions are advanced by the scheduler
+        if live_updates.subscribers(session_id) == 0:
+            continue
+        try:
+            results = live_test_store.update(session_id, lambda live_test: advance_live_test(live_test, open_times, closes))
+        except LiveTestNotFound:
+            continue  # Stopped in the meantime
+        for result in results:
+            live_updates.publish(session_id, result)
+
+# Closed candles from one stream per (symbol, interval) drive the live tests
+kline_hub = KlineHub(BinanceKlineSource(api_key, api_secret), on_closed_candle)
+# Every open stream holds a gunicorn thread for as long as its client stays, keep some for other requests
+MAX_LIVE_STREAMS = int(os.getenv('MAX_LIVE_STREAMS', max(int(os.getenv('GUNICORN_THREADS', 16)) // 2, 1)))
+live_updates = Broadcaster(max_subscribers=MAX_LIVE_STREAMS)
+
+# Advances every session once per candle close, also when no client is polling
+live_scheduler = LiveTestScheduler(
+    live_test_store, fetch_closes, advance_live_test,
+    lambda timeframe: get_timeframe_minutes(timeframe) * 60 * 1000,
+    on_result=live_updates.publish,
+    lock_path=os.getenv('LIVE_SCHEDULER_LOCK', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'live_scheduler.lock')))
+
+@app.before_request
+def start_live_scheduler():
+    # Started lazily so it runs in the worker processes, not in a preloading master
+    if os.getenv('LIVE_SCHEDULER', '1') == '1':
+        live_scheduler.ensure_started()
+
+@app.route('/api/livetest/scheduler', methods=['GET'])
+def get_live_scheduler_status():
+    return jsonify({
+        'success': True,
+        'scheduler': live_scheduler.status()
+    })
+
+@app.route('/api/livetest/stream', methods=['GET'])
+def stream_livetest():
+    session_id = request.args.get('session', '')
+    live_test = live_test_store.get(session_id)
+    if live_test is None:
+        return jsonify({
+            'success': False,
+            'error': 'No active live test found for this session'
+        }), 404
+
+    symbol, timeframe = live_test['symbol'], live_test['timeframe']
+    updates = live_updates.subscribe(session_id)
+    if updates is None:
+        metrics.count('livetest_streams_rejected', 1, 'Live test streams refused at MAX_LIVE_STREAMS')
+        live_log.warning("Refusing live test stream for %s, %d streams open", session_id, MAX_LIVE_STREAMS)
+        response = jsonify({
+            'success': False,
+            'error': 'Too many open live test streams, poll /api/livetest/check instead'
+        })
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    kline_hub.ensure(symbol, timeframe)
+
+    # Server-sent events, a comment line every 15s keeps proxies from closing the connection
+    def generate():
+        yield ": connected\n\n"
+        while True:
+            try:
+                result = updates.get(timeout=15)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"data: {json.dumps(result, default=str)}\n\n"
+
+    # Run when the server closes the response, also for a client gone before the first event
+    def close():
+        live_updates.unsubscribe(session_id, updates)
+        if not any(live_updates.subscribers(s) for s in live_test_store.find(symbol, timeframe)):
+            kline_hub.release(symbol, timeframe)
+
+    response = Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    response.call_on_close(close)
+    return response
 
 def get_timeframe_minutes(timeframe):
     timeframe_map = {
@@ -791,7 +1214,11 @@ def get_timeframe_minutes(timeframe):
     }
     return timeframe_map.get(timeframe, 60)
 
+STARTUP_SECONDS = round(time.perf_counter() - IMPORT_STARTED, 3)
+api_log.info("App imported in %.2fs", STARTUP_SECONDS)
+
 # Add at the end of the file
+# Development server, production runs under gunicorn (see gunicorn.conf.py)
 if __name__ == '__main__':
     # Get port from environment variable or use 5000 as default
     port = int(os.getenv('PORT', 5000))
@@ -0,0 +1,231 @@
+import os
+
+import numpy as np
+
+from signal_plan import compile_plan
+
+# Bars before this index are skipped, MACD needs at least 26 candles
+WARMUP_BARS = 26
+INITIAL_BALANCE = float(os.getenv('INITIAL_BALANCE', 10000))
+# Points of the downsampled equity curve sent with a backtest result
+EQUITY_CURVE_POINTS = 500
+YEAR_MS = 365 * 24 * 60 * 60 * 1000
+
+
+def open_times_ms(index):
+    """Epoch milliseconds of a DatetimeIndex, whatever its resolution"""
+    return np.asarray(index.values).astype('datetime64[ms]').astype(np.int64)
+
+
+class TradeLog:
+    """Executed trades of one backtest as parallel columns.
+
+    time is the bar's open time in epoch ms, side is 'buy', 'sell' or 'close'
+    (position closed at the last bar), pnl is the trade's profit in percent
+    (None for buys) and balance the account value right after the trade.
+    Formatting is left to the client.
+    """
+
+    COLUMNS = ('time', 'side', 'price', 'amount', 'pnl', 'balance')
+
+    def __init__(self):
+        self.columns = {name: [] for name in self.COLUMNS}
+
+    def __len__(self):
+        return len(self.columns['time'])
+
+    def add(self, time, side, price, amount, pnl, balance):
+        columns = self.columns
+        columns['time'].append(int(time))
+        columns['side'].append(side)
+        columns['price'].append(float(price))
+        columns['amount'].append(float(amount))
+        columns['pnl'].append(None if pnl is None else float(pnl))
+        columns['balance'].append(float(balance))
+
+    def to_dict(self):
+        return dict(self.columns, total=len(self), offset=0)
+
+
+def paginate_trade_log(trade_log, offset=0, limit=None):
+    """Slice a serialized trade log to [offset, offset + limit), keeping the total count"""
+    end = None if limit is None else offset + limit
+    page = {name: trade_log[name][offset:end] for name in TradeLog.COLUMNS}
+    page.update(total=trade_log['total'], offset=offset)
+    return page
+
+
+def risk_metrics(times, close, executed, initial_balance=INITIAL_BALANCE, start=WARMUP_BARS):
+    """Equity curve and risk figures for executed (entry_bar, exit_bar, amount) trades.
+
+    The per-bar equity is built from cash and holdings step changes at the
+    trade bars, so apart from one pass over the trades everything is array
+    operations. exit_bar None means the position was closed at the last bar.
+    """
+    n = len(close)
+    close = np.asarray(close, dtype=np.float64)
+    cash = np.zeros(n + 1)
+    holdings = np.zeros(n + 1)
+    cash[0] = initial_balance
+    balance = initial_balance
+    held_bars = []
+    for entry, exit_bar, amount in executed:
+        end = n - 1 if exit_bar is None else exit_bar
+        cash[entry] -= balance
+        holdings[entry] += amount
+        balance = amount * close[end]
+        cash[end] += balance
+        holdings[end] -= amount
+        held_bars.append(end - entry)
+    # In place, these are the only full length arrays besides the returns
+    equity = np.cumsum(cash, out=cash)[:n]
+    holdings = np.cumsum(holdings, out=holdings)[:n]
+    equity += np.multiply(holdings, close, out=holdings)
+
+    metrics = {
+        'equityCurve': {'time': [], 'equity': []},
+        'maxDrawdown': 0.0,
+        'sharpe': None,
+        'sortino': None,
+        'exposure': 0.0,
+        'avgTradeBars': None,
+        'avgTradeDuration': None
+    }
+    if n == 0:
+        return metrics
+
+    step = -(-n // EQUITY_CURVE_POINTS)
+    points = np.arange(n - 1, -1, -step)[::-1]
+    metrics['equityCurve'] = {'time': times[points].tolist(), 'equity': np.round(equity[points], 2).tolist()}
+
+    peak = np.maximum.accumulate(equity, out=holdings)
+    metrics['maxDrawdown'] = round((1 - float(np.divide(equity, peak, out=peak).min())) * 100, 2)
+
+    # Candles are evenly spaced, a sample of the spacing is enough to annualize
+    interval_ms = float(np.median(np.diff(times[:1000]))) if n > 1 else 0.0
+    returns = equity[start + 1:] / equity[start:-1] - 1 if n > start + 1 else np.empty(0)
+    if len(returns) > 1 and interval_ms > 0:
+        annualize = np.sqrt(YEAR_MS / interval_ms)
+        mean = returns.mean()
+        std = returns.std(ddof=1)
+        downside = np.sqrt(np.mean(np.minimum(returns, 0) ** 2))
+        metrics['sharpe'] = round(float(mean / std * annualize), 3) if std > 0 else None
+        metrics['sortino'] = round(float(mean / downside * annualize), 3) if downside > 0 else None
+
+    if held_bars:
+        metrics['exposure'] = round(sum(held_bars) / max(n - start, 1) * 100, 2)
+        metrics['avgTradeBars'] = round(sum(held_bars) / len(held_bars), 2)
+        metrics['avgTradeDuration'] = round(metrics['avgTradeBars'] * interval_ms)
+    return metrics
+
+
+def frame_columns(df):
+    """Column name -> NumPy array mapping of a candle/indicator DataFrame"""
+    return {name: df[name].to_numpy() for name in df.columns}
+
+
+def resolve_trades(buy_condition, sell_condition, start=WARMUP_BARS):
+    """Walk the alternating flat/long states and return a list of (entry_bar, exit_bar).
+
+    Jumps between signal bars instead of visiting every bar. A sell can fire on
+    the same bar as the buy, the next buy only after the sell bar. exit_bar is
+    None for a position still open at the end of the data.
+    """
+    buy_bars = np.flatnonzero(buy_condition[start:]) + start
+    sell_bars = np.flatnonzero(sell_condition[start:]) + start
+    trades = []
+    next_bar = start
+    while True:
+        k = np.searchsorted(buy_bars, next_bar)
+        if k == len(buy_bars):
+            break
+        entry = int(buy_bars[k])
+        k = np.searchsorted(sell_bars, entry)
+        if k == len(sell_bars):
+            trades.append((entry, None))
+            break
+        exit_bar = int(sell_bars[k])
+        trades.append((entry, exit_bar))
+        next_bar = exit_bar + 1
+    return trades
+
+
+def trade_stats(close, trade_bars, initial_balance=INITIAL_BALANCE):
+    """Return (balance, trades, wins) for resolved trades, same arithmetic as backtest_strategy"""
+    balance = initial_balance
+    trades = 0
+    wins = 0
+    for entry, exit_bar in trade_bars:
+        if not balance > 0:
+            break
+        buy_price = close[entry]
+        amount = balance / buy_price
+        sell_price = close[exit_bar if exit_bar is not None else -1]
+        balance = amount * sell_price
+        if ((sell_price - buy_price) / buy_price) * 100 > 0:
+            wins += 1
+        trades += 2
+    return balance, trades, wins
+
+
+def vectorized_backtest(df, buy_indicators, sell_indicators):
+    """Array based equivalent of backtest_strategy, returns the same trades and trade log"""
+    plan = compile_plan(buy_indicators, sell_indicators)
+    columns = frame_columns(df)
+    return backtest_from_conditions(df.index, columns['Close'], plan.condition('buy', columns), plan.condition('sell', columns))
+
+
+def backtest_from_conditions(index, close, buy_condition, sell_condition):
+    """Run the simulation for precomputed buy/sell condition arrays"""
+    initial_balance = INITIAL_BALANCE
+    balance = initial_balance
+    trades = 0
+    wins = 0
+    trade_log = TradeLog()
+    times = open_times_ms(index)
+    executed = []
+
+    trade_bars = resolve_trades(buy_condition, sell_condition)
+
+    for entry, exit_bar in trade_bars:
+        if not balance > 0:
+            break
+        current_buy_price = close[entry]
+        current_amount = balance / current_buy_price
+        balance = 0
+        trades += 1
+        trade_log.add(times[entry], 'buy', current_buy_price, current_amount, None, current_amount * current_buy_price)
+        executed.append((entry, exit_bar, current_amount))
+
+        if exit_bar is None:
+            # Kalan pozisyonu kapat
+            final_price = close[-1]
+            position_value = current_amount * final_price
+            profit_percent = ((final_price - current_buy_price) / current_buy_price) * 100
+            balance = position_value
+            if profit_percent > 0:
+                wins += 1
+            trades += 1
+            trade_log.add(times[-1], 'close', final_price, current_amount, profit_percent, position_value)
+            break
+
+        current_price = close[exit_bar]
+        position_value = current_amount * current_price
+        profit_percent = ((current_price - current_buy_price) / current_buy_price) * 100
+        balance = position_value
+        if profit_percent > 0:
+            wins += 1
+        trades += 1
+        trade_log.add(times[exit_bar], 'sell', current_price, current_amount, profit_percent, balance)
+
+    profit = balance - initial_balance
+    win_rate = (wins / trades * 100) if trades > 0 else 0
+
+    return {
+        'success': True,
+        'profit': profit,
+        'trades': trades,
+        'winRate': round(win_rate, 2),
+        'tradeLog': trade_log.to_dict(),
+        **risk_metrics(times, close, executed, initial_balance)
+    }
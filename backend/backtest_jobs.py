@@ -0,0 +1,128 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from signal_plan import request_key
+
+logger = logging.getLogger('backtest.jobs')
+
+JOB_WORKERS = int(os.getenv('BACKTEST_JOB_WORKERS', 2))
+# Finished jobs kept for result retrieval, the oldest are dropped first
+MAX_FINISHED_JOBS = int(os.getenv('BACKTEST_JOB_RESULTS', 100))
+MAX_PENDING_JOBS = int(os.getenv('BACKTEST_JOB_PENDING', 50))
+
+
+class BacktestJob:
+    """State of one submitted backtest, progress is updated from the worker thread"""
+
+    def __init__(self, key, data):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.data = data
+        self.status = 'queued'
+        self.progress = {'stage': 'queued', 'candles': 0, 'bars': 0, 'totalBars': None}
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.submissions = 1
+        self._lock = threading.Lock()
+
+    def update(self, **progress):
+        with self._lock:
+            self.progress.update(progress)
+
+    def add_candles(self, count):
+        with self._lock:
+            self.progress['candles'] += count
+
+    def to_dict(self, include_result=True):
+        with self._lock:
+            job = {
+                'jobId': self.id,
+                'status': self.status,
+                'progress': dict(self.progress),
+                'submissions': self.submissions,
+                'created': self.created,
+                'started': self.started,
+                'finished': self.finished
+            }
+            if self.error is not None:
+                job['error'] = self.error
+            if include_result and self.result is not None:
+                job['result'] = self.result
+            return job
+
+
+class BacktestJobQueue:
+    """Runs backtests on a bounded thread pool and keeps the latest finished results.
+
+    runner(data, job) does the actual work and reports progress through the
+    job. Submissions identical to a queued or running job return that job
+    instead of starting another execution.
+    """
+
+    def __init__(self, runner, max_workers=JOB_WORKERS, max_finished=MAX_FINISHED_JOBS, max_pending=MAX_PENDING_JOBS):
+        self.runner = runner
+        self.max_finished = max_finished
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='backtest-job')
+        self._active = {}
+        self._in_flight = {}
+        self._finished = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, data):
+        """Return (job, deduplicated)"""
+        key = request_key(data)
+        with self._lock:
+            job_id = self._in_flight.get(key)
+            if job_id is not None:
+                job = self._active[job_id]
+                job.submissions += 1
+                return job, True
+            if len(self._active) >= self.max_pending:
+                raise RuntimeError(f"Too many backtest jobs in progress (limit {self.max_pending})")
+            job = BacktestJob(key, data)
+            self._active[job.id] = job
+            self._in_flight[key] = job.id
+        self._executor.submit(self._run, job)
+        return job, False
+
+    def _run(self, job):
+        with job._lock:
+            job.status = 'running'
+            job.started = time.time()
+        try:
+            result = self.runner(job.data, job)
+            with job._lock:
+                job.result = result
+                job.status = 'done'
+        except Exception as e:
+            logger.exception("Backtest job %s failed: %s", job.id, e)
+            with job._lock:
+                job.error = str(e)
+                job.status = 'failed'
+        finally:
+            with job._lock:
+                job.finished = time.time()
+                job.progress['stage'] = job.status
+            with self._lock:
+                self._active.pop(job.id, None)
+                self._in_flight.pop(job.key, None)
+                self._finished[job.id] = job
+                while len(self._finished) > self.max_finished:
+                    self._finished.popitem(last=False)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._active.get(job_id) or self._finished.get(job_id)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._active.values()) + list(reversed(self._finished.values()))
@@ -0,0 +1,142 @@
+import os
+
+import numpy as np
+
+from backtest_engine import INITIAL_BALANCE, WARMUP_BARS, TradeLog
+from signal_plan import compile_plan
+from streaming_indicators import IndicatorState
+
+# Candles fetched, indicated and simulated per chunk, bounds the memory of a streamed backtest
+STREAM_CHUNK_CANDLES = int(os.getenv('BACKTEST_STREAM_CHUNK', 50_000))
+
+
+def chunk_windows(start_time, end_time, interval_ms, chunk_candles=STREAM_CHUNK_CANDLES):
+    """Split [start_time, end_time] into consecutive windows of at most chunk_candles candles"""
+    chunk_ms = interval_ms * chunk_candles
+    return [(chunk_start, min(end_time, chunk_start + chunk_ms - 1))
+            for chunk_start in range(start_time, end_time + 1, chunk_ms)]
+
+
+class ChunkedBacktest:
+    """Backtest fed one chunk of candles at a time.
+
+    Indicator kernels and the open position carry over chunk boundaries, so
+    only the current chunk's columns are held in memory. Trades follow the
+    same rules as backtest_from_conditions: a sell can fire on the entry bar
+    and the next buy comes after the sell bar.
+    """
+
+    def __init__(self, buy_indicators, sell_indicators, initial_balance=INITIAL_BALANCE):
+        self.plan = compile_plan(buy_indicators, sell_indicators)
+        self.state = IndicatorState(self.plan.buy_indicators, self.plan.sell_indicators)
+        self.initial_balance = initial_balance
+        self.balance = initial_balance
+        self.amount = 0.0
+        self.buy_price = 0.0
+        self.position = 0
+        self.trades = 0
+        self.wins = 0
+        self.bars = 0
+        self.last_time = None
+        self.last_close = None
+
+    def equity(self):
+        return self.amount * self.last_close if self.position == 1 else self.balance
+
+    def feed(self, open_times, closes):
+        """Simulate one chunk, return the TradeLog of the trades it produced"""
+        trade_log = TradeLog()
+        if len(closes) == 0:
+            return trade_log
+        columns = self.state.columns(closes)
+        closes = columns['Close']
+        buy_bars = np.flatnonzero(self.plan.condition('buy', columns))
+        sell_bars = np.flatnonzero(self.plan.condition('sell', columns))
+
+        # Warm-up bars count across chunks, only the first chunk(s) skip any
+        bar = max(WARMUP_BARS - self.bars, 0)
+        while bar < len(closes):
+            if self.position == 0:
+                if not self.balance > 0:
+                    break
+                k = np.searchsorted(buy_bars, bar)
+                if k == len(buy_bars):
+                    break
+                entry = int(buy_bars[k])
+                self.buy_price = closes[entry]
+                self.amount = self.balance / self.buy_price
+                self.balance = 0
+                self.position = 1
+                self.trades += 1
+                trade_log.add(open_times[entry], 'buy', self.buy_price, self.amount, None, self.amount * self.buy_price)
+                bar = entry
+
+            k = np.searchsorted(sell_bars, bar)
+            if k == len(sell_bars):
+                break
+            exit_bar = int(sell_bars[k])
+            price = closes[exit_bar]
+            profit_percent = ((price - self.buy_price) / self.buy_price) * 100
+            self.balance = self.amount * price
+            if profit_percent > 0:
+                self.wins += 1
+            self.position = 0
+            self.trades += 1
+            trade_log.add(open_times[exit_bar], 'sell', price, self.amount, profit_percent, self.balance)
+            bar = exit_bar + 1
+
+        self.bars += len(closes)
+        self.last_time = int(open_times[-1])
+        self.last_close = closes[-1]
+        return trade_log
+
+    def finish(self):
+        """Close a position still open after the last chunk, return its TradeLog"""
+        trade_log = TradeLog()
+        if self.position == 1:
+            profit_percent = ((self.last_close - self.buy_price) / self.buy_price) * 100
+            self.balance = self.amount * self.last_close
+            if profit_percent > 0:
+                self.wins += 1
+            self.trades += 1
+            self.position = 0
+            trade_log.add(self.last_time, 'close', self.last_close, self.amount, profit_percent, self.balance)
+        return trade_log
+
+    def summary(self):
+        profit = self.balance - self.initial_balance
+        win_rate = (self.wins / self.trades * 100) if self.trades > 0 else 0
+        return {
+            'success': True,
+            'profit': float(profit),
+            'trades': self.trades,
+            'winRate': round(win_rate, 2),
+            'bars': self.bars
+        }
+
+
+def stream_backtest(load_chunk, windows, buy_indicators, sell_indicators):
+    """Run a ChunkedBacktest over time windows, yielding a partial result per chunk and the final result.
+
+    load_chunk(start_time, end_time) returns Candles for one window.
+    """
+    backtest = ChunkedBacktest(buy_indicators, sell_indicators)
+    for number, (window_start, window_end) in enumerate(windows, 1):
+        candles = load_chunk(window_start, window_end)
+        trade_log = backtest.feed(candles.open_time, candles.close)
+        del candles
+        yield {
+            'type': 'chunk',
+            'chunk': number,
+            'chunks': len(windows),
+            'from': window_start,
+            'to': window_end,
+            'bars': backtest.bars,
+            'equity': float(backtest.equity()) if backtest.last_close is not None else float(backtest.balance),
+            'trades': backtest.trades,
+            'tradeLog': trade_log.to_dict()
+        }
+    trade_log = backtest.finish()
+    result = backtest.summary()
+    result.update(type='result', tradeLog=trade_log.to_dict())
+    yield result
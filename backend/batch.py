@@ -0,0 +1,163 @@
+import copy
+import multiprocessing
+import os
+import queue
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from backtest_engine import backtest_from_conditions
+from optimizer import SeriesCache
+from signal_plan import compile_plan
+
+MAX_BATCH_JOBS = 2000
+# Per worker process, candle files whose indicator series are kept around
+WORKER_CACHE_SIZE = 4
+
+_pool = None
+_pool_lock = threading.Lock()
+_worker_caches = {}
+
+
+def get_pool():
+    """Shared process pool sized to the host's cores, created on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn avoids forking the threaded Flask server
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1,
+                                        mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def write_candles(directory, key, df):
+    """Write the open times and closes of a candle DataFrame to .npy files workers can memory-map"""
+    base = os.path.join(directory, key)
+    np.save(f"{base}.times.npy", df.index.values.astype('datetime64[ns]'))
+    np.save(f"{base}.close.npy", df['Close'].to_numpy(dtype=np.float64))
+    return base
+
+
+def _worker_cache(base):
+    cache = _worker_caches.get(base)
+    if cache is None:
+        import pandas as pd
+        if len(_worker_caches) >= WORKER_CACHE_SIZE:
+            _worker_caches.pop(next(iter(_worker_caches)))
+        times = np.load(f"{base}.times.npy", mmap_mode='r')
+        close = np.load(f"{base}.close.npy", mmap_mode='r')
+        index = pd.DatetimeIndex(np.asarray(times), name='Open Time')
+        frame = pd.DataFrame({'Close': np.asarray(close)}, index=index)
+        cache = _worker_caches[base] = (frame, SeriesCache(frame))
+    return cache
+
+
+def run_job(base, buy_indicators, sell_indicators, include_logs):
+    """Worker entry point, backtests one strategy on one memory-mapped candle series"""
+    frame, cache = _worker_cache(base)
+    # Sell indicators are mirrored from the buy side by the plan
+    plan = compile_plan(buy_indicators, sell_indicators)
+    buy_condition = cache.condition(plan, 'buy')
+    sell_condition = cache.condition(plan, 'sell')
+    result = backtest_from_conditions(frame.index, cache.close, buy_condition, sell_condition)
+    result['profit'] = float(result['profit'])
+    if not include_logs:
+        result.pop('tradeLog')
+        result.pop('equityCurve')
+    return result
+
+
+def validate_batch(coins, timeframes, strategies):
+    """Raise ValueError for a batch payload that can't run, before any candles are loaded"""
+    for name, values in (('coins', coins), ('timeFrames', timeframes), ('strategies', strategies)):
+        if not isinstance(values, list) or not values:
+            raise ValueError(f"{name} must be a non-empty list")
+    # A series' candle files are named after its coin and timeframe
+    for name, values in (('coins', coins), ('timeFrames', timeframes)):
+        duplicates = sorted({str(value) for value in values if values.count(value) > 1})
+        if duplicates:
+            raise ValueError(f"{name} has duplicates: {', '.join(duplicates)}")
+    total = len(coins) * len(timeframes) * len(strategies)
+    if total > MAX_BATCH_JOBS:
+        raise ValueError(f"Batch has {total} jobs, the limit is {MAX_BATCH_JOBS}")
+    for i, strategy in enumerate(strategies):
+        if not isinstance(strategy, dict):
+            raise ValueError(f"Strategy {i} must be an object")
+        for field in ('buyIndicators', 'sellIndicators'):
+            if not isinstance(strategy.get(field, {}), dict):
+                raise ValueError(f"{field} of strategy {i} must be an object")
+
+
+def _job_result(job_info, future):
+    try:
+        return {**job_info, **future.result()}
+    except Exception as e:
+        return {**job_info, 'success': False, 'error': str(e)}
+
+
+def run_batch(load_candles, coins, timeframes, strategies, include_logs=False):
+    """Validate a batch and return a generator of its results, coins x timeframes x strategies fanned out over the process pool.
+
+    load_candles(coin, timeframe) returns the candle DataFrame for one series,
+    it is called once per series on a loader thread. A series' jobs start as
+    soon as its candles are loaded and results are yielded as they finish. A
+    series that can't be loaded yields one error line, a failing job one
+    error line of its own.
+    """
+    validate_batch(coins, timeframes, strategies)
+    return _batch_results(load_candles, coins, timeframes, strategies, include_logs)
+
+
+def _batch_results(load_candles, coins, timeframes, strategies, include_logs):
+    pool = get_pool()
+    # ('job' | 'series', line) per result and ('loaded', submitted jobs) once loading is over
+    results = queue.Queue()
+    stop = threading.Event()
+
+    with tempfile.TemporaryDirectory(prefix='backtest-batch-') as directory:
+        def load_all():
+            submitted = 0
+            try:
+                for coin in coins:
+                    for timeframe in timeframes:
+                        if stop.is_set():
+                            return
+                        series_info = {'coin': coin, 'timeFrame': timeframe}
+                        try:
+                            df = load_candles(coin, timeframe)
+                            if df is None or df.empty:
+                                raise Exception("No historical data available")
+                            base = write_candles(directory, f"{coin}_{timeframe}", df)
+                        except Exception as e:
+                            results.put(('series', {**series_info, 'success': False, 'error': str(e)}))
+                            continue
+                        for i, strategy in enumerate(strategies):
+                            job_info = {**series_info, 'strategy': strategy.get('name', f"strategy_{i}"), 'candles': len(df)}
+                            future = pool.submit(run_job, base, copy.deepcopy(strategy.get('buyIndicators', {})),
+                                                 copy.deepcopy(strategy.get('sellIndicators', {})), include_logs)
+                            future.add_done_callback(lambda f, info=job_info: results.put(('job', _job_result(info, f))))
+                            submitted += 1
+            except Exception as e:
+                results.put(('series', {'success': False, 'error': str(e)}))
+            finally:
+                results.put(('loaded', submitted))
+
+        loader = threading.Thread(target=load_all, name='batch-loader', daemon=True)
+        loader.start()
+        try:
+            expected = None
+            finished = 0
+            while expected is None or finished < expected:
+                kind, value = results.get()
+                if kind == 'loaded':
+                    expected = value
+                    continue
+                if kind == 'job':
+                    finished += 1
+                yield value
+        finally:
+            # The client went away, no more series are loaded
+            stop.set()
+            loader.join()
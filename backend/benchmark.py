@@ -0,0 +1,437 @@
+"""Benchmarks for the backtest and indicator hot paths on synthetic candles.
+
+Usage (from the backend directory):
+
+    python benchmark.py --sizes 10k,100k,1m --save-baseline benchmark_baseline.json
+    python benchmark.py --sizes 10k,100k,1m --baseline benchmark_baseline.json
+
+Every stage is timed per indicator combination: wall time is the best of
+--repeat runs, peak memory comes from a separate tracemalloc run. The
+kernels stage computes every indicator kernel for all KERNEL_PERIODS in
+one batch and fails the run when it differs from the per-period pandas
+reference (timed as kernels_pandas) or from pandas_ta's own output stored
+in GOLDEN_PATH by more than KERNEL_TOLERANCE. The
+startup stage runs once per benchmark: a fresh interpreter imports the app
+and answers /api/routes, its peak memory is the process's maximum RSS. With
+--baseline the run exits with status 1 when a stage got slower or uses more
+memory than the baseline allows (--tolerance).
+"""
+import argparse
+import contextlib
+import copy
+import io
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Benchmarks always go through the synthetic client, never through the local kline store
+os.environ['KLINE_STORE_DIR'] = ''
+
+import backend
+import kline_fetcher
+from backtest_engine import frame_columns, vectorized_backtest
+from indicator_cache import indicator_cache
+from indicators import ema_matrix, macd_matrix, rolling_mean_std, rsi_matrix, sma_matrix
+from signal_plan import compile_plan
+
+SYMBOL = 'BTCUSDT'
+INTERVAL = '1m'
+INTERVAL_MS = 60_000
+START_TIME = 1_262_304_000_000  # 2010-01-01, so even 5M one minute bars are closed candles
+SIGNAL_CALLS = 1000
+# Peak memory differences below this are allocator noise, not regressions
+MEMORY_NOISE_MB = 1.0
+STAGES = ('startup', 'klines', 'kernels', 'kernels_pandas', 'indicators', 'signals', 'backtest', 'backtest_vectorized')
+# Periods every kernel computes in one batch, the pandas reference loops over them
+KERNEL_PERIODS = list(range(5, 205, 5))
+# Largest difference to the pandas reference before a kernel counts as wrong, relative to the
+# indicator's scale: the close for price valued indicators, 100 for RSI
+KERNEL_TOLERANCE = 1e-6
+# Indicator values computed with pandas_ta 0.3.14b0, what the kernels replaced
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tests', 'fixtures', 'pandas_ta_golden.npz')
+# Run in a fresh interpreter, the last output line is the measurement
+STARTUP_SCRIPT = '''
+import json, resource, time
+started = time.perf_counter()
+import backend
+backend.app.test_client().get('/api/routes')
+print(json.dumps({'seconds': time.perf_counter() - started,
+                  'peak_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+'''
+
+# Same shape as the indicator configs the frontend sends
+BUY_DEFAULTS = {
+    'rsi': {'name': 'RSI', 'active': True, 'value': 30},
+    'macd': {'name': 'MACD', 'active': True, 'values': [12, 26, 9]},
+    'bollinger': {'name': 'Bollinger Bands', 'active': True, 'value': 20, 'std_dev': 2},
+    'sma': {'name': 'SMA', 'active': True, 'value': 50},
+    'ema': {'name': 'EMA', 'active': True, 'value': 20}
+}
+SELL_DEFAULTS = {
+    'rsi': {'name': 'RSI', 'active': True, 'value': 70},
+    'macd': {'name': 'MACD', 'active': True, 'values': [12, 26, 9]},
+    'bollinger': {'name': 'Bollinger Bands', 'active': True, 'value': 20, 'std_dev': 2},
+    'sma': {'name': 'SMA', 'active': True, 'value': 200},
+    'ema': {'name': 'EMA', 'active': True, 'value': 50}
+}
+COMBINATIONS = {
+    'rsi': ['rsi'],
+    'macd': ['macd'],
+    'bollinger': ['bollinger'],
+    'sma': ['sma'],
+    'ema': ['ema'],
+    'rsi+macd': ['rsi', 'macd'],
+    'all': ['rsi', 'macd', 'bollinger', 'sma', 'ema']
+}
+
+
+def reference_ema(close, length):
+    """pandas_ta.ema: seeded with the SMA of the first length closes"""
+    seeded = close.copy()
+    seeded.iloc[:length - 1] = np.nan
+    seeded.iloc[length - 1] = close.iloc[:length].mean()
+    return seeded.ewm(span=length, adjust=False).mean()
+
+
+def reference_rsi(close, length):
+    """pandas_ta.rsi: gains and losses smoothed by rma, an adjusted EWM with alpha 1 / length"""
+    change = close.diff()
+    gains = change.clip(lower=0).ewm(alpha=1.0 / length, min_periods=length).mean()
+    losses = (-change).clip(lower=0).ewm(alpha=1.0 / length, min_periods=length).mean()
+    return 100 * gains / (gains + losses)
+
+
+def reference_macd(close, fast, slow, signal):
+    macd = close.ewm(span=fast, adjust=False).mean() - close.ewm(span=slow, adjust=False).mean()
+    return macd, macd.ewm(span=signal, adjust=False).mean()
+
+
+# name: (batched kernel over all periods, pandas reference for one period), both return one array or a tuple of them
+KERNELS = {
+    'sma': (sma_matrix, lambda close, period: close.rolling(period).mean()),
+    'ema': (ema_matrix, reference_ema),
+    'rsi': (rsi_matrix, reference_rsi),
+    'bollinger': (rolling_mean_std, lambda close, period: (close.rolling(period).mean(), close.rolling(period).std())),
+    'macd': (lambda close, periods: macd_matrix(close, [(period, 2 * period, 9) for period in periods]),
+             lambda close, period: reference_macd(close, period, 2 * period, 9))
+}
+
+
+# name: (kernel over the golden close and its periods, golden arrays it must match), see tests/fixtures/make_pandas_ta_golden.py
+GOLDEN_KERNELS = {
+    'sma': (lambda golden: sma_matrix(golden['close'], golden['sma_periods']), ('sma',)),
+    'ema': (lambda golden: ema_matrix(golden['close'], golden['ema_periods']), ('ema',)),
+    'rsi': (lambda golden: rsi_matrix(golden['close'], golden['rsi_periods']), ('rsi',)),
+    'bollinger': (lambda golden: rolling_mean_std(golden['close'], golden['bollinger_periods']),
+                  ('bollinger_mean', 'bollinger_std')),
+    'macd': (lambda golden: macd_matrix(golden['close'], golden['macd_params']), ('macd', 'macd_signal'))
+}
+
+
+def indicator_scale(close, name):
+    """Stds and MACD lines are small differences of prices, the reference's own
+    rounding (pandas' rolling std drifts over long series) is relative to the
+    prices and not to them.
+    """
+    return np.full(len(close), 100.0) if name == 'rsi' else np.maximum(1.0, np.abs(close))
+
+
+def max_difference(values, expected, scale):
+    """Largest scaled difference of two arrays, inf when their NaNs differ"""
+    if not np.array_equal(np.isnan(values), np.isnan(expected)):
+        return float('inf')
+    valid = ~np.isnan(expected)
+    if not valid.any():
+        return 0.0
+    return float((np.abs(values[valid] - expected[valid]) / np.broadcast_to(scale, expected.shape)[valid]).max())
+
+
+def kernel_error(close, name):
+    """Largest difference between a kernel and its pandas reference, relative to the indicator's scale"""
+    kernel, reference = KERNELS[name]
+    scale = indicator_scale(close.to_numpy(), name)
+    batched = kernel(close.to_numpy(), KERNEL_PERIODS)
+    batched = batched if isinstance(batched, tuple) else (batched,)
+    error = 0.0
+    for row, period in enumerate(KERNEL_PERIODS):
+        expected = reference(close, period)
+        expected = expected if isinstance(expected, tuple) else (expected,)
+        for values, series in zip(batched, expected):
+            error = max(error, max_difference(values[row], series.to_numpy(), scale))
+    return error
+
+
+def golden_error(name):
+    """Largest difference between a kernel and pandas_ta's own output in GOLDEN_PATH, scaled like kernel_error"""
+    golden = np.load(GOLDEN_PATH)
+    kernel, keys = GOLDEN_KERNELS[name]
+    batched = kernel(golden)
+    batched = batched if isinstance(batched, tuple) else (batched,)
+    scale = indicator_scale(golden['close'], name)
+    return max(max_difference(values, golden[key], scale) for values, key in zip(batched, keys))
+
+
+def synthetic_ohlcv(n, seed=42):
+    """Deterministic (5, n) OHLCV block: a geometric random walk with volatility regimes"""
+    rng = np.random.default_rng(seed)
+    volatility = 0.001 * np.repeat(rng.uniform(0.5, 3.0, n // 5000 + 1), 5000)[:n]
+    close = 20000 * np.exp(np.cumsum(rng.normal(0, 1, n) * volatility))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    wick = np.abs(rng.normal(0, 1, n)) * volatility
+    high = np.maximum(open_, close) * (1 + wick)
+    low = np.minimum(open_, close) * (1 - wick)
+    volume = rng.lognormal(3, 1, n)
+    return np.vstack([open_, high, low, close, volume]).round(2)
+
+
+class SyntheticClient:
+    """Stands in for binance Client.get_klines, serving synthetic candles in the Binance row format"""
+
+    def __init__(self, n, seed=42):
+        self.ohlcv = synthetic_ohlcv(n, seed)
+        self.calls = 0
+
+    def get_klines(self, symbol, interval, limit=500, startTime=None, endTime=None):
+        self.calls += 1
+        n = self.ohlcv.shape[1]
+        first = max(0, -(-(startTime - START_TIME) // INTERVAL_MS))
+        last = min(n, (endTime - START_TIME) // INTERVAL_MS + 1, first + limit)
+        if first >= last:
+            return []
+        values = self.ohlcv[:, first:last].astype(str).T.tolist()
+        rows = []
+        for i, (o, h, l, c, v) in enumerate(values, first):
+            open_time = START_TIME + i * INTERVAL_MS
+            rows.append([open_time, o, h, l, c, v, open_time + INTERVAL_MS - 1, '0', 0, '0', '0', '0'])
+        return rows
+
+
+def indicator_configs(names):
+    buy = copy.deepcopy(BUY_DEFAULTS)
+    sell = copy.deepcopy(SELL_DEFAULTS)
+    for configs in (buy, sell):
+        for key, config in configs.items():
+            config['active'] = key in names
+    return buy, sell
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * multiplier)
+
+
+def measure(func, setup, repeat):
+    """Best wall time over repeat runs and the peak traced memory of one extra run (MB)"""
+    best = float('inf')
+    sink = io.StringIO()
+    for _ in range(repeat):
+        args = setup()
+        with contextlib.redirect_stdout(sink):
+            started = time.perf_counter()
+            func(*args)
+            best = min(best, time.perf_counter() - started)
+        sink.seek(0)
+        sink.truncate()
+
+    args = setup()
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(sink):
+            func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak / (1024 * 1024)
+
+
+def measure_startup(repeat):
+    """Best time from a cold import of the app to its first /api/routes answer, and the peak RSS (MB)"""
+    env = dict(os.environ, LIVE_SCHEDULER='0', WARM_UP_IMPORTS='0', LOG_LEVEL='WARNING')
+    best = float('inf')
+    peak_mb = 0.0
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                env=env, capture_output=True, text=True, check=True).stdout
+        run = json.loads(output.strip().splitlines()[-1])
+        best = min(best, run['seconds'])
+        peak_mb = max(peak_mb, run['peak_mb'])
+    return best, peak_mb
+
+
+def result_row(stage, combo, bars, units, wall_time, peak_mb):
+    return {
+        'stage': stage,
+        'combo': combo,
+        'bars': bars,
+        'wall_time': round(wall_time, 6),
+        'peak_mb': round(peak_mb, 3),
+        'bars_per_sec': round(units / wall_time, 1) if wall_time > 0 else None
+    }
+
+
+def run_size(n, combos, stages, repeat, max_loop_bars):
+    """Benchmark every requested stage and combination on n synthetic bars"""
+    results = []
+    client = SyntheticClient(n)
+    backend.client = client
+    end_time = START_TIME + (n - 1) * INTERVAL_MS
+
+    def fetch():
+        return backend.get_historical_klines(SYMBOL, INTERVAL, START_TIME, end_time)
+
+    df = fetch()
+    if 'klines' in stages:
+        wall_time, peak_mb = measure(fetch, tuple, repeat)
+        results.append(result_row('klines', '-', n, n, wall_time, peak_mb))
+
+    # Kernel rows count computed values, bars times periods
+    close = df['Close']
+    for name, (kernel, reference) in KERNELS.items():
+        if 'kernels' in stages:
+            wall_time, peak_mb = measure(kernel, lambda: (close.to_numpy(), KERNEL_PERIODS), repeat)
+            row = result_row('kernels', name, n, n * len(KERNEL_PERIODS), wall_time, peak_mb)
+            row['max_error'] = max(kernel_error(close, name), golden_error(name))
+            results.append(row)
+        if 'kernels_pandas' in stages:
+            wall_time, peak_mb = measure(lambda: [reference(close, period) for period in KERNEL_PERIODS], tuple, repeat)
+            results.append(result_row('kernels_pandas', name, n, n * len(KERNEL_PERIODS), wall_time, peak_mb))
+
+    for combo in combos:
+        buy, sell = indicator_configs(COMBINATIONS[combo])
+
+        def fresh_frame():
+            indicator_cache.clear()
+            return df.copy(), copy.deepcopy(buy), copy.deepcopy(sell)
+
+        if 'indicators' in stages:
+            wall_time, peak_mb = measure(backend.calculate_dynamic_indicators, fresh_frame, repeat)
+            results.append(result_row('indicators', combo, n, n, wall_time, peak_mb))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            frame = backend.calculate_dynamic_indicators(*fresh_frame())
+
+        if 'signals' in stages:
+            # Live tests evaluate their compiled plan on the latest indicator row, one evaluation per call
+            def check_signals(frame, buy, sell):
+                plan = compile_plan(buy, sell)
+                row = {name: values[-1] for name, values in frame_columns(frame).items()}
+                for _ in range(SIGNAL_CALLS):
+                    plan.signal('buy', row)
+                    plan.signal('sell', row)
+
+            wall_time, peak_mb = measure(check_signals, lambda: (frame, buy, sell), repeat)
+            results.append(result_row('signals', combo, n, SIGNAL_CALLS, wall_time, peak_mb))
+
+        configs = lambda: (frame, copy.deepcopy(buy), copy.deepcopy(sell))
+        if 'backtest' in stages and n <= max_loop_bars:
+            wall_time, peak_mb = measure(backend.backtest_strategy, configs, repeat)
+            results.append(result_row('backtest', combo, n, n, wall_time, peak_mb))
+        if 'backtest_vectorized' in stages:
+            wall_time, peak_mb = measure(vectorized_backtest, configs, repeat)
+            results.append(result_row('backtest_vectorized', combo, n, n, wall_time, peak_mb))
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Rows that got slower or bigger than the baseline by more than tolerance"""
+    reference = {(r['stage'], r['combo'], r['bars']): r for r in baseline['results']}
+    regressions = []
+    for row in results:
+        base = reference.get((row['stage'], row['combo'], row['bars']))
+        if base is None:
+            continue
+        speed = row['bars_per_sec'] / base['bars_per_sec'] if base['bars_per_sec'] else 1.0
+        memory = row['peak_mb'] / base['peak_mb'] if base['peak_mb'] else 1.0
+        row['speed_ratio'] = round(speed, 3)
+        row['memory_ratio'] = round(memory, 3)
+        grew = memory > 1 + tolerance and row['peak_mb'] - base['peak_mb'] > MEMORY_NOISE_MB
+        if speed < 1 - tolerance or grew:
+            regressions.append(row)
+    return regressions
+
+
+def print_table(results):
+    print(f"{'stage':<20} {'combo':<10} {'bars':>9} {'wall s':>10} {'peak MB':>9} {'bars/s':>13} {'vs base':>8}")
+    for row in results:
+        ratio = f"{row['speed_ratio']:.2f}x" if 'speed_ratio' in row else ''
+        print(f"{row['stage']:<20} {row['combo']:<10} {row['bars']:>9} {row['wall_time']:>10.4f} "
+              f"{row['peak_mb']:>9.1f} {row['bars_per_sec']:>13,.0f} {ratio:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark startup, kline parsing, indicator kernels, indicators, signal checks and backtests')
+    parser.add_argument('--sizes', default='10k,100k,1m', help='comma separated bar counts, e.g. 10k,1m,5m')
+    parser.add_argument('--combos', default=','.join(COMBINATIONS), help='indicator combinations to run')
+    parser.add_argument('--stages', default=','.join(STAGES), help='stages to run')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-loop-bars', type=parse_size, default=100_000,
+                        help='skip the row by row backtest above this many bars')
+    parser.add_argument('--baseline', help='compare against this baseline file')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown / memory growth ratio')
+    parser.add_argument('--save-baseline', help='write the results as a new baseline file')
+    parser.add_argument('--log-level', default='WARNING',
+                        help='log level while benchmarking, DEBUG measures the cost of trade level logging')
+    args = parser.parse_args(argv)
+
+    combos = [c for c in args.combos.split(',') if c]
+    stages = [s for s in args.stages.split(',') if s]
+    unknown = [c for c in combos if c not in COMBINATIONS] + [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f"Unknown combos/stages: {', '.join(unknown)}")
+
+    logging.getLogger().setLevel(args.log_level.upper())
+    # The synthetic client answers instantly, Binance weight limits do not apply
+    kline_fetcher.weight_budget = kline_fetcher.WeightBudget(10 ** 12)
+
+    results = []
+    if 'startup' in stages:
+        wall_time, peak_mb = measure_startup(args.repeat)
+        results.append(result_row('startup', '-', 0, 1, wall_time, peak_mb))
+    for size in args.sizes.split(','):
+        results.extend(run_size(parse_size(size), combos, stages, args.repeat, args.max_loop_bars))
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+    print_table(results)
+    mismatches = [row for row in results if row.get('max_error', 0) > KERNEL_TOLERANCE]
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'pandas': pd.__version__,
+                'machine': platform.machine(),
+                'results': results
+            }, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.tolerance:.0%} tolerance:")
+        for row in regressions:
+            print(f"  {row['stage']} {row['combo']} {row['bars']} bars: "
+                  f"speed {row['speed_ratio']:.2f}x, memory {row['memory_ratio']:.2f}x")
+        return 1
+    if mismatches:
+        print(f"\n{len(mismatches)} kernel(s) differ from pandas_ta or the pandas reference by more than {KERNEL_TOLERANCE}:")
+        for row in mismatches:
+            print(f"  {row['combo']} {row['bars']} bars: {row['max_error']:.3g}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+from itertools import chain
+from operator import itemgetter
+
+import numpy as np
+
+COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+_ohlcv_getter = itemgetter(1, 2, 3, 4, 5)
+
+
+class Candles:
+    """Columnar candle container: int64 open times (ms) and a (5, n) OHLCV block.
+
+    Each price column is a contiguous row of the block, and to_frame() wraps
+    the block without copying, so pandas based code can keep working on it.
+    """
+
+    __slots__ = ('open_time', 'ohlcv')
+
+    def __init__(self, open_time, ohlcv):
+        self.open_time = open_time
+        self.ohlcv = ohlcv
+
+    @classmethod
+    def empty(cls, dtype=np.float64):
+        return cls(np.empty(0, dtype=np.int64), np.empty((5, 0), dtype=dtype))
+
+    @classmethod
+    def from_klines(cls, klines, dtype=np.float64):
+        """Parse raw Binance kline rows straight into typed arrays"""
+        n = len(klines)
+        if n == 0:
+            return cls.empty(dtype)
+        open_time = np.fromiter(map(itemgetter(0), klines), dtype=np.int64, count=n)
+        rows = np.fromiter(chain.from_iterable(map(_ohlcv_getter, klines)), dtype=np.float64, count=5 * n)
+        ohlcv = np.ascontiguousarray(rows.reshape(n, 5).T, dtype=dtype)
+        return cls(open_time, ohlcv)
+
+    @staticmethod
+    def close_times(klines):
+        return np.fromiter(map(itemgetter(6), klines), dtype=np.int64, count=len(klines))
+
+    def __len__(self):
+        return len(self.open_time)
+
+    @property
+    def open(self):
+        return self.ohlcv[0]
+
+    @property
+    def high(self):
+        return self.ohlcv[1]
+
+    @property
+    def low(self):
+        return self.ohlcv[2]
+
+    @property
+    def close(self):
+        return self.ohlcv[3]
+
+    @property
+    def volume(self):
+        return self.ohlcv[4]
+
+    @property
+    def nbytes(self):
+        return self.open_time.nbytes + self.ohlcv.nbytes
+
+    @property
+    def index(self):
+        # pandas is imported with the first frame, not when the app starts
+        import pandas as pd
+        index = pd.to_datetime(self.open_time, unit='ms')
+        index.name = 'Open Time'
+        return index
+
+    def select(self, mask_or_slice):
+        return Candles(self.open_time[mask_or_slice], self.ohlcv[:, mask_or_slice])
+
+    def between(self, start_time, end_time):
+        """Candles with start_time <= open time <= end_time (ms)"""
+        lo = np.searchsorted(self.open_time, start_time, side='left')
+        hi = np.searchsorted(self.open_time, end_time, side='right')
+        return self.select(slice(lo, hi))
+
+    def merge(self, other):
+        """Union sorted by open time, rows of self win on duplicate open times"""
+        open_time = np.concatenate([self.open_time, other.open_time])
+        ohlcv = np.concatenate([self.ohlcv, other.ohlcv.astype(self.ohlcv.dtype, copy=False)], axis=1)
+        order = np.argsort(open_time, kind='stable')
+        open_time, keep = np.unique(open_time[order], return_index=True)
+        return Candles(open_time, np.ascontiguousarray(ohlcv[:, order[keep]]))
+
+    def to_frame(self):
+        """DataFrame with the usual Open/High/Low/Close/Volume columns, sharing this container's memory"""
+        import pandas as pd
+        return pd.DataFrame(self.ohlcv.T, index=self.index, columns=list(COLUMNS), copy=False)
@@ -0,0 +1,39 @@
+import os
+
+# gunicorn -c gunicorn.conf.py backend:app
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+
+# Live tests are shared between workers with LIVE_TEST_STORE=sqlite, with the
+# default in-memory store keep a single worker. Backtest jobs and live test
+# replays stay in the worker that accepted them, so with more than one worker
+# polling them needs sticky sessions, otherwise other workers answer 404.
+workers = int(os.getenv('WEB_CONCURRENCY', 1))
+
+# Threads let live-test polls and SSE streams run next to a slow backtest.
+# Every open /api/livetest/stream connection holds one thread, past
+# MAX_LIVE_STREAMS (default half the threads) new streams get a 503.
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 16))
+
+# gthread workers heartbeat from their main loop, so long backtests are not
+# killed by this; it only restarts workers that hang completely
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Import the app once in the master and fork workers from it, pandas and
+# python-binance are only imported in the workers (see startup.py)
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    """Drop process-local state a preloaded master may have created before forking"""
+    import backend
+    from log_config import configure_logging
+    backend.client = None
+    # The master's log queue listener thread doesn't exist in the worker
+    configure_logging()
@@ -0,0 +1,126 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import metrics
+
+CACHE_MAX_BYTES = int(os.getenv('INDICATOR_CACHE_MB', 256)) * 1024 * 1024
+
+
+def candle_fingerprint(close):
+    """Hash of a close price series, indicators only depend on these values"""
+    values = np.ascontiguousarray(np.asarray(close, dtype=np.float64))
+    return hashlib.blake2b(values.tobytes(), digest_size=16).hexdigest()
+
+
+class IndicatorCache:
+    """Size-bounded LRU of computed indicator series keyed by (fingerprint, indicator params).
+
+    Values are stored as read-only NumPy arrays (or tuples of them) so cached
+    series can be shared between requests without being modified.
+    """
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _freeze(value):
+        if isinstance(value, tuple):
+            return tuple(IndicatorCache._freeze(v) for v in value)
+        # Kernel output is already a fresh float64 array, it's frozen without a copy
+        array = np.asarray(value, dtype=np.float64)
+        array.flags.writeable = False
+        return array
+
+    @staticmethod
+    def _size(value):
+        if isinstance(value, tuple):
+            return sum(v.nbytes for v in value)
+        return value.nbytes
+
+    def get(self, fingerprint, key, compute):
+        """Return the cached series for key, computing and storing it on a miss"""
+        cache_key = (fingerprint, key)
+        with self._lock:
+            value = self._entries.get(cache_key)
+            if value is not None:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if value is not None:
+            metrics.count('indicator_cache_hits', help_text='Indicator series served from the cache')
+            return value
+        metrics.count('indicator_cache_misses', help_text='Indicator series computed')
+
+        return self._store(cache_key, self._freeze(compute()))
+
+    def get_many(self, fingerprint, keys, compute):
+        """Return the cached series for every key, compute(missing_keys) returns the missing ones as rows of one array.
+
+        Lets a kernel that takes many periods fill all misses in a single call.
+        Rows are stored as copies, a view would keep the whole array alive
+        while the cache only counts the row.
+        """
+        values = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                value = self._entries.get((fingerprint, key))
+                if value is not None:
+                    self._entries.move_to_end((fingerprint, key))
+                    values[key] = value
+                elif key not in missing:
+                    missing.append(key)
+            self.hits += len(values)
+            self.misses += len(missing)
+        if values:
+            metrics.count('indicator_cache_hits', len(values), help_text='Indicator series served from the cache')
+        if missing:
+            metrics.count('indicator_cache_misses', len(missing), help_text='Indicator series computed')
+            for key, row in zip(missing, compute(missing)):
+                values[key] = self._store((fingerprint, key), self._freeze(np.array(row, dtype=np.float64)))
+        return [values[key] for key in keys]
+
+    def _store(self, cache_key, value):
+        size = self._size(value)
+        with self._lock:
+            if size > self.max_bytes or cache_key in self._entries:
+                return value
+            self._entries[cache_key] = value
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= self._size(evicted)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0
+            }
+
+
+indicator_cache = IndicatorCache()
@@ -0,0 +1,277 @@
+"""NumPy indicator kernels.
+
+Every *_matrix kernel takes a close price buffer and many periods at once
+and returns one row per period, shape (len(periods), len(close)). Warm-up
+bars are NaN. The formulas are pandas_ta 0.3.14b0's (and pandas rolling/ewm
+for Bollinger Bands and MACD), so values match what the app computed with
+pandas_ta up to floating point rounding; tests/test_indicators.py checks them
+against a stored fixture computed by a line-for-line copy of those pandas_ta
+formulas, see tests/fixtures/make_pandas_ta_golden.py.
+"""
+import numpy as np
+
+# Varsayılan RSI periyodu, başka periyotlar RSI_<period> kolonuna yazılır
+RSI_PERIOD = 14
+# Bars per block of the scans below, bounds their temporaries to a few (periods, block) arrays
+SCAN_BLOCK = 4096
+# Rolling windows are summed relative to a close at most this many bars back, keeps the variance sums small
+ROLLING_BLOCK = 1024
+# Largest exponent a scan block may grow decay**-k to, e**600 keeps far away from overflow
+SCAN_EXPONENT_LIMIT = 600.0
+
+
+def rsi_period(config):
+    return int(config.get('period', RSI_PERIOD))
+
+
+def rsi_column(period):
+    """Column name of an RSI, the default period keeps the plain RSI column"""
+    return 'RSI' if period == RSI_PERIOD else f'RSI_{period}'
+
+
+def _prices(close):
+    return np.ascontiguousarray(np.asarray(close, dtype=np.float64))
+
+
+def _periods(periods):
+    periods = np.asarray(periods, dtype=np.int64).reshape(-1)
+    if len(periods) and periods.min() < 1:
+        raise ValueError(f"Indicator periods must be positive: {periods.tolist()}")
+    return periods
+
+
+def _fill_start(out, counts, value=np.nan):
+    """Set the first counts[row] values of every row"""
+    for row, count in enumerate(counts):
+        out[row, :count] = value
+    return out
+
+
+def _row_chunks(rows, n):
+    """Slices over the rows of a (rows, n) kernel, a few MB of temporaries each"""
+    step = max(1, SCAN_BLOCK * 64 // max(n, 1))
+    return [slice(start, start + step) for start in range(0, rows, step)]
+
+
+def decay_scan(decay, inputs):
+    """y[:, t] = decay * y[:, t - 1] + inputs[:, t] with y[:, -1] = 0, computed in place in inputs.
+
+    Each block is solved in closed form, y[s + j] = decay**j * (decay * y[s - 1]
+    + cumsum(inputs[s:] * decay**-k)[j]), so the only Python loop is over
+    blocks. The block length keeps decay**-k finite, rounding stays at the
+    level of a plain running sum.
+    """
+    decay = np.asarray(decay, dtype=np.float64).reshape(-1, 1)
+    rows, n = inputs.shape
+    if n == 0 or rows == 0:
+        return inputs
+    # decay 0 (period 1) is the inputs themselves, they are left untouched
+    passthrough = decay[:, 0] == 0
+    if passthrough.all():
+        return inputs
+    scanned = ~passthrough
+    decay = decay[scanned]
+    values = inputs[scanned] if not scanned.all() else inputs
+
+    block = int(min(SCAN_BLOCK, max(1, SCAN_EXPONENT_LIMIT // -np.log(decay.min()))))
+    k = np.arange(block)
+    grow = decay ** -k
+    shrink = decay ** k
+    carry = np.zeros((len(decay), 1))
+    for start in range(0, n, block):
+        end = min(start + block, n)
+        size = end - start
+        chunk = values[:, start:end]
+        np.multiply(chunk, grow[:, :size], out=chunk)
+        np.cumsum(chunk, axis=1, out=chunk)
+        chunk += carry * decay
+        np.multiply(chunk, shrink[:, :size], out=chunk)
+        carry = chunk[:, -1:]
+    if values is not inputs:
+        inputs[scanned] = values
+    return inputs
+
+
+def _rolling(close, periods, with_std):
+    """Rolling means (and sample stds) of every period from sums over each block's windows.
+
+    The sums are taken over deviations from a close inside the block, so
+    they never grow with the length of the series and the variance doesn't
+    cancel out against them. Windows of a single repeated close are exact,
+    so a flat market has a std of 0 and not rounding noise (pandas' online
+    variance sometimes keeps some there).
+    """
+    x = _prices(close)
+    periods = _periods(periods)
+    n = len(x)
+    mean = np.empty((len(periods), n))
+    std = np.empty((len(periods), n)) if with_std else None
+    if n == 0 or len(periods) == 0:
+        return mean, std
+    widest = int(periods.max())
+    shortest = int(periods.min())
+    lengths = periods[:, None].astype(np.float64)
+    changed_at = 0
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for start in range(0, n, ROLLING_BLOCK):
+            end = min(start + ROLLING_BLOCK, n)
+            lo = max(start - widest + 1, 0)
+            deviations = x[lo:end] - x[start]
+            sums = np.concatenate(([0.0], np.cumsum(deviations)))
+            hi = np.arange(start - lo + 1, end - lo + 1)
+            first = hi - periods[:, None]
+            if start < widest - 1:
+                # Windows still warming up, they are set to NaN below
+                np.maximum(first, 0, out=first)
+            window_sum = np.subtract(sums[hi], sums[first])
+            block_mean = mean[:, start:end]
+            np.divide(window_sum, lengths, out=block_mean)
+            if with_std:
+                squares = np.concatenate(([0.0], np.cumsum(deviations * deviations)))
+                block_std = std[:, start:end]
+                np.subtract(squares[hi], squares[first], out=block_std)
+                window_sum *= block_mean
+                block_std -= window_sum
+                block_std /= lengths - 1
+                np.maximum(block_std, 0, out=block_std)
+                np.sqrt(block_std, out=block_std)
+            block_mean += x[start]
+            # Closes in a row equal to this one, counted back to the last change
+            bars = np.arange(start, end)
+            previous = x[start - 1] if start else np.nan
+            changed = np.concatenate(([x[start] != previous], x[start + 1:end] != x[start:end - 1]))
+            changed_at = np.maximum.accumulate(np.where(changed, bars, changed_at))
+            repeated = bars - changed_at + 1
+            changed_at = changed_at[-1]
+            if repeated.max() >= shortest:
+                flat = repeated >= periods[:, None]
+                np.copyto(block_mean, x[start:end], where=flat)
+                if with_std:
+                    block_std[flat] = 0.0
+
+    _fill_start(mean, periods - 1)
+    if with_std:
+        _fill_start(std, periods - 1)
+        # A single close has no sample std
+        std[periods == 1] = np.nan
+    return mean, std
+
+
+def sma_matrix(close, periods):
+    """Simple moving averages, pandas_ta.sma"""
+    return _rolling(close, periods, with_std=False)[0]
+
+
+def rolling_mean_std(close, periods):
+    """Rolling means and sample standard deviations, pandas rolling(period).mean() / .std()"""
+    return _rolling(close, periods, with_std=True)
+
+
+def ema_matrix(close, lengths, sma_seed=True):
+    """EMAs with alpha 2 / (length + 1).
+
+    sma_seed starts each EMA at the SMA of its first length closes like
+    pandas_ta.ema, otherwise it starts at the first close like pandas
+    ewm(span=length, adjust=False).
+    """
+    x = _prices(close)
+    lengths = _periods(lengths)
+    n = len(x)
+    alpha = 2.0 / (lengths + 1.0)
+    out = np.multiply.outer(alpha, x)
+    if n == 0:
+        return out
+    if not sma_seed:
+        out[:, 0] = x[0]
+        return decay_scan(1.0 - alpha, out)
+
+    seeded = lengths <= n
+    _fill_start(out, lengths - 1, 0.0)
+    rows = np.flatnonzero(seeded)
+    seeds = lengths[rows] - 1
+    out[rows, seeds] = np.cumsum(x)[seeds] / lengths[rows]
+    decay_scan(1.0 - alpha, out)
+    _fill_start(out, lengths - 1)
+    # Shorter series than the length have no EMA at all
+    out[~seeded] = np.nan
+    return out
+
+
+def rsi_matrix(close, periods):
+    """RSIs, pandas_ta.rsi.
+
+    Gains and losses are smoothed with pandas_ta's rma, an adjusted EWM with
+    alpha 1 / period (Wilder's smoothing). Its normalization is the same for
+    gains and losses and cancels in the ratio, so both are plain decay scans.
+    The first period bars and flat stretches without any change are NaN.
+    """
+    x = _prices(close)
+    periods = _periods(periods)
+    n = len(x)
+    change = np.diff(x, prepend=x[:1]) if n else x
+    gain = np.maximum(change, 0.0)
+    loss = np.maximum(-change, 0.0)
+    out = np.empty((len(periods), n))
+    # Gains are smoothed in the output rows, losses a few periods at a time
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for rows in _row_chunks(len(periods), n):
+            decay = 1.0 - 1.0 / periods[rows]
+            gains = out[rows]
+            gains[:] = gain
+            losses = np.empty_like(gains)
+            losses[:] = loss
+            decay_scan(decay, gains)
+            decay_scan(decay, losses)
+            losses += gains
+            gains /= losses
+    out *= 100
+    return _fill_start(out, periods)
+
+
+def macd_matrix(close, params):
+    """MACD and signal lines for (fast, slow, signal) triples, pandas ewm(adjust=False) started at the first close"""
+    params = _periods(params).reshape(-1, 3)
+    n = len(close)
+    macd = np.empty((len(params), n))
+    signal = np.empty((len(params), n))
+    for rows in _row_chunks(len(params), n):
+        chunk = params[rows]
+        # Every distinct fast/slow span of the chunk is computed once
+        spans, index = np.unique(chunk[:, :2], return_inverse=True)
+        index = index.reshape(-1, 2)
+        emas = ema_matrix(close, spans, sma_seed=False)
+        np.subtract(emas[index[:, 0]], emas[index[:, 1]], out=macd[rows])
+        del emas
+        alpha = 2.0 / (chunk[:, 2] + 1.0)
+        lines = signal[rows]
+        np.multiply(macd[rows], alpha[:, None], out=lines)
+        if n:
+            lines[:, 0] = macd[rows, 0]
+        decay_scan(1.0 - alpha, lines)
+    return macd, signal
+
+
+def rsi_series(close, period=RSI_PERIOD):
+    return rsi_matrix(close, [period])[0]
+
+
+def sma_series(close, period):
+    return sma_matrix(close, [period])[0]
+
+
+def ema_series(close, length):
+    return ema_matrix(close, [length])[0]
+
+
+def bollinger_bands(close, period, std_dev):
+    """Return (middle_band, std, upper_band, lower_band)"""
+    middle_band, std = rolling_mean_std(close, [period])
+    middle_band, std = middle_band[0], std[0]
+    return middle_band, std, middle_band + std * std_dev, middle_band - std * std_dev
+
+
+def macd_lines(close, fast, slow, signal):
+    """Return (macd_line, signal_line)"""
+    macd_line, signal_line = macd_matrix(close, [(fast, slow, signal)])
+    return macd_line[0], signal_line[0]
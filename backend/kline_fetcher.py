@@ -0,0 +1,198 @@
+import fcntl
+import os
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+KLINE_LIMIT = 1000
+FETCH_WORKERS = int(os.getenv('KLINE_FETCH_WORKERS', 8))
+# Binance allows 6000 request weight per minute per IP, keep some headroom for other calls
+WEIGHT_PER_MINUTE = int(os.getenv('BINANCE_WEIGHT_PER_MINUTE', 4800))
+# The budget is per IP, gunicorn workers draw from one bucket kept in this file. Empty keeps a bucket per process
+WEIGHT_STATE_PATH = os.getenv('BINANCE_WEIGHT_STATE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'binance_weight.state'))
+MAX_RETRIES = 3
+
+INTERVAL_MS = {
+    '1m': 60_000,
+    '3m': 3 * 60_000,
+    '5m': 5 * 60_000,
+    '15m': 15 * 60_000,
+    '30m': 30 * 60_000,
+    '1h': 60 * 60_000,
+    '2h': 2 * 60 * 60_000,
+    '4h': 4 * 60 * 60_000,
+    '6h': 6 * 60 * 60_000,
+    '8h': 8 * 60 * 60_000,
+    '12h': 12 * 60 * 60_000,
+    '1d': 24 * 60 * 60_000,
+    '3d': 3 * 24 * 60 * 60_000,
+    '1w': 7 * 24 * 60 * 60_000,
+}
+
+
+def klines_weight(limit):
+    """Request weight Binance charges for GET /api/v3/klines"""
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+class WeightBudget:
+    """Token bucket over Binance request weight.
+
+    Threads share it through a lock; with a state_path, processes share it
+    too: the tokens and their timestamp live in that file and every acquire
+    holds an flock on it.
+    """
+
+    _STATE = struct.Struct('<dd')
+
+    def __init__(self, weight_per_minute, state_path=None):
+        self.capacity = weight_per_minute
+        self.rate = weight_per_minute / 60.0
+        self.tokens = float(weight_per_minute)
+        self.updated = time.time()
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        if state_path:
+            os.makedirs(os.path.dirname(os.path.abspath(state_path)), exist_ok=True)
+
+    def _take(self, weight):
+        """Take weight if the bucket holds it, else return the seconds until it will"""
+        now = time.time()
+        # A clock stepped back doesn't refill the bucket
+        self.tokens = min(self.capacity, self.tokens + max(now - self.updated, 0.0) * self.rate)
+        self.updated = now
+        if self.tokens >= weight:
+            self.tokens -= weight
+            return 0.0
+        return (weight - self.tokens) / self.rate
+
+    def _take_shared(self, weight):
+        with open(self.state_path, 'a+b') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                state = f.read(self._STATE.size)
+                if len(state) == self._STATE.size:
+                    self.tokens, self.updated = self._STATE.unpack(state)
+                else:
+                    # New or unreadable file, start from a full bucket
+                    self.tokens, self.updated = float(self.capacity), time.time()
+                wait = self._take(weight)
+                f.truncate(0)
+                f.write(self._STATE.pack(self.tokens, self.updated))
+                f.flush()
+                return wait
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def acquire(self, weight):
+        while True:
+            with self._lock:
+                wait = self._take_shared(weight) if self.state_path else self._take(weight)
+            if not wait:
+                return
+            time.sleep(wait)
+
+
+weight_budget = WeightBudget(WEIGHT_PER_MINUTE, WEIGHT_STATE_PATH or None)
+
+_pool = None
+_pool_lock = threading.Lock()
+_pooled_sessions = set()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix='kline-fetch')
+        return _pool
+
+
+def _pool_session(client):
+    """Give the client's requests session enough keep-alive connections for the fetch workers"""
+    session = getattr(client, 'session', None)
+    if session is None or id(session) in _pooled_sessions:
+        return
+    from requests.adapters import HTTPAdapter
+    session.mount('https://', HTTPAdapter(pool_connections=FETCH_WORKERS, pool_maxsize=FETCH_WORKERS))
+    _pooled_sessions.add(id(session))
+
+
+def get_klines_page(client, symbol, interval, start_time, end_time, limit=KLINE_LIMIT):
+    """One rate-limited get_klines call, retried when Binance answers 429/418"""
+    for attempt in range(MAX_RETRIES + 1):
+        weight_budget.acquire(klines_weight(limit))
+        try:
+            return client.get_klines(symbol=symbol, interval=interval, limit=limit, startTime=start_time, endTime=end_time)
+        except Exception as e:
+            if getattr(e, 'status_code', None) not in (418, 429) or attempt == MAX_RETRIES:
+                raise
+            metrics.count('binance_rate_limited', help_text='Kline requests retried after a 429/418 answer')
+            time.sleep(2 ** attempt)
+
+
+def fetch_klines_serial(client, symbol, interval, start_time, end_time, on_page=None):
+    """Page through klines one request after another, each page starting after the last open time"""
+    klines = []
+    while start_time <= end_time:
+        temp_klines = get_klines_page(client, symbol, interval, start_time, end_time)
+        metrics.count('binance_rest_calls', help_text='Binance kline pages requested')
+        if not temp_klines:
+            break
+        klines.extend(temp_klines)
+        metrics.count('candles_fetched', len(temp_klines), 'Candles received from Binance')
+        if on_page is not None:
+            on_page(len(temp_klines))
+        start_time = temp_klines[-1][0] + 1
+        if len(temp_klines) < KLINE_LIMIT:
+            break
+    return klines
+
+
+def fetch_klines(client, symbol, interval, start_time, end_time, on_page=None):
+    """Fetch klines between start_time and end_time (ms, inclusive), pages in parallel when possible.
+
+    For fixed-length intervals the page boundaries are known up front, so the
+    pages are requested concurrently and reassembled in order without duplicates.
+    on_page(count) is called with the number of candles of every received page.
+    """
+    interval_ms = INTERVAL_MS.get(interval)
+    if interval_ms is None:
+        return fetch_klines_serial(client, symbol, interval, start_time, end_time, on_page)
+
+    # Any window of KLINE_LIMIT intervals holds at most KLINE_LIMIT candle opens
+    page_ms = interval_ms * KLINE_LIMIT
+    pages = [(page_start, min(end_time, page_start + page_ms - 1))
+             for page_start in range(start_time, end_time + 1, page_ms)]
+    if len(pages) <= 1:
+        return fetch_klines_serial(client, symbol, interval, start_time, end_time, on_page)
+
+    _pool_session(client)
+    pool = _get_pool()
+    futures = [pool.submit(get_klines_page, client, symbol, interval, page_start, page_end)
+               for page_start, page_end in pages]
+
+    klines = []
+    last_open_time = None
+    for future in futures:
+        page = future.result()
+        # Counted on the calling thread so the pages land in the caller's request trace
+        metrics.count('binance_rest_calls', help_text='Binance kline pages requested')
+        metrics.count('candles_fetched', len(page), 'Candles received from Binance')
+        if on_page is not None:
+            on_page(len(page))
+        for kline in page:
+            if last_open_time is None or kline[0] > last_open_time:
+                klines.append(kline)
+                last_open_time = kline[0]
+    return klines
@@ -0,0 +1,266 @@
+import fcntl
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+import metrics
+from candles import Candles
+from kline_fetcher import fetch_klines
+
+# Bump when the on-disk layout changes, stores with another layout are refetched
+STORE_LAYOUT = 'segments-v1'
+# Candles per segment file, a newly closed candle only rewrites the last, partly filled segment
+SEGMENT_ROWS = int(os.getenv('KLINE_SEGMENT_ROWS', 10_000))
+
+
+class KlineStore:
+    """Persistent per symbol/interval candle cache backed by memory-mapped .npy segments.
+
+    A series is a run of segment files of at most SEGMENT_ROWS candles, listed
+    in order by its meta file. Only closed candles are written to disk. Every
+    read fetches just the head range before the stored data (if it was never
+    covered) and the tail range after the last stored candle. New candles go
+    into new segment files next to the old ones, only a partly filled first or
+    last segment is written again, and reads map only the segments that
+    overlap the requested range. Gunicorn workers share the files: every read
+    and write of a series holds an flock on its lock file, and the meta file
+    written last records the segments and their row counts, so a store cut
+    short by a crash is refetched.
+    """
+
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+        os.makedirs(root_dir, exist_ok=True)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, symbol, interval):
+        with self._locks_guard:
+            return self._locks.setdefault((symbol, interval), threading.Lock())
+
+    def _paths(self, symbol, interval):
+        base = os.path.join(self.root_dir, f"{symbol}_{interval}")
+        return f"{base}.meta.json", f"{base}.lock"
+
+    def _segment_paths(self, symbol, interval, segment_id):
+        base = os.path.join(self.root_dir, f"{symbol}_{interval}.{segment_id}")
+        return f"{base}.times.npy", f"{base}.ohlcv.npy"
+
+    @contextmanager
+    def _locked(self, symbol, interval):
+        """Exclusive access to one series, between threads and between processes"""
+        with self._lock_for(symbol, interval):
+            with open(self._paths(symbol, interval)[1], 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _replace(self, path, write, mode='wb'):
+        # Unique temp file in the same directory, so concurrent writers never share one and os.replace stays atomic
+        fd, tmp_path = tempfile.mkstemp(dir=self.root_dir, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, mode) as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def load(self, symbol, interval, start_time=None, end_time=None):
+        """Return (candles, covered_from) for the stored candles, between start_time and end_time when given"""
+        with self._locked(symbol, interval):
+            return self._load(symbol, interval, start_time, end_time)
+
+    def save(self, symbol, interval, candles, covered_from):
+        """Replace the stored series with candles"""
+        with self._locked(symbol, interval):
+            meta = self._meta(symbol, interval)
+            stale = meta['segments'] if meta else []
+            meta = {'layout': STORE_LAYOUT, 'covered_from': int(covered_from),
+                    'next_id': meta['next_id'] if meta else 0, 'segments': []}
+            meta['segments'] = self._write_segments(symbol, interval, meta, candles)
+            self._commit(symbol, interval, meta, stale)
+
+    def missing_ms(self, symbol, interval, start_time, end_time):
+        """Length of the ranges get_klines would download for start_time to end_time"""
+        # The meta is replaced atomically, reading it doesn't wait for a fetch holding the lock
+        meta = self._meta(symbol, interval)
+        if meta is None or not meta['segments']:
+            return max(end_time - start_time, 0)
+        first, last = meta['segments'][0][2], meta['segments'][-1][3]
+        head = max(first - start_time, 0) if start_time < meta['covered_from'] else 0
+        return head + max(end_time - max(last, start_time), 0)
+
+    def _meta(self, symbol, interval):
+        meta_path = self._paths(symbol, interval)[0]
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        return meta if meta.get('layout') == STORE_LAYOUT else None
+
+    def _read_segment(self, symbol, interval, segment):
+        """Memory-mapped Candles of one segment, None if its files don't match the meta"""
+        segment_id, rows = segment[0], segment[1]
+        times_path, ohlcv_path = self._segment_paths(symbol, interval, segment_id)
+        try:
+            open_times = np.load(times_path, mmap_mode='r')
+            ohlcv = np.load(ohlcv_path, mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        if not (len(open_times) == rows and ohlcv.shape == (5, rows)):
+            return None
+        return Candles(open_times, ohlcv)
+
+    def _load(self, symbol, interval, start_time=None, end_time=None):
+        meta = self._meta(symbol, interval)
+        if meta is None:
+            return Candles.empty(), None
+        lo = -np.inf if start_time is None else start_time
+        hi = np.inf if end_time is None else end_time
+        parts = []
+        for segment in meta['segments']:
+            if segment[3] < lo or segment[2] > hi:
+                continue
+            candles = self._read_segment(symbol, interval, segment)
+            if candles is None:
+                # Files of another write than the meta (a save that didn't finish), the series is fetched again
+                return Candles.empty(), None
+            parts.append(candles)
+        if not parts:
+            return Candles.empty(), meta['covered_from']
+        if len(parts) == 1:
+            candles = parts[0]
+        else:
+            candles = Candles(np.concatenate([part.open_time for part in parts]),
+                              np.concatenate([part.ohlcv for part in parts], axis=1))
+        if start_time is not None or end_time is not None:
+            candles = candles.between(lo, hi)
+        return candles, meta['covered_from']
+
+    def _readable(self, symbol, interval, meta, start_time, end_time):
+        """Whether the segments a get_klines call reads or rewrites match the meta"""
+        segments = meta['segments']
+        needed = [segment for segment in segments if segment[3] >= start_time and segment[2] <= end_time]
+        return all(self._read_segment(symbol, interval, segment) is not None
+                   for segment in needed + segments[:1] + segments[-1:])
+
+    def _write_segments(self, symbol, interval, meta, candles):
+        """Write candles as new segment files of at most SEGMENT_ROWS rows, return their meta entries"""
+        segments = []
+        for lo in range(0, len(candles), SEGMENT_ROWS):
+            part = candles.select(slice(lo, lo + SEGMENT_ROWS))
+            segment_id = meta['next_id']
+            meta['next_id'] += 1
+            times_path, ohlcv_path = self._segment_paths(symbol, interval, segment_id)
+            for path, array in ((times_path, part.open_time), (ohlcv_path, part.ohlcv)):
+                self._replace(path, lambda f: np.save(f, np.ascontiguousarray(array)))
+            segments.append([segment_id, len(part), int(part.open_time[0]), int(part.open_time[-1])])
+        return segments
+
+    def _extend(self, symbol, interval, meta, candles, head):
+        """Add candles before (head) or after the stored ones, a partly filled end segment is rewritten with them"""
+        segments = meta['segments']
+        stale = []
+        end = 0 if head else -1
+        if len(candles) and segments and segments[end][1] < SEGMENT_ROWS:
+            stale.append(segments.pop(end))
+            candles = self._read_segment(symbol, interval, stale[0]).merge(candles)
+        written = self._write_segments(symbol, interval, meta, candles)
+        meta['segments'] = written + segments if head else segments + written
+        return stale
+
+    def _commit(self, symbol, interval, meta, stale):
+        # Written last, it vouches for the segment files it lists, the replaced ones are removed after it
+        self._replace(self._paths(symbol, interval)[0], lambda f: json.dump(meta, f), mode='w')
+        for segment in stale:
+            for path in self._segment_paths(symbol, interval, segment[0]):
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+
+    def get_klines(self, client, symbol, interval, start_time, end_time, on_page=None):
+        """Return Candles between start_time and end_time, filling gaps from Binance"""
+        # Held over the fetch too, so two workers don't download and write the same range
+        with self._locked(symbol, interval):
+            meta = self._meta(symbol, interval)
+            old = meta
+            if meta is not None and not self._readable(symbol, interval, meta, start_time, end_time):
+                # Files of another write than the meta (a save that didn't finish), the series is fetched again
+                meta = None
+
+            forming = Candles.empty()
+            fetched = 0
+            stale = []
+            changed = False
+            if meta is None or not meta['segments']:
+                klines = fetch_klines(client, symbol, interval, start_time, end_time, on_page)
+                new = Candles.from_klines(klines)
+                closed = Candles.close_times(klines) < int(time.time() * 1000)
+                fetched += len(new)
+                forming = new.select(~closed)
+                if closed.any():
+                    meta = {'layout': STORE_LAYOUT, 'covered_from': int(start_time),
+                            'next_id': old['next_id'] if old else 0, 'segments': []}
+                    stale = old['segments'] if old else []
+                    self._extend(symbol, interval, meta, new.select(closed), head=False)
+                    changed = True
+            else:
+                if start_time < meta['covered_from']:
+                    # Candles before the stored ones have all closed
+                    new = Candles.from_klines(fetch_klines(client, symbol, interval, start_time, meta['segments'][0][2] - 1, on_page))
+                    fetched += len(new)
+                    stale += self._extend(symbol, interval, meta, new, head=True)
+                    meta['covered_from'] = int(start_time)
+                    changed = True
+                last = meta['segments'][-1][3]
+                if end_time > last:
+                    klines = fetch_klines(client, symbol, interval, last + 1, end_time, on_page)
+                    new = Candles.from_klines(klines)
+                    closed = Candles.close_times(klines) < int(time.time() * 1000)
+                    fetched += len(new)
+                    forming = new.select(~closed)
+                    if closed.any():
+                        stale += self._extend(symbol, interval, meta, new.select(closed), head=False)
+                        changed = True
+            if changed:
+                self._commit(symbol, interval, meta, stale)
+
+            stored = self._load(symbol, interval, start_time, end_time)[0] if meta is not None else Candles.empty()
+            # The still-forming candle is returned to the caller but never persisted
+            if len(forming):
+                stored = stored.merge(forming)
+
+            result = stored.between(start_time, end_time)
+            metrics.count('kline_store_candles', max(len(result) - fetched, 0), 'Candles served from the local kline store')
+            return Candles(np.array(result.open_time), np.array(result.ohlcv))
+
+    def read_klines(self, client, symbol, interval, start_time, end_time, on_page=None):
+        """Like get_klines but never writes, candles the store lacks are downloaded for this range only.
+
+        Memory stays bounded by the range however far it is from the stored
+        data, for streamed backtests that walk long periods chunk by chunk.
+        """
+        with self._locked(symbol, interval):
+            meta = self._meta(symbol, interval)
+            if (meta is not None and meta['segments'] and meta['covered_from'] <= start_time
+                    and self._readable(symbol, interval, meta, start_time, end_time)):
+                stored = self._load(symbol, interval, start_time, end_time)[0]
+                stored = Candles(np.array(stored.open_time), np.array(stored.ohlcv))
+                missing_from = max(start_time, meta['segments'][-1][3] + 1)
+            else:
+                stored, missing_from = Candles.empty(), start_time
+
+        fetched = Candles.empty()
+        if missing_from <= end_time:
+            fetched = Candles.from_klines(fetch_klines(client, symbol, interval, missing_from, end_time, on_page))
+        metrics.count('kline_store_candles', len(stored), 'Candles served from the local kline store')
+        return stored.merge(fetched) if len(fetched) else stored
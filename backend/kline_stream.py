@@ -0,0 +1,174 @@
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger('livetest.stream')
+
+
+def kline_event(symbol, interval, open_time, open_, high, low, close, volume, closed):
+    return {
+        'symbol': symbol,
+        'interval': interval,
+        'open_time': int(open_time),
+        'open': float(open_),
+        'high': float(high),
+        'low': float(low),
+        'close': float(close),
+        'volume': float(volume),
+        'closed': bool(closed)
+    }
+
+
+class BinanceKlineSource:
+    """Kline stream from Binance through python-binance's ThreadedWebsocketManager"""
+
+    def __init__(self, api_key=None, api_secret=None):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self._manager = None
+        self._lock = threading.Lock()
+
+    def _get_manager(self):
+        with self._lock:
+            if self._manager is None:
+                from binance import ThreadedWebsocketManager
+                self._manager = ThreadedWebsocketManager(api_key=self.api_key, api_secret=self.api_secret)
+                self._manager.start()
+            return self._manager
+
+    def subscribe(self, symbol, interval, callback):
+        def handle_message(msg):
+            if msg.get('e') != 'kline':
+                logger.warning("Kline stream error for %s %s: %s", symbol, interval, msg)
+                return
+            k = msg['k']
+            callback(kline_event(symbol, interval, k['t'], k['o'], k['h'], k['l'], k['c'], k['v'], k['x']))
+
+        return self._get_manager().start_kline_socket(callback=handle_message, symbol=symbol, interval=interval)
+
+    def unsubscribe(self, handle):
+        self._get_manager().stop_socket(handle)
+
+
+class ReplayKlineSource:
+    """Stands in for Binance by replaying stored candles as closed kline events.
+
+    load(symbol, interval) returns a candle DataFrame like get_historical_klines,
+    delay is the pause between candles in seconds.
+    """
+
+    def __init__(self, load, delay=0.0):
+        self.load = load
+        self.delay = delay
+
+    def subscribe(self, symbol, interval, callback):
+        stop = threading.Event()
+        df = self.load(symbol, interval)
+
+        def run():
+            open_times = df.index.values.astype('datetime64[ms]').astype('int64')
+            values = df[['Open', 'High', 'Low', 'Close', 'Volume']].to_numpy()
+            for open_time, (open_, high, low, close, volume) in zip(open_times, values):
+                if stop.is_set():
+                    break
+                callback(kline_event(symbol, interval, open_time, open_, high, low, close, volume, True))
+                if self.delay:
+                    time.sleep(self.delay)
+
+        thread = threading.Thread(target=run, daemon=True, name=f"replay-{symbol}-{interval}")
+        thread.start()
+        return stop, thread
+
+    def unsubscribe(self, handle):
+        stop, _ = handle
+        stop.set()
+
+
+class KlineHub:
+    """Keeps one stream subscription per (symbol, interval) and calls on_closed for every closed candle"""
+
+    def __init__(self, source, on_closed):
+        self.source = source
+        self.on_closed = on_closed
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+
+    def _dispatch(self, event):
+        if not event['closed']:
+            return
+        try:
+            self.on_closed(event)
+        except Exception as e:
+            logger.exception("Error handling closed candle %s %s: %s", event['symbol'], event['interval'], e)
+
+    def ensure(self, symbol, interval):
+        with self._lock:
+            key = (symbol, interval)
+            if key not in self._subscriptions:
+                self._subscriptions[key] = self.source.subscribe(symbol, interval, self._dispatch)
+
+    def release(self, symbol, interval):
+        with self._lock:
+            handle = self._subscriptions.pop((symbol, interval), None)
+        if handle is not None:
+            self.source.unsubscribe(handle)
+
+    def active(self):
+        with self._lock:
+            return list(self._subscriptions)
+
+
+class Broadcaster:
+    """Fan-out of messages to per-key subscriber queues, used for SSE clients.
+
+    max_subscribers caps the queues over all keys, subscribe() returns None
+    at the cap.
+    """
+
+    def __init__(self, max_queue=100, max_subscribers=None):
+        self.max_queue = max_queue
+        self.max_subscribers = max_subscribers
+        self._queues = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, key):
+        q = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            if self.max_subscribers is not None and self._count() >= self.max_subscribers:
+                return None
+            self._queues.setdefault(key, set()).add(q)
+        return q
+
+    def _count(self):
+        return sum(len(queues) for queues in self._queues.values())
+
+    def count(self):
+        with self._lock:
+            return self._count()
+
+    def unsubscribe(self, key, q):
+        with self._lock:
+            queues = self._queues.get(key)
+            if queues is not None:
+                queues.discard(q)
+                if not queues:
+                    del self._queues[key]
+
+    def subscribers(self, key):
+        with self._lock:
+            return len(self._queues.get(key, ()))
+
+    def publish(self, key, message):
+        with self._lock:
+            queues = list(self._queues.get(key, ()))
+        for q in queues:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                # Slow client, drop its oldest message
+                try:
+                    q.get_nowait()
+                    q.put_nowait(message)
+                except (queue.Empty, queue.Full):
+                    pass
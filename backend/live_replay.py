@@ -0,0 +1,158 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from backtest_engine import INITIAL_BALANCE, TradeLog
+
+logger = logging.getLogger('livetest.replay')
+
+# Replays running at once, the rest wait in the thread pool's queue
+REPLAY_WORKERS = int(os.getenv('LIVE_REPLAY_WORKERS', 4))
+MAX_FINISHED_REPLAYS = int(os.getenv('LIVE_REPLAY_RESULTS', 50))
+# Closed bars handed to advance() per call when replaying at full speed
+REPLAY_BATCH_BARS = 500
+
+
+class LiveReplay:
+    """One live test session fed historical closed candles instead of waiting for real ones.
+
+    The first warmup bars only prime the indicator state, like the candles a
+    live session warms up with. Every later bar goes through advance(live_test,
+    open_times, closes), the same path the scheduler and the kline stream use.
+    speed is a multiple of real time (60 plays a 1m candle per second),
+    None replays as fast as possible. Executed trades are kept in a TradeLog
+    so a replay can be compared with a backtest of the same candles.
+    """
+
+    def __init__(self, live_test, open_times, closes, interval_ms, speed=None, warmup=0):
+        self.id = uuid.uuid4().hex
+        self.live_test = live_test
+        self.open_times = open_times
+        self.closes = closes
+        self.interval_ms = interval_ms
+        self.speed = speed
+        self.warmup = min(warmup, len(closes))
+        self.status = 'queued'
+        self.bars = 0
+        self.trade_log = TradeLog()
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+
+    def stop(self):
+        self._stopped.set()
+
+    def run(self, advance):
+        with self._lock:
+            self.status = 'running'
+            self.started = time.time()
+
+        state = self.live_test['indicator_state']
+        for close in self.closes[:self.warmup]:
+            state.update(close)
+        if self.warmup:
+            self.live_test['last_candle_time'] = int(self.open_times[self.warmup - 1])
+        else:
+            self.live_test['last_candle_time'] = int(self.open_times[0]) - 1 if len(self.open_times) else 0
+
+        step = 1 if self.speed else REPLAY_BATCH_BARS
+        bar_seconds = self.interval_ms / 1000 / self.speed if self.speed else 0
+        next_due = time.monotonic()
+        for start in range(self.warmup, len(self.closes), step):
+            if self._stopped.is_set():
+                break
+            end = min(start + step, len(self.closes))
+            with self._lock:
+                for result in advance(self.live_test, self.open_times[start:end], self.closes[start:end]):
+                    if result['trade'] is not None:
+                        self.trade_log.add(**result['trade'])
+                self.bars = end - self.warmup
+            if bar_seconds:
+                next_due += bar_seconds
+                self._stopped.wait(max(next_due - time.monotonic(), 0))
+
+    def to_dict(self, since=0):
+        with self._lock:
+            live_test = self.live_test
+            elapsed = ((self.finished or time.time()) - self.started) if self.started else 0
+            price = float(self.closes[self.warmup + self.bars - 1]) if self.bars else None
+            equity = live_test['amount'] * price if live_test['position'] == 1 else live_test['balance']
+            return {
+                'replayId': self.id,
+                'status': self.status,
+                'symbol': live_test['symbol'],
+                'timeframe': live_test['timeframe'],
+                'speed': self.speed,
+                'bars': self.bars,
+                'totalBars': len(self.closes) - self.warmup,
+                'barsPerSec': round(self.bars / elapsed, 1) if elapsed > 0 else None,
+                'position': live_test['position'],
+                'balance': float(live_test['balance']),
+                'profit': float(equity - INITIAL_BALANCE),
+                'trades': live_test['trades'],
+                'winRate': round((live_test['wins'] / live_test['trades'] * 100) if live_test['trades'] > 0 else 0, 2),
+                'seq': live_test.get('log_seq', 0),
+                'entries': [entry for entry in live_test.get('log', []) if entry['seq'] > since],
+                'tradeLog': self.trade_log.to_dict(),
+                'error': self.error,
+                'created': self.created,
+                'started': self.started,
+                'finished': self.finished
+            }
+
+
+class ReplayManager:
+    """Runs replays concurrently on a bounded thread pool and keeps the latest finished ones for inspection.
+
+    The threads share the GIL, so this is concurrency, not parallelism:
+    paced replays spend their time waiting for the next bar, full speed
+    replays take turns on one core. Replays stay in this process because
+    their progress is read and stopped through the live objects.
+    """
+
+    def __init__(self, advance, max_workers=REPLAY_WORKERS, max_finished=MAX_FINISHED_REPLAYS):
+        self.advance = advance
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='live-replay')
+        self._active = {}
+        self._finished = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, replay):
+        with self._lock:
+            self._active[replay.id] = replay
+        self._executor.submit(self._run, replay)
+        return replay
+
+    def _run(self, replay):
+        try:
+            replay.run(self.advance)
+            status = 'stopped' if replay._stopped.is_set() else 'done'
+        except Exception as e:
+            logger.exception("Live test replay %s failed: %s", replay.id, e)
+            replay.error = str(e)
+            status = 'failed'
+        with replay._lock:
+            replay.status = status
+            replay.finished = time.time()
+        logger.info("Live test replay %s %s after %d bars", replay.id, status, replay.bars)
+        with self._lock:
+            self._active.pop(replay.id, None)
+            self._finished[replay.id] = replay
+            while len(self._finished) > self.max_finished:
+                self._finished.popitem(last=False)
+
+    def get(self, replay_id):
+        with self._lock:
+            return self._active.get(replay_id) or self._finished.get(replay_id)
+
+    def replays(self):
+        with self._lock:
+            return list(self._active.values()) + list(reversed(self._finished.values()))
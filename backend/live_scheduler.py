@@ -0,0 +1,154 @@
+import logging
+import os
+import threading
+import time
+
+from live_store import LiveTestNotFound
+
+logger = logging.getLogger('livetest.scheduler')
+
+try:
+    import fcntl
+except ImportError:  # Windows, every process schedules
+    fcntl = None
+
+# Closed candles fetched per group and tick, sessions further behind backfill themselves
+GROUP_CANDLES = 5
+# Binance needs a moment after the interval boundary to finalize the closed candle
+SCHEDULER_DELAY_MS = int(os.getenv('LIVE_SCHEDULER_DELAY_MS', 2000))
+POLL_SECONDS = 1.0
+
+
+def next_boundary(now_ms, interval_ms):
+    return (now_ms // interval_ms + 1) * interval_ms
+
+
+class LiveTestScheduler:
+    """Advances every live test session once per candle close, without waiting for client polls.
+
+    Sessions are grouped by (symbol, timeframe). At each interval boundary the
+    group's latest closed candles are fetched once with fetch_candles(symbol,
+    timeframe, start_time, end_time) -> (open_times, closes), and every
+    session of the group is advanced with advance(live_test, open_times,
+    closes) -> results inside an atomic store update. on_result(session_id,
+    result) is called for each evaluation.
+
+    When lock_path is set only the process holding the file lock schedules,
+    so several workers sharing a store don't fetch and evaluate twice.
+    """
+
+    def __init__(self, store, fetch_candles, advance, interval_ms, on_result=None,
+                 delay_ms=SCHEDULER_DELAY_MS, lock_path=None):
+        self.store = store
+        self.fetch_candles = fetch_candles
+        self.advance = advance
+        self.interval_ms = interval_ms
+        self.on_result = on_result
+        self.delay_ms = delay_ms
+        self.lock_path = lock_path
+        self.ticks = 0
+        self.fetches = 0
+        self.evaluations = 0
+        self._due = {}
+        self._lock_file = None
+        self._thread = None
+        self._pid = None
+        self._stopped = threading.Event()
+        self._start_lock = threading.Lock()
+
+    def ensure_started(self):
+        """Start the scheduler thread in this process if it isn't running yet"""
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            # A thread started before a fork doesn't exist in the child
+            self._lock_file = None
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='live-scheduler', daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def is_leader(self):
+        if self.lock_path is None or fcntl is None:
+            return True
+        if self._lock_file is None:
+            os.makedirs(os.path.dirname(self.lock_path) or '.', exist_ok=True)
+            lock_file = open(self.lock_path, 'a+')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+            self._lock_file = lock_file
+        return True
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                if self.is_leader():
+                    self.tick(int(time.time() * 1000))
+            except Exception as e:
+                logger.exception("Error in live test scheduler: %s", e)
+            self._stopped.wait(POLL_SECONDS)
+
+    def tick(self, now_ms):
+        """Run every group whose candle closed since its last run, return the number of groups run"""
+        self.ticks += 1
+        groups = {}
+        for session_id, symbol, timeframe in self.store.sessions():
+            groups.setdefault((symbol, timeframe), []).append(session_id)
+
+        for key in list(self._due):
+            if key not in groups:
+                del self._due[key]
+
+        ran = 0
+        for (symbol, timeframe), session_ids in groups.items():
+            interval_ms = self.interval_ms(timeframe)
+            key = (symbol, timeframe)
+            due = self._due.setdefault(key, next_boundary(now_ms, interval_ms) + self.delay_ms)
+            if now_ms < due:
+                continue
+            self.run_group(symbol, timeframe, session_ids, due - self.delay_ms)
+            self._due[key] = next_boundary(now_ms, interval_ms) + self.delay_ms
+            ran += 1
+        return ran
+
+    def run_group(self, symbol, timeframe, session_ids, boundary):
+        """Fetch the group's closed candles up to boundary once and advance each of its sessions"""
+        interval_ms = self.interval_ms(timeframe)
+        open_times, closes = self.fetch_candles(symbol, timeframe, boundary - GROUP_CANDLES * interval_ms, boundary - 1)
+        self.fetches += 1
+        closed = open_times + interval_ms <= boundary
+        open_times, closes = open_times[closed], closes[closed]
+        if len(open_times) == 0:
+            return
+
+        for session_id in session_ids:
+            try:
+                results = self.store.update(session_id, lambda live_test: self.advance(live_test, open_times, closes))
+            except LiveTestNotFound:
+                continue  # Stopped in the meantime
+            except Exception as e:
+                logger.exception("Error advancing live test %s: %s", session_id, e)
+                continue
+            self.evaluations += len(results)
+            if self.on_result is not None:
+                for result in results:
+                    self.on_result(session_id, result)
+
+    def status(self):
+        return {
+            'running': self._thread is not None and self._pid == os.getpid() and self._thread.is_alive(),
+            'leader': self._lock_file is not None or self.lock_path is None or fcntl is None,
+            'groups': [{'symbol': symbol, 'timeframe': timeframe, 'due': due}
+                       for (symbol, timeframe), due in self._due.items()],
+            'ticks': self.ticks,
+            'fetches': self.fetches,
+            'evaluations': self.evaluations
+        }
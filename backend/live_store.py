@@ -0,0 +1,178 @@
+import copy
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+
+MAX_UPDATE_RETRIES = 5
+
+
+class LiveTestNotFound(Exception):
+    pass
+
+
+def new_session_id():
+    return uuid.uuid4().hex
+
+
+class MemoryLiveTestStore:
+    """Live test sessions in process memory, for a single worker process"""
+
+    def __init__(self):
+        self._sessions = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def create(self, live_test):
+        session_id = new_session_id()
+        with self._lock:
+            self._sessions[session_id] = live_test
+            self._locks[session_id] = threading.Lock()
+        return session_id
+
+    def get(self, session_id):
+        """Copy of the session's live test, None when it doesn't exist"""
+        with self._lock:
+            live_test = self._sessions.get(session_id)
+            lock = self._locks.get(session_id)
+        if live_test is None:
+            return None
+        with lock:
+            return copy.deepcopy(live_test)
+
+    def update(self, session_id, apply):
+        """Run apply(live_test) with the session locked and return its result.
+
+        apply works on a copy that replaces the session only when it returns,
+        so an exception leaves the session as it was, like the SQLite store.
+        """
+        with self._lock:
+            live_test = self._sessions.get(session_id)
+            lock = self._locks.get(session_id)
+        if live_test is None:
+            raise LiveTestNotFound(session_id)
+        with lock:
+            updated = copy.deepcopy(self._sessions.get(session_id, live_test))
+            result = apply(updated)
+            with self._lock:
+                # A session deleted meanwhile stays deleted
+                if session_id in self._sessions:
+                    self._sessions[session_id] = updated
+            return result
+
+    def delete(self, session_id):
+        with self._lock:
+            self._locks.pop(session_id, None)
+            return self._sessions.pop(session_id, None) is not None
+
+    def find(self, symbol, timeframe):
+        """Session ids of live tests running on symbol/timeframe"""
+        with self._lock:
+            return [session_id for session_id, live_test in self._sessions.items()
+                    if live_test['symbol'] == symbol and live_test['timeframe'] == timeframe]
+
+    def sessions(self):
+        """(session_id, symbol, timeframe) of every live test"""
+        with self._lock:
+            return [(session_id, live_test['symbol'], live_test['timeframe'])
+                    for session_id, live_test in self._sessions.items()]
+
+
+class SqliteLiveTestStore:
+    """Live test sessions in a SQLite database in WAL mode, shared by every worker process.
+
+    Updates are optimistic: apply() runs on a copy outside of any transaction
+    (it may fetch candles over REST), and the result is only written if no
+    other worker updated the session in the meantime, otherwise it is retried.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        # Schema is created on a throwaway connection so nothing is inherited by forked workers
+        connection = self._connect()
+        try:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('''
+                CREATE TABLE IF NOT EXISTS live_tests (
+                    session_id TEXT PRIMARY KEY,
+                    symbol TEXT NOT NULL,
+                    timeframe TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    state BLOB NOT NULL,
+                    updated REAL NOT NULL
+                )''')
+            connection.execute('CREATE INDEX IF NOT EXISTS live_tests_stream ON live_tests (symbol, timeframe)')
+        finally:
+            connection.close()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def _connection(self):
+        # One connection per thread and process
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            self._local.connection = self._connect()
+            self._local.pid = pid
+        return self._local.connection
+
+    def create(self, live_test):
+        session_id = new_session_id()
+        self._connection().execute(
+            'INSERT INTO live_tests (session_id, symbol, timeframe, version, state, updated) VALUES (?, ?, ?, 0, ?, ?)',
+            (session_id, live_test['symbol'], live_test['timeframe'], pickle.dumps(live_test), time.time()))
+        return session_id
+
+    def _load(self, session_id):
+        row = self._connection().execute(
+            'SELECT version, state FROM live_tests WHERE session_id = ?', (session_id,)).fetchone()
+        if row is None:
+            return None, None
+        return row[0], pickle.loads(row[1])
+
+    def get(self, session_id):
+        return self._load(session_id)[1]
+
+    def update(self, session_id, apply):
+        for _ in range(MAX_UPDATE_RETRIES):
+            version, live_test = self._load(session_id)
+            if live_test is None:
+                raise LiveTestNotFound(session_id)
+            result = apply(live_test)
+            cursor = self._connection().execute(
+                'UPDATE live_tests SET version = ?, state = ?, updated = ? WHERE session_id = ? AND version = ?',
+                (version + 1, pickle.dumps(live_test), time.time(), session_id, version))
+            if cursor.rowcount == 1:
+                return result
+        raise RuntimeError(f"Live test {session_id} is being updated concurrently, try again")
+
+    def delete(self, session_id):
+        cursor = self._connection().execute('DELETE FROM live_tests WHERE session_id = ?', (session_id,))
+        return cursor.rowcount == 1
+
+    def find(self, symbol, timeframe):
+        rows = self._connection().execute(
+            'SELECT session_id FROM live_tests WHERE symbol = ? AND timeframe = ?', (symbol, timeframe)).fetchall()
+        return [row[0] for row in rows]
+
+    def sessions(self):
+        return self._connection().execute('SELECT session_id, symbol, timeframe FROM live_tests').fetchall()
+
+
+def create_live_test_store():
+    """Store selected by LIVE_TEST_STORE: 'memory' (default) or 'sqlite' at LIVE_TEST_DB"""
+    kind = os.getenv('LIVE_TEST_STORE', 'memory')
+    if kind == 'memory':
+        return MemoryLiveTestStore()
+    if kind == 'sqlite':
+        default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'live_tests.sqlite3')
+        return SqliteLiveTestStore(os.getenv('LIVE_TEST_DB', default_path))
+    raise ValueError(f"Unknown LIVE_TEST_STORE: {kind}")
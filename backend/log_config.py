@@ -0,0 +1,44 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+_listener = None
+_listener_pid = None
+
+
+def configure_logging(level=None):
+    """Send every log record through a queue to a stdout handler running on its own thread.
+
+    LOG_LEVEL sets the root level (INFO by default) and LOG_LEVELS overrides
+    single subsystems, e.g. LOG_LEVELS="backtest=DEBUG,livetest=WARNING".
+    Called again in a forked worker it starts that process's own listener.
+    """
+    global _listener, _listener_pid
+    if _listener is not None and _listener_pid == os.getpid():
+        return
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    _listener_pid = os.getpid()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel((level or os.getenv('LOG_LEVEL', 'INFO')).upper())
+
+    for item in os.getenv('LOG_LEVELS', '').split(','):
+        if '=' in item:
+            name, subsystem_level = item.split('=', 1)
+            logging.getLogger(name.strip()).setLevel(subsystem_level.strip().upper())
+
+    # Connection pool chatter of the Binance client is only useful when asked for explicitly
+    if root.level < logging.INFO and 'urllib3' not in os.getenv('LOG_LEVELS', ''):
+        logging.getLogger('urllib3').setLevel(logging.INFO)
@@ -0,0 +1,227 @@
+import bisect
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+PROFILE_INTERVAL = 0.005
+PROFILE_TOP = 30
+
+
+def _label_text(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+
+class MetricsRegistry:
+    """Process-wide counters, histograms and gauges rendered in the Prometheus text format"""
+
+    def __init__(self, prefix='trading'):
+        self.prefix = prefix
+        self._help = {}
+        self._counters = {}
+        self._histograms = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def _name(self, name, help_text, kind):
+        full_name = f"{self.prefix}_{name}"
+        self._help.setdefault(full_name, (help_text, kind))
+        return full_name
+
+    def inc(self, name, value=1, help_text='', **labels):
+        key = (self._name(name, help_text, 'counter'), tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, help_text='', buckets=DURATION_BUCKETS, **labels):
+        key = (self._name(name, help_text, 'histogram'), tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {'buckets': buckets, 'counts': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+            index = bisect.bisect_left(histogram['buckets'], value)
+            if index < len(histogram['counts']):
+                histogram['counts'][index] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def gauge(self, name, read, help_text=''):
+        """Register read() as a gauge, evaluated on every render"""
+        self._gauges[self._name(name, help_text, 'gauge')] = read
+
+    def render(self):
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, dict(value, counts=list(value['counts']))) for key, value in self._histograms.items())
+
+        def header(name):
+            help_text, kind = self._help[name]
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        last = None
+        for (name, labels), value in counters:
+            if name != last:
+                header(name)
+                last = name
+            lines.append(f"{name}{_label_text(labels)} {value}")
+
+        for (name, labels), histogram in histograms:
+            if name != last:
+                header(name)
+                last = name
+            cumulative = 0
+            for bound, count in zip(histogram['buckets'], histogram['counts']):
+                cumulative += count
+                lines.append(f"{name}_bucket{_label_text(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_bucket{_label_text(labels + (('le', '+Inf'),))} {histogram['count']}")
+            lines.append(f"{name}_sum{_label_text(labels)} {histogram['sum']}")
+            lines.append(f"{name}_count{_label_text(labels)} {histogram['count']}")
+
+        for name, read in sorted(self._gauges.items()):
+            header(name)
+            try:
+                lines.append(f"{name} {read()}")
+            except Exception:
+                lines.append(f"{name} NaN")
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+_local = threading.local()
+
+
+class RequestTrace:
+    """Stage timings and counters of one request (or background job)"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.counters = Counter()
+
+    def summary(self):
+        total = time.perf_counter() - self.started
+        timings = {
+            'total_ms': round(total * 1000, 3),
+            'stages_ms': {stage: round(seconds * 1000, 3) for stage, seconds in self.stages.items()},
+            'counters': dict(self.counters)
+        }
+        simulate = self.stages.get('simulate')
+        if simulate and self.counters.get('backtest_bars'):
+            timings['bars_per_sec'] = round(self.counters['backtest_bars'] / simulate, 1)
+        return timings
+
+    def server_timing(self):
+        """Server-Timing header value, shown per request in the browser's network panel"""
+        return ', '.join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.stages.items())
+
+
+def current_trace():
+    return getattr(_local, 'trace', None)
+
+
+def begin_trace():
+    """Make a new trace current for the calling thread"""
+    trace = _local.trace = RequestTrace()
+    return trace
+
+
+def end_trace():
+    _local.trace = None
+
+
+@contextmanager
+def request_trace():
+    """Trace the enclosed block, restoring the previous trace afterwards"""
+    previous = current_trace()
+    trace = begin_trace()
+    try:
+        yield trace
+    finally:
+        _local.trace = previous
+
+
+@contextmanager
+def stage(name):
+    """Time a pipeline stage into the stage histogram and the current trace"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        registry.observe('stage_duration_seconds', elapsed, 'Time spent per pipeline stage', stage=name)
+        trace = current_trace()
+        if trace is not None:
+            trace.stages[name] = trace.stages.get(name, 0.0) + elapsed
+
+
+def count(name, value=1, help_text=''):
+    """Add to the process counter trading_<name>_total and to the current trace"""
+    registry.inc(f"{name}_total", value, help_text)
+    trace = current_trace()
+    if trace is not None:
+        trace.counters[name] += value
+
+
+class SamplingProfiler:
+    """Samples one thread's stack every interval from a helper thread.
+
+    Cheap enough to switch on for a single slow request: the profiled code runs
+    untouched and only pays for the GIL hand-offs of the sampling thread.
+    """
+
+    def __init__(self, thread_id=None, interval=PROFILE_INTERVAL):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.samples = 0
+        self.own = Counter()
+        self.total = Counter()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            seen = set()
+            own = True
+            while frame is not None:
+                code = frame.f_code
+                key = f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno}({code.co_name})"
+                if own:
+                    self.own[key] += 1
+                    own = False
+                if key not in seen:
+                    self.total[key] += 1
+                    seen.add(key)
+                frame = frame.f_back
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        return self
+
+    def report(self, top=PROFILE_TOP):
+        def rows(counter):
+            return [{'frame': key, 'samples': samples, 'percent': round(samples / self.samples * 100, 1)}
+                    for key, samples in counter.most_common(top)]
+
+        return {
+            'samples': self.samples,
+            'interval_ms': self.interval * 1000,
+            'self': rows(self.own) if self.samples else [],
+            'cumulative': rows(self.total) if self.samples else []
+        }
@@ -0,0 +1,207 @@
+import itertools
+
+import numpy as np
+
+from backtest_engine import INITIAL_BALANCE, resolve_trades, trade_stats
+from indicators import bollinger_bands, ema_matrix, macd_lines, rsi_column, rsi_matrix, rsi_period, sma_matrix
+from indicator_cache import candle_fingerprint, indicator_cache
+from signal_plan import SignalPlan, mirror_sell_indicators
+
+MAX_COMBINATIONS = 50000
+SORT_KEYS = ('profit', 'trades', 'winRate')
+SIDES = {'buy', 'sell'}
+
+
+def expand_values(spec):
+    """Grid values from a list or an inclusive {"start", "stop", "step"} range"""
+    if isinstance(spec, dict):
+        start, stop, step = spec['start'], spec['stop'], spec.get('step', 1)
+        if step <= 0:
+            raise ValueError(f"Grid step must be positive: {spec}")
+        values = []
+        value = start
+        while value <= stop + step * 1e-9:
+            values.append(round(value, 10) if isinstance(value, float) else value)
+            value += step
+        return values
+    if isinstance(spec, list) and spec:
+        return spec
+    raise ValueError(f"Grid entry must be a non-empty list or a start/stop/step range: {spec}")
+
+
+def parse_grid(grid):
+    """Turn {"buy.rsi.value": [...], ...} into [(side, indicator, field, values), ...]"""
+    axes = []
+    for key, spec in grid.items():
+        parts = key.split('.')
+        if len(parts) != 3 or parts[0] not in SIDES:
+            raise ValueError(f"Grid key must look like 'buy.rsi.value' or 'sell.macd.values': {key}")
+        side, indicator, field = parts
+        axes.append((side, indicator, field, expand_values(spec)))
+    return axes
+
+
+def grid_combinations(buy_indicators, sell_indicators, axes):
+    """Yield (params, buy_config, sell_config) for every point of the grid.
+
+    Sell configs are mirrored from the buy side exactly like a normal backtest,
+    so only RSI has independent buy/sell values.
+    """
+    for point in itertools.product(*(values for _, _, _, values in axes)):
+        # Fields are only ever replaced, never changed in place, so copying the config dicts is enough
+        buy = {indicator: dict(config) for indicator, config in buy_indicators.items()}
+        sell = {indicator: dict(config) for indicator, config in sell_indicators.items()}
+        params = {}
+        for (side, indicator, field, _), value in zip(axes, point):
+            configs = buy if side == 'buy' else sell
+            config = configs.setdefault(indicator, {'active': True})
+            config['active'] = True
+            config[field] = value
+            params[f"{side}.{indicator}.{field}"] = value
+        mirror_sell_indicators(buy, sell)
+        yield params, buy, sell
+
+
+def grid_configs(buy_indicators, sell_indicators, axes):
+    """(indicator, config) pairs covering every indicator period a grid uses, without expanding the grid"""
+    configs = [(indicator, config) for indicators in (buy_indicators, sell_indicators)
+               for indicator, config in indicators.items()]
+    for side, indicator, field, values in axes:
+        base = (buy_indicators if side == 'buy' else sell_indicators).get(indicator, {})
+        configs += [(indicator, {**base, 'active': True, field: value}) for value in values]
+    return configs
+
+
+class SeriesCache:
+    """Computes every distinct indicator series and signal condition of a grid only once"""
+
+    def __init__(self, df):
+        self.close = df['Close'].to_numpy()
+        self.fingerprint = candle_fingerprint(self.close)
+        self.series = {}
+        self.plans = {}
+        self.conditions = {}
+
+    def _get(self, key, compute):
+        # Shared with calculate_dynamic_indicators through the process-wide indicator cache
+        if key not in self.series:
+            self.series[key] = indicator_cache.get(self.fingerprint, key, compute)
+        return self.series[key]
+
+    def prefetch(self, configs):
+        """Compute the SMA, EMA and RSI periods of many (indicator, config) pairs with one kernel call each"""
+        periods = {'sma': set(), 'ema': set(), 'rsi': set()}
+        for indicator, config in configs:
+            if indicator in periods and config.get('active'):
+                periods[indicator].add(rsi_period(config) if indicator == 'rsi' else int(config['value']))
+        for name, kernel in (('sma', sma_matrix), ('ema', ema_matrix), ('rsi', rsi_matrix)):
+            keys = [(name, period) for period in sorted(periods[name]) if (name, period) not in self.series]
+            if keys:
+                rows = indicator_cache.get_many(self.fingerprint, keys,
+                                                lambda missing: kernel(self.close, [key[1] for key in missing]))
+                self.series.update(zip(keys, rows))
+
+    def columns_for(self, indicator, config):
+        """Columns of one indicator config, named like calculate_dynamic_indicators"""
+        close = self.close
+        columns = {'Close': self.close}
+        if indicator == 'rsi':
+            period = rsi_period(config)
+            columns[rsi_column(period)] = self._get(('rsi', period), lambda: rsi_matrix(close, [period])[0])
+        elif indicator == 'sma':
+            period = int(config['value'])
+            columns[f"SMA_{period}"] = self._get(('sma', period), lambda: sma_matrix(close, [period])[0])
+        elif indicator == 'ema':
+            length = int(config['value'])
+            columns[f"EMA_{length}"] = self._get(('ema', length), lambda: ema_matrix(close, [length])[0])
+        elif indicator == 'bollinger':
+            period = int(config.get('value', 20))
+            std_dev = float(config.get('std_dev', 2.0))
+            _, _, upper, lower = self._get(('bollinger', period, std_dev), lambda: bollinger_bands(close, period, std_dev))
+            columns['upper_band'] = upper
+            columns['lower_band'] = lower
+        elif indicator == 'macd':
+            fast, slow, signal = (int(v) for v in config['values'])
+            macd, macd_signal = self._get(('macd', fast, slow, signal), lambda: macd_lines(close, fast, slow, signal))
+            columns['MACD'] = macd
+            columns['MACD_signal'] = macd_signal
+        return columns
+
+    def plan_columns(self, plan):
+        """Every column a SignalPlan's rules read"""
+        columns = {'Close': self.close}
+        for indicators in (plan.buy_indicators, plan.sell_indicators):
+            for indicator, config in indicators.items():
+                if config['active']:
+                    columns.update(self.columns_for(indicator, config))
+        return columns
+
+    def rule_conditions(self, plan, side):
+        """Full history condition of every rule on the plan's side, None if the side never signals.
+
+        Each distinct rule is evaluated once and shared by every plan using it,
+        plans with a key remember their list.
+        """
+        if (plan.key, side) in self.plans:
+            return self.plans[plan.key, side]
+        columns = self.plan_columns(plan)
+        bound = plan.bind(side, columns)
+        conditions = None
+        if bound is not None:
+            conditions = []
+            for rule, left, right in bound:
+                # Operand arrays are kept in self.series, their ids name them for as long as the cache lives
+                key = (rule.compare, id(left), id(right) if rule.right is not None else right)
+                if key not in self.conditions:
+                    self.conditions[key] = rule.condition(columns)
+                conditions.append(self.conditions[key])
+        if plan.key is not None:
+            self.plans[plan.key, side] = conditions
+        return conditions
+
+    def condition(self, plan, side, lo=0, hi=None):
+        """plan.condition on bars [lo, hi) of the full history"""
+        conditions = self.rule_conditions(plan, side)
+        if conditions is None:
+            return np.zeros(len(self.close[lo:hi]), dtype=bool)
+        condition = conditions[0][lo:hi].copy()
+        for other in conditions[1:]:
+            condition &= other[lo:hi]
+        return condition
+
+
+def run_grid(df, buy_indicators, sell_indicators, grid, top=20, sort_by='profit'):
+    """Evaluate every grid combination on one candle DataFrame and return the ranked results"""
+    if sort_by not in SORT_KEYS:
+        raise ValueError(f"Unknown sort key: {sort_by}")
+    axes = parse_grid(grid)
+    total = 1
+    for _, _, _, values in axes:
+        total *= len(values)
+    if total > MAX_COMBINATIONS:
+        raise ValueError(f"Grid has {total} combinations, the limit is {MAX_COMBINATIONS}")
+
+    cache = SeriesCache(df)
+    cache.prefetch(grid_configs(buy_indicators, sell_indicators, axes))
+    initial_balance = INITIAL_BALANCE
+    results = []
+    for params, buy, sell in grid_combinations(buy_indicators, sell_indicators, axes):
+        # Every grid point is a distinct config, its plan skips the shared cache and the copies
+        plan = SignalPlan(None, buy, sell, copy=False)
+        buy_condition = cache.condition(plan, 'buy')
+        sell_condition = cache.condition(plan, 'sell')
+        balance, trades, wins = trade_stats(cache.close, resolve_trades(buy_condition, sell_condition), initial_balance)
+        results.append({
+            'params': params,
+            'profit': float(balance - initial_balance),
+            'trades': trades,
+            'winRate': round((wins / trades * 100) if trades > 0 else 0, 2)
+        })
+
+    results.sort(key=lambda r: r[sort_by], reverse=True)
+    return {
+        'success': True,
+        'combinations': total,
+        'series_computed': len(cache.series),
+        'results': results[:top] if top else results
+    }
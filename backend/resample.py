@@ -0,0 +1,117 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import metrics
+from candles import Candles
+from kline_fetcher import INTERVAL_MS
+
+MINUTE_MS = INTERVAL_MS['1m']
+# Intervals that tile a UTC day, their buckets line up with Binance's own candles.
+# 3d and 1w are anchored differently and keep being downloaded natively.
+RESAMPLED_INTERVALS = {interval: ms for interval, ms in INTERVAL_MS.items()
+                       if ms > MINUTE_MS and INTERVAL_MS['1d'] % ms == 0}
+# Most 1m candles a roll-up may download (3 days), beyond that the target interval is cheaper to download itself
+RESAMPLE_MAX_MINUTES = int(os.getenv('RESAMPLE_MAX_MINUTES', 3 * 24 * 60))
+ROLLUP_CACHE_ENTRIES = int(os.getenv('ROLLUP_CACHE_ENTRIES', 32))
+
+
+def rollup(minutes, interval_ms):
+    """Aggregate sorted 1m Candles into interval_ms candles (open first, high max, low min, close last, volume sum)"""
+    if len(minutes) == 0:
+        return Candles.empty(minutes.ohlcv.dtype)
+    buckets = minutes.open_time // interval_ms * interval_ms
+    starts = np.flatnonzero(np.diff(buckets)) + 1
+    starts = np.concatenate(([0], starts))
+    ends = np.append(starts[1:], len(buckets)) - 1
+
+    ohlcv = np.empty((5, len(starts)), dtype=minutes.ohlcv.dtype)
+    ohlcv[0] = minutes.open[starts]
+    ohlcv[1] = np.maximum.reduceat(minutes.high, starts)
+    ohlcv[2] = np.minimum.reduceat(minutes.low, starts)
+    ohlcv[3] = minutes.close[ends]
+    ohlcv[4] = np.add.reduceat(minutes.volume, starts)
+    return Candles(buckets[starts], ohlcv)
+
+
+class RollupCache:
+    """Complete rolled-up candles per (symbol, interval), extended as new minutes arrive.
+
+    Only buckets followed by at least one later minute are kept, so cached
+    candles are final and the still-forming bucket is always rolled afresh.
+    A request overlapping the cached range only aggregates the minutes
+    outside it. Buckets cut by the request's first or last minute are rolled
+    from the minutes given, so a hit returns the same candles as a miss.
+    """
+
+    def __init__(self, max_entries=ROLLUP_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, symbol, interval, minutes):
+        """Rollup of minutes, the same candles rollup(minutes) returns, with complete buckets served from the cache"""
+        interval_ms = RESAMPLED_INTERVALS[interval]
+        key = (symbol, interval)
+        if len(minutes) == 0:
+            return Candles.empty(minutes.ohlcv.dtype)
+        first_minute = int(minutes.open_time[0])
+        last_minute = int(minutes.open_time[-1])
+        # Cached buckets are only used where the minutes cover them whole, a
+        # bucket cut by the first or last minute is rolled from the minutes given
+        head_start = -(-first_minute // interval_ms) * interval_ms
+        last_bucket = last_minute // interval_ms * interval_ms
+
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+
+        cached_end = int(cached.open_time[-1]) + interval_ms if cached is not None else None
+        head_end = min(cached_end, last_bucket) if cached is not None else None
+        if cached is not None and cached.open_time[0] <= head_start < head_end:
+            with self._lock:
+                self.hits += 1
+            metrics.count('rollup_cache_hits', help_text='Resampled requests that reused cached rollups')
+            parts = (rollup(minutes.between(first_minute, head_start - 1), interval_ms),
+                     cached.between(head_start, head_end - 1),
+                     rollup(minutes.between(head_end, last_minute), interval_ms))
+            rolled = Candles(np.concatenate([part.open_time for part in parts]),
+                             np.concatenate([part.ohlcv for part in parts], axis=1))
+        else:
+            with self._lock:
+                self.misses += 1
+            rolled = rollup(minutes, interval_ms)
+
+        # A bucket is final once a later minute exists, and whole only if its first minute was included
+        complete = rolled.select((rolled.open_time >= minutes.open_time[0]) &
+                                 (rolled.open_time + interval_ms <= minutes.open_time[-1]))
+        if len(complete) and (cached_end is None or complete.open_time[-1] >= cached_end):
+            if cached_end is not None and cached.open_time[0] < complete.open_time[0] <= cached_end:
+                complete = cached.merge(complete)
+            with self._lock:
+                self._entries[key] = complete
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return rolled
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'candles': sum(len(candles) for candles in self._entries.values()),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+rollup_cache = RollupCache()
@@ -0,0 +1,255 @@
+from copy import deepcopy
+import hashlib
+import json
+import logging
+import operator
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import metrics
+from indicators import rsi_column, rsi_period
+
+logger = logging.getLogger('signals')
+
+SIGNAL_PLAN_CACHE_ENTRIES = int(os.getenv('SIGNAL_PLAN_CACHE_ENTRIES', 256))
+
+
+def request_key(data):
+    """Stable hash of a backtest request or its indicator configs, identical ones get the same key"""
+    canonical = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
+def mirror_sell_indicators(buy_indicators, sell_indicators):
+    """Copy active buy indicator settings to the sell side (RSI keeps its own sell threshold)"""
+    for indicator, config in buy_indicators.items():
+        if config['active']:
+            # RSI için özel durum
+            if indicator == 'rsi' and 'rsi' in sell_indicators:
+                continue  # RSI zaten ayarlanmış, değiştirme
+
+            # Diğer göstergeler için satış ayarlarını kopyala
+            sell_indicators[indicator] = config.copy()
+            sell_indicators[indicator]['active'] = True
+
+            # Göstergeye özel değerleri ayarla
+            if indicator == 'bollinger':
+                sell_indicators[indicator]['value'] = config['value']
+                sell_indicators[indicator]['std_dev'] = config['std_dev']
+            elif indicator == 'macd':
+                sell_indicators[indicator]['values'] = config['values'].copy()
+            else:
+                sell_indicators[indicator]['value'] = config['value']
+
+    # Bollinger Bands için satış indikatörünü otomatik olarak ekle
+    if 'bollinger' in buy_indicators and buy_indicators['bollinger']['active']:
+        if 'bollinger' not in sell_indicators:
+            sell_indicators['bollinger'] = buy_indicators['bollinger'].copy()
+        sell_indicators['bollinger']['active'] = True
+        sell_indicators['bollinger']['value'] = buy_indicators['bollinger']['value']
+        sell_indicators['bollinger']['std_dev'] = buy_indicators['bollinger']['std_dev']
+
+    # EMA göstergesi için satış sinyallerini otomatik olarak ayarla
+    if 'ema' in buy_indicators and buy_indicators['ema']['active']:
+        if 'ema' not in sell_indicators:
+            sell_indicators['ema'] = buy_indicators['ema'].copy()
+        sell_indicators['ema']['active'] = True
+        sell_indicators['ema']['value'] = buy_indicators['ema']['value']
+
+    # MACD göstergesi için satış sinyallerini otomatik olarak ayarla
+    if 'macd' in buy_indicators and buy_indicators['macd']['active']:
+        if 'macd' not in sell_indicators:
+            sell_indicators['macd'] = buy_indicators['macd'].copy()
+        sell_indicators['macd']['active'] = True
+        sell_indicators['macd']['values'] = buy_indicators['macd']['values']
+
+    # SMA göstergesi için satış sinyallerini otomatik olarak ayarla
+    if 'sma' in buy_indicators and buy_indicators['sma']['active']:
+        if 'sma' not in sell_indicators:
+            sell_indicators['sma'] = buy_indicators['sma'].copy()
+        sell_indicators['sma']['active'] = True
+        sell_indicators['sma']['value'] = buy_indicators['sma']['value']
+
+    return sell_indicators
+
+
+class SignalRule:
+    """One indicator signal, left compare right where right is a column or a fixed threshold.
+
+    label is the name describe_signals formats, report_names key the two
+    operands in a live test's indicator values and extra holds the config
+    values reported next to them.
+    """
+
+    __slots__ = ('indicator', 'label', 'left', 'right', 'threshold', 'compare', 'report_names', 'extra')
+
+    def __init__(self, indicator, label, left, right, compare, report_names, threshold=None, extra=None):
+        self.indicator = indicator
+        self.label = label
+        self.left = left
+        self.right = right
+        self.threshold = threshold
+        self.compare = compare
+        self.report_names = report_names
+        self.extra = extra or {}
+
+    @property
+    def columns(self):
+        return (self.left,) if self.right is None else (self.left, self.right)
+
+    def operands(self, values):
+        """(left, right) taken from column arrays or a single row"""
+        return values[self.left], (self.threshold if self.right is None else values[self.right])
+
+    def condition(self, columns):
+        # Comparisons against NaN are False, same as the per-bar loop during warm-up
+        with np.errstate(invalid='ignore'):
+            return self.compare(*self.operands(columns))
+
+    def report(self, row):
+        left, right = self.operands(row)
+        return {
+            self.report_names[0]: float(left),
+            self.report_names[1]: right if self.right is None else float(right),
+            **self.extra
+        }
+
+
+def indicator_rule(side, indicator, config):
+    """Compile one indicator config into a SignalRule, None for indicators that never signal"""
+    buy = side == 'buy'
+    if indicator == 'rsi':
+        return SignalRule('rsi', 'RSI', rsi_column(rsi_period(config)), None, operator.le if buy else operator.ge,
+                          ('value', 'threshold'), threshold=config['value'])
+    if indicator == 'macd':
+        return SignalRule('macd', 'MACD', 'MACD', 'MACD_signal', operator.gt if buy else operator.lt, ('macd', 'signal'))
+    if indicator == 'bollinger':
+        band = 'lower' if buy else 'upper'
+        return SignalRule('bollinger', 'Bollinger', 'Close', f'{band}_band', operator.le if buy else operator.ge,
+                          ('price', band))
+    if indicator in ('sma', 'ema'):
+        # Named like the columns calculate_dynamic_indicators and IndicatorState produce
+        label = indicator.upper()
+        return SignalRule(indicator, label, 'Close', f"{label}_{int(config['value'])}", operator.gt if buy else operator.lt,
+                          ('price', indicator), extra={'period': config['value']})
+    return None
+
+
+class SignalPlan:
+    """Buy and sell indicator configs compiled once into rule tuples.
+
+    Sell configs are mirrored from the buy side at compile time, on copies
+    kept as buy_indicators/sell_indicators (copy=False takes over configs
+    nobody else holds, like the optimizer's grid points).
+    A side signals when all of its rules hold, and never when it has no active
+    indicator or an active one without a rule. condition() evaluates a side
+    over column arrays, signal() over a single row, and bind() with holds_at()
+    serves per-bar loops without any dict or string work per bar. Plans are
+    shared between requests and must not be modified.
+    """
+
+    def __init__(self, key, buy_indicators, sell_indicators, copy=True):
+        self.key = key
+        self.buy_indicators = deepcopy(buy_indicators) if copy else buy_indicators
+        self.sell_indicators = mirror_sell_indicators(self.buy_indicators, deepcopy(sell_indicators) if copy else sell_indicators)
+        self.rules = {}
+        self.enabled = {}
+        for side, indicators in (('buy', self.buy_indicators), ('sell', self.sell_indicators)):
+            rules = [indicator_rule(side, indicator, config) for indicator, config in indicators.items() if config['active']]
+            self.rules[side] = tuple(rule for rule in rules if rule is not None)
+            self.enabled[side] = bool(rules) and None not in rules
+        self.columns = frozenset(name for rules in self.rules.values() for rule in rules for name in rule.columns)
+
+    def bind(self, side, values):
+        """[(rule, left, right), ...] over column arrays or a row, None if the side can't signal on them"""
+        if not self.enabled[side]:
+            return None
+        bound = []
+        for rule in self.rules[side]:
+            for name in rule.columns:
+                if name not in values:
+                    logger.warning("Column %s not found, no %s signals", name, side)
+                    return None
+            bound.append((rule,) + rule.operands(values))
+        return bound
+
+    def condition(self, side, columns):
+        """Boolean array that is True on every bar where the side signals"""
+        if self.bind(side, columns) is None:
+            return np.zeros(len(columns['Close']), dtype=bool)
+        condition = self.rules[side][0].condition(columns)
+        for rule in self.rules[side][1:]:
+            condition &= rule.condition(columns)
+        return condition
+
+    def signal(self, side, row):
+        """Whether the side signals on one row of indicator values"""
+        bound = self.bind(side, row)
+        return bound is not None and all(rule.compare(left, right) for rule, left, right in bound)
+
+    def report(self, side, row):
+        """Indicator values of the side's rules on one row, keyed by indicator"""
+        return {rule.indicator: rule.report(row) for rule in self.rules[side]
+                if all(name in row for name in rule.columns)}
+
+
+def holds_at(bound, i):
+    """True if every rule of a bind() over column arrays holds on bar i"""
+    if bound is None:
+        return False
+    for rule, left, right in bound:
+        if not rule.compare(left[i], right if rule.right is None else right[i]):
+            return False
+    return True
+
+
+def signals_at(bound, i):
+    """(label, left, right) of every bound rule on bar i, as describe_signals formats them"""
+    return [(rule.label, left[i], right if rule.right is None else right[i]) for rule, left, right in bound]
+
+
+class SignalPlanCache:
+    """Compiled plans by config hash, identical configs share one plan"""
+
+    def __init__(self, max_entries=SIGNAL_PLAN_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, buy_indicators, sell_indicators):
+        key = request_key({'buy': buy_indicators, 'sell': sell_indicators})
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                self.hits += 1
+                return plan
+            self.misses += 1
+        metrics.count('signal_plans_compiled', help_text='Indicator configs compiled into signal plans')
+        plan = SignalPlan(key, buy_indicators, sell_indicators)
+        with self._lock:
+            self._plans[key] = plan
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+        return plan
+
+    def clear(self):
+        with self._lock:
+            self._plans.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._plans), 'hits': self.hits, 'misses': self.misses}
+
+
+signal_plans = SignalPlanCache()
+
+
+def compile_plan(buy_indicators, sell_indicators):
+    """SignalPlan for a buyIndicators/sellIndicators payload, compiled once per distinct config"""
+    return signal_plans.get(buy_indicators, sell_indicators)
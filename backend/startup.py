@@ -0,0 +1,56 @@
+import importlib
+import logging
+import sys
+import threading
+import time
+
+logger = logging.getLogger('startup')
+
+# Imported on first use instead of at startup, together they take most of a cold start
+DEFERRED_MODULES = ('pandas', 'binance.client')
+
+
+class ImportWarmUp:
+    """Imports the deferred libraries on a background thread.
+
+    Started by the first request, so a new worker answers health checks right
+    away and its first backtest usually finds the libraries already loaded.
+    A request that needs one earlier simply waits for the import, Python's
+    import lock makes the two safe to race.
+    """
+
+    def __init__(self, modules=DEFERRED_MODULES):
+        self.modules = modules
+        self.state = 'pending'
+        self.seconds = None
+        self.error = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self.state != 'pending':
+                return
+            self.state = 'running'
+        threading.Thread(target=self._run, name='import-warm-up', daemon=True).start()
+
+    def _run(self):
+        started = time.perf_counter()
+        try:
+            for name in self.modules:
+                importlib.import_module(name)
+            state = 'done'
+        except Exception as e:
+            logger.warning("Warming up imports failed: %s", e)
+            self.error = str(e)
+            state = 'failed'
+        self.seconds = round(time.perf_counter() - started, 3)
+        self.state = state
+        logger.info("Deferred imports %s in %.2fs", state, self.seconds)
+
+    def status(self):
+        return {
+            'state': self.state,
+            'seconds': self.seconds,
+            'error': self.error,
+            'loaded': {name: name in sys.modules for name in self.modules}
+        }
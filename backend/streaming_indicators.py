@@ -0,0 +1,286 @@
+import math
+from collections import deque
+
+import numpy as np
+
+from indicators import RSI_PERIOD, rsi_column, rsi_period
+
+NAN = float('nan')
+
+
+class RsiKernel:
+    """RSI with 1/period smoothing of gains and losses, same formula as indicators.rsi_matrix"""
+
+    def __init__(self, period=RSI_PERIOD):
+        self.period = period
+        self.column = rsi_column(period)
+        self.decay = 1.0 - 1.0 / period
+        self.prev_close = None
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+        self.weight = 0.0
+        self.observations = 0
+
+    def _next(self, close):
+        if self.prev_close is None:
+            return None
+        change = close - self.prev_close
+        gain_sum = self.gain_sum * self.decay + max(change, 0.0)
+        loss_sum = self.loss_sum * self.decay + max(-change, 0.0)
+        weight = self.weight * self.decay + 1.0
+        return gain_sum, loss_sum, weight, self.observations + 1
+
+    def _value(self, gain_sum, loss_sum, weight, observations):
+        if observations < self.period or gain_sum + loss_sum == 0:
+            return NAN
+        avg_gain = gain_sum / weight
+        avg_loss = loss_sum / weight
+        return 100 * avg_gain / (avg_gain + avg_loss)
+
+    def update(self, close):
+        state = self._next(close)
+        self.prev_close = close
+        if state is None:
+            return {self.column: NAN}
+        self.gain_sum, self.loss_sum, self.weight, self.observations = state
+        return {self.column: self._value(*state)}
+
+    def peek(self, close):
+        state = self._next(close)
+        return {self.column: NAN if state is None else self._value(*state)}
+
+
+def _repeated(window, repeated, close):
+    """Closes in a row equal to close once it is appended to window"""
+    return repeated + 1 if window and window[-1] == close else 1
+
+
+def _appended(window, close, period):
+    """The last `period` closes once close is appended to window"""
+    return (list(window) + [close])[-period:]
+
+
+class SmaKernel:
+    """Rolling mean kept as a running sum over the last `period` closes.
+
+    Like indicators.sma_matrix, a window of one repeated close is that close
+    exactly. The sum is taken again from the window every `period` updates,
+    so rounding of the running sum never builds up.
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self.column = f'SMA_{period}'
+        self.window = deque()
+        self.total = 0.0
+        self.repeated = 0
+        self.updates = 0
+
+    def _value(self, total, count, close, repeated):
+        if count < self.period:
+            return NAN
+        return close if repeated >= self.period else total / self.period
+
+    def update(self, close):
+        self.repeated = _repeated(self.window, self.repeated, close)
+        self.window.append(close)
+        self.total += close
+        if len(self.window) > self.period:
+            self.total -= self.window.popleft()
+        self.updates += 1
+        if self.updates % self.period == 0:
+            self.total = sum(self.window)
+        return {self.column: self._value(self.total, len(self.window), close, self.repeated)}
+
+    def peek(self, close):
+        total = self.total + close
+        count = len(self.window) + 1
+        if count > self.period:
+            total -= self.window[0]
+            count -= 1
+        if (self.updates + 1) % self.period == 0:
+            total = sum(_appended(self.window, close, self.period))
+        return {self.column: self._value(total, count, close, _repeated(self.window, self.repeated, close))}
+
+
+class EmaKernel:
+    """EMA seeded with the SMA of the first `length` closes, like indicators.ema_series"""
+
+    def __init__(self, length):
+        self.length = length
+        self.column = f'EMA_{length}'
+        self.alpha = 2.0 / (length + 1)
+        self.count = 0
+        self.seed_sum = 0.0
+        self.value = NAN
+
+    def _next(self, close):
+        count = self.count + 1
+        if count < self.length:
+            return count, self.seed_sum + close, NAN
+        if count == self.length:
+            return count, self.seed_sum, (self.seed_sum + close) / self.length
+        return count, self.seed_sum, self.alpha * close + (1 - self.alpha) * self.value
+
+    def update(self, close):
+        self.count, self.seed_sum, self.value = self._next(close)
+        return {self.column: self.value}
+
+    def peek(self, close):
+        return {self.column: self._next(close)[2]}
+
+
+class BollingerKernel:
+    """Rolling mean and sample std via Welford's update over a sliding window.
+
+    Like indicators.rolling_mean_std, a window of one repeated close has that
+    close as its mean and a std of exactly 0. Mean and squared deviations are
+    taken again from the window every `period` updates, the sliding update
+    drifts otherwise.
+    """
+
+    def __init__(self, period, std_dev):
+        self.period = period
+        self.std_dev = std_dev
+        self.window = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.repeated = 0
+        self.updates = 0
+
+    def _next(self, close):
+        repeated = _repeated(self.window, self.repeated, close)
+        count = len(self.window)
+        if count < self.period:
+            count += 1
+            delta = close - self.mean
+            mean = self.mean + delta / count
+            m2 = self.m2 + delta * (close - mean)
+        else:
+            old = self.window[0]
+            mean = self.mean + (close - old) / count
+            m2 = self.m2 + (close - old) * (close - mean + old - self.mean)
+        if repeated >= self.period:
+            mean, m2 = close, 0.0
+        return mean, m2, count, repeated
+
+    @staticmethod
+    def _resum(window):
+        mean = sum(window) / len(window)
+        return mean, sum((value - mean) ** 2 for value in window)
+
+    def _bands(self, mean, m2, count):
+        if count < self.period:
+            return {'middle_band': NAN, 'std': NAN, 'upper_band': NAN, 'lower_band': NAN}
+        std = math.sqrt(max(m2, 0.0) / (count - 1)) if count > 1 else NAN
+        return {
+            'middle_band': mean,
+            'std': std,
+            'upper_band': mean + std * self.std_dev,
+            'lower_band': mean - std * self.std_dev
+        }
+
+    def update(self, close):
+        self.mean, self.m2, count, self.repeated = self._next(close)
+        self.window.append(close)
+        if len(self.window) > self.period:
+            self.window.popleft()
+        self.updates += 1
+        if self.updates % self.period == 0 and self.repeated < self.period:
+            self.mean, self.m2 = self._resum(self.window)
+        return self._bands(self.mean, self.m2, count)
+
+    def peek(self, close):
+        mean, m2, count, repeated = self._next(close)
+        if (self.updates + 1) % self.period == 0 and repeated < self.period:
+            mean, m2 = self._resum(_appended(self.window, close, self.period))
+        return self._bands(mean, m2, count)
+
+
+class MacdKernel:
+    """MACD line and signal line from unadjusted EWMs started at the first close"""
+
+    def __init__(self, fast, slow, signal):
+        self.alphas = (2.0 / (fast + 1), 2.0 / (slow + 1), 2.0 / (signal + 1))
+        self.fast_ema = None
+        self.slow_ema = None
+        self.signal_ema = None
+
+    def _next(self, close):
+        fast_alpha, slow_alpha, signal_alpha = self.alphas
+        if self.fast_ema is None:
+            return close, close, 0.0
+        fast_ema = fast_alpha * close + (1 - fast_alpha) * self.fast_ema
+        slow_ema = slow_alpha * close + (1 - slow_alpha) * self.slow_ema
+        macd = fast_ema - slow_ema
+        return fast_ema, slow_ema, signal_alpha * macd + (1 - signal_alpha) * self.signal_ema
+
+    def update(self, close):
+        self.fast_ema, self.slow_ema, self.signal_ema = self._next(close)
+        return {'MACD': self.fast_ema - self.slow_ema, 'MACD_signal': self.signal_ema}
+
+    def peek(self, close):
+        fast_ema, slow_ema, signal_ema = self._next(close)
+        return {'MACD': fast_ema - slow_ema, 'MACD_signal': signal_ema}
+
+
+class IndicatorState:
+    """Incremental version of calculate_dynamic_indicators for one live test.
+
+    update() consumes one closed candle, peek() returns the row the still-forming
+    candle would produce without changing the state. Rows use the same column
+    names as calculate_dynamic_indicators so a SignalPlan evaluates them
+    unchanged.
+    """
+
+    def __init__(self, buy_indicators, sell_indicators):
+        self.kernels = {}
+        all_indicators = [(key, config) for key, config in buy_indicators.items() if config['active']]
+        all_indicators += [(key, config) for key, config in sell_indicators.items() if config['active']]
+
+        for key, config in all_indicators:
+            if key == 'rsi' or config.get('name') == 'RSI':
+                period = rsi_period(config)
+                self.kernels[f'rsi_{period}'] = RsiKernel(period)
+            elif key == 'sma':
+                period = int(config['value'])
+                self.kernels[f'sma_{period}'] = SmaKernel(period)
+            elif key == 'ema':
+                length = int(config['value'])
+                self.kernels[f'ema_{length}'] = EmaKernel(length)
+            elif key == 'bollinger':
+                # Later configs overwrite the band columns, same as the batch calculation
+                self.kernels['bollinger'] = BollingerKernel(int(config.get('value', 20)), float(config.get('std_dev', 2.0)))
+            elif key == 'macd':
+                fast, slow, signal = (int(v) for v in config['values'])
+                self.kernels['macd'] = MacdKernel(fast, slow, signal)
+        self.candles = 0
+
+    def update(self, close):
+        close = float(close)
+        row = {'Close': close}
+        for kernel in self.kernels.values():
+            row.update(kernel.update(close))
+        self.candles += 1
+        return row
+
+    def columns(self, closes):
+        """update() over a run of closed candles, returned as column name -> array"""
+        closes = np.asarray(closes, dtype=np.float64)
+        columns = {'Close': closes}
+        for kernel in self.kernels.values():
+            rows = [kernel.update(close) for close in closes.tolist()]
+            for name in (rows[0] if rows else ()):
+                columns[name] = np.array([row[name] for row in rows], dtype=np.float64)
+        self.candles += len(closes)
+        return columns
+
+    def peek(self, close):
+        close = float(close)
+        row = {'Close': close}
+        for kernel in self.kernels.values():
+            row.update(kernel.peek(close))
+        return row
+
+    def __repr__(self):
+        return f"IndicatorState(kernels={list(self.kernels)}, candles={self.candles})"
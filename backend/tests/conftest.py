@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The backend modules import each other as top-level modules, like the app does when started from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('LIVE_SCHEDULER', '0')
+os.environ.setdefault('KLINE_STORE_DIR', '')
+os.environ.setdefault('WARM_UP_IMPORTS', '0')
+os.environ.setdefault('BINANCE_WEIGHT_STATE', '')
@@ -0,0 +1,87 @@
+"""Write pandas_ta_golden.npz, indicator values as the app computed them before the NumPy kernels.
+
+SMA, EMA and RSI come from the functions below, a line-for-line copy of
+pandas_ta 0.3.14b0's sma, ema and rsi (pandas_ta itself doesn't install
+next to current pandas), Bollinger Bands and MACD from the pandas
+rolling/ewm calls calculate_dynamic_indicators made next to it. Run it
+from the backend directory:
+
+    python tests/fixtures/make_pandas_ta_golden.py
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+BARS = 600
+SMA_PERIODS = [5, 20, 200]
+EMA_PERIODS = [5, 20, 200]
+RSI_PERIODS = [2, 14, 30]
+BOLLINGER_PERIODS = [20, 50]
+MACD_PARAMS = [(12, 26, 9), (5, 35, 5)]
+
+
+def sma(close, length=10):
+    return close.rolling(length, min_periods=length).mean()
+
+
+def ema(close, length=10):
+    # pandas_ta seeds the EMA with the SMA of the first length closes
+    close = close.copy()
+    sma_nth = close[0:length].sum() / length
+    close[:length - 1] = np.nan
+    close.iloc[length - 1] = sma_nth
+    return close.ewm(span=length, adjust=False).mean()
+
+
+def rma(close, length):
+    return close.ewm(alpha=1.0 / length, min_periods=length).mean()
+
+
+def rsi(close, length=14):
+    negative = close.diff(1)
+    positive = negative.copy()
+    positive[positive < 0] = 0
+    negative[negative > 0] = 0
+    positive_avg = rma(positive, length)
+    negative_avg = rma(negative, length)
+    return 100 * positive_avg / (positive_avg + negative_avg.abs())
+
+
+def golden_close(n=BARS, seed=7):
+    """Random walk with a flat stretch, flat windows must give a std of exactly 0"""
+    rng = np.random.default_rng(seed)
+    close = 20000 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    close[300:360] = close[300]
+    return np.round(close, 2)
+
+
+def main():
+    close = pd.Series(golden_close())
+    rolling = [close.rolling(window=period) for period in BOLLINGER_PERIODS]
+    macd = []
+    for fast, slow, signal in MACD_PARAMS:
+        line = close.ewm(span=fast, adjust=False).mean() - close.ewm(span=slow, adjust=False).mean()
+        macd.append((line, line.ewm(span=signal, adjust=False).mean()))
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pandas_ta_golden.npz')
+    np.savez_compressed(
+        path,
+        close=close.to_numpy(),
+        sma_periods=SMA_PERIODS,
+        sma=[sma(close, length=period).to_numpy() for period in SMA_PERIODS],
+        ema_periods=EMA_PERIODS,
+        ema=[ema(close, length=length).to_numpy() for length in EMA_PERIODS],
+        rsi_periods=RSI_PERIODS,
+        rsi=[rsi(close, length=period).to_numpy() for period in RSI_PERIODS],
+        bollinger_periods=BOLLINGER_PERIODS,
+        bollinger_mean=[window.mean().to_numpy() for window in rolling],
+        bollinger_std=[window.std().to_numpy() for window in rolling],
+        macd_params=MACD_PARAMS,
+        macd=[line.to_numpy() for line, _ in macd],
+        macd_signal=[signal.to_numpy() for _, signal in macd])
+    print(f"Wrote {path}")
+
+
+if __name__ == '__main__':
+    main()
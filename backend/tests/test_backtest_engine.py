@@ -0,0 +1,68 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend import backtest_strategy, calculate_dynamic_indicators
+from backtest_engine import vectorized_backtest
+from indicator_cache import indicator_cache
+
+BUY = {
+    'rsi': {'name': 'RSI', 'active': False, 'value': 35},
+    'macd': {'name': 'MACD', 'active': False, 'values': [12, 26, 9]},
+    'bollinger': {'name': 'Bollinger Bands', 'active': False, 'value': 20, 'std_dev': 2},
+    'sma': {'name': 'SMA', 'active': False, 'value': 50},
+    'ema': {'name': 'EMA', 'active': False, 'value': 20}
+}
+SELL = {
+    'rsi': {'name': 'RSI', 'active': False, 'value': 65},
+    'macd': {'name': 'MACD', 'active': False, 'values': [12, 26, 9]},
+    'bollinger': {'name': 'Bollinger Bands', 'active': False, 'value': 20, 'std_dev': 2},
+    'sma': {'name': 'SMA', 'active': False, 'value': 200},
+    'ema': {'name': 'EMA', 'active': False, 'value': 50}
+}
+
+
+def candles(n=4000, seed=5):
+    """Random walk with a flat stretch, indexed like get_historical_klines' frames"""
+    rng = np.random.default_rng(seed)
+    close = np.round(20000 * np.exp(np.cumsum(rng.normal(0, 0.003, n))), 2)
+    close[1500:1600] = close[1500]
+    index = pd.DatetimeIndex(pd.to_datetime(1_700_000_000_000 + np.arange(n) * 60_000, unit='ms'), name='Open Time')
+    return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1.0}, index=index)
+
+
+def configs(active, **changes):
+    buy, sell = copy.deepcopy(BUY), copy.deepcopy(SELL)
+    for configs in (buy, sell):
+        for name in active:
+            configs[name]['active'] = True
+    for key, value in changes.items():
+        side, name, field = key.split('__')
+        (buy if side == 'buy' else sell)[name][field] = value
+    return buy, sell
+
+
+@pytest.mark.parametrize('buy, sell', [
+    configs([]),
+    configs(['rsi']),
+    configs(['rsi'], buy__rsi__period=7, sell__rsi__period=7),
+    configs(['macd']),
+    configs(['bollinger']),
+    configs(['sma']),
+    configs(['ema']),
+    configs(['rsi', 'macd']),
+    configs(['rsi', 'sma'], buy__rsi__value=45),
+    configs(['macd', 'ema']),
+    configs(['rsi', 'macd', 'bollinger', 'sma', 'ema']),
+])
+def test_vectorized_backtest_matches_the_bar_loop(buy, sell):
+    indicator_cache.clear()
+    df = calculate_dynamic_indicators(candles(), copy.deepcopy(buy), copy.deepcopy(sell))
+
+    loop = backtest_strategy(df, copy.deepcopy(buy), copy.deepcopy(sell))
+    vectorized = vectorized_backtest(df, copy.deepcopy(buy), copy.deepcopy(sell))
+
+    assert loop['success']
+    assert vectorized == loop
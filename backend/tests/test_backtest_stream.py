@@ -0,0 +1,54 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend import calculate_dynamic_indicators
+from backtest_engine import vectorized_backtest
+from backtest_stream import ChunkedBacktest
+from indicator_cache import indicator_cache
+
+
+def flat_stretch_candles(n=20000, seed=2):
+    """1m random walk with one 60 bar stretch of a repeated close, like a quiet pair"""
+    rng = np.random.default_rng(seed)
+    close = np.round(21000 * np.exp(np.cumsum(rng.normal(0, 0.002, n))), 2)
+    close[9000:9060] = close[9000]
+    index = pd.DatetimeIndex(pd.to_datetime(1_700_000_000_000 + np.arange(n) * 60_000, unit='ms'), name='Open Time')
+    return pd.DataFrame({'Close': close}, index=index)
+
+
+NAMES = {'rsi': 'RSI', 'macd': 'MACD', 'bollinger': 'Bollinger Bands', 'sma': 'SMA', 'ema': 'EMA'}
+
+
+def active(**configs):
+    return {key: dict(config, name=NAMES[key], active=True) for key, config in configs.items()}
+
+
+@pytest.mark.parametrize('buy, sell', [
+    (active(bollinger={'value': 20, 'std_dev': 2.0}), {}),
+    (active(sma={'value': 20}), {}),
+    (active(ema={'value': 20}), {}),
+    (active(macd={'values': [12, 26, 9]}), {}),
+    (active(rsi={'value': 35}), active(rsi={'value': 65})),
+    (active(rsi={'value': 45}, bollinger={'value': 20, 'std_dev': 1.0}), active(rsi={'value': 55})),
+])
+def test_streamed_trades_match_vectorized_backtest(buy, sell):
+    indicator_cache.clear()
+    df = flat_stretch_candles()
+    expected = vectorized_backtest(calculate_dynamic_indicators(df.copy(), copy.deepcopy(buy), copy.deepcopy(sell)),
+                                   copy.deepcopy(buy), copy.deepcopy(sell))
+
+    backtest = ChunkedBacktest(copy.deepcopy(buy), copy.deepcopy(sell))
+    times = df.index.values.astype('datetime64[ms]').astype(np.int64)
+    close = df['Close'].to_numpy()
+    logs = [backtest.feed(times[start:start + 3000], close[start:start + 3000]).to_dict()
+            for start in range(0, len(close), 3000)]
+    logs.append(backtest.finish().to_dict())
+    result = backtest.summary()
+
+    assert result['trades'] == expected['trades'] > 0
+    assert result['profit'] == pytest.approx(expected['profit'], rel=1e-9)
+    for field in ('time', 'side'):
+        assert [value for log in logs for value in log[field]] == expected['tradeLog'][field]
@@ -0,0 +1,18 @@
+import pytest
+
+from batch import validate_batch
+
+STRATEGIES = [{'buyIndicators': {}, 'sellIndicators': {}}]
+
+
+@pytest.mark.parametrize('coins, timeframes, duplicate', [
+    (['BTC', 'ETH', 'BTC'], ['1h'], 'coins has duplicates: BTC'),
+    (['BTC'], ['1h', '4h', '1h'], 'timeFrames has duplicates: 1h'),
+])
+def test_duplicate_series_are_rejected(coins, timeframes, duplicate):
+    with pytest.raises(ValueError, match=duplicate):
+        validate_batch(coins, timeframes, STRATEGIES)
+
+
+def test_distinct_series_pass():
+    validate_batch(['BTC', 'ETH'], ['1h', '4h'], STRATEGIES)
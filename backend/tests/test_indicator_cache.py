@@ -0,0 +1,29 @@
+import numpy as np
+
+from indicator_cache import IndicatorCache
+
+
+def test_get_many_computes_only_missing_keys_in_one_call():
+    cache = IndicatorCache()
+    calls = []
+
+    def compute(keys):
+        calls.append(list(keys))
+        return np.array([np.full(4, period, dtype=np.float64) for _, period in keys])
+
+    cache.get_many('fp', [('sma', 5), ('sma', 10)], compute)
+    values = cache.get_many('fp', [('sma', 10), ('sma', 20), ('sma', 5)], compute)
+
+    assert calls == [[('sma', 5), ('sma', 10)], [('sma', 20)]]
+    assert [value[0] for value in values] == [10, 20, 5]
+    assert all(not value.flags.writeable for value in values)
+
+
+def test_get_many_rows_do_not_keep_the_batch_alive():
+    cache = IndicatorCache()
+    keys = [('sma', period) for period in range(1, 11)]
+    rows = cache.get_many('fp', keys, lambda missing: np.ones((len(missing), 1000)))
+
+    # Each row owns its memory, so the cached bytes are all the memory the entries hold
+    assert all(row.base is None or row.base.nbytes == row.nbytes for row in rows)
+    assert cache.stats()['bytes'] == sum(row.nbytes for row in rows)
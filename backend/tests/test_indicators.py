@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+import pytest
+
+import indicators
+from indicators import ema_matrix, macd_matrix, rolling_mean_std, rsi_matrix, sma_matrix
+
+# Output of a line-for-line copy of pandas_ta 0.3.14b0's sma/ema/rsi and of pandas rolling/ewm,
+# not of the pandas_ta package itself, see fixtures/make_pandas_ta_golden.py
+GOLDEN = np.load(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'pandas_ta_golden.npz'))
+CLOSE = GOLDEN['close']
+# Errors are relative to the indicator's scale, the price or RSI's 0-100
+TOLERANCE = 1e-12
+# pandas' online rolling variance leaves rounding noise of about 1e-8 of the price on flat windows, the kernel gives 0
+STD_TOLERANCE = 1e-7
+
+
+def assert_matches(values, expected, scale, tolerance=TOLERANCE):
+    assert values.shape == expected.shape
+    assert np.array_equal(np.isnan(values), np.isnan(expected))
+    valid = ~np.isnan(expected)
+    error = np.abs(values - expected)[valid] / np.broadcast_to(scale, expected.shape)[valid]
+    assert error.max() < tolerance
+
+
+@pytest.fixture(params=['default', 'small'])
+def blocks(request, monkeypatch):
+    """Run each comparison with the default block sizes and with blocks far shorter than the series"""
+    if request.param == 'small':
+        monkeypatch.setattr(indicators, 'ROLLING_BLOCK', 7)
+        monkeypatch.setattr(indicators, 'SCAN_BLOCK', 3)
+
+
+def test_sma_matches_pandas_ta(blocks):
+    assert_matches(sma_matrix(CLOSE, GOLDEN['sma_periods']), GOLDEN['sma'], CLOSE)
+
+
+def test_ema_matches_pandas_ta(blocks):
+    assert_matches(ema_matrix(CLOSE, GOLDEN['ema_periods']), GOLDEN['ema'], CLOSE)
+
+
+def test_rsi_matches_pandas_ta(blocks):
+    assert_matches(rsi_matrix(CLOSE, GOLDEN['rsi_periods']), GOLDEN['rsi'], 100.0)
+
+
+def test_bollinger_matches_pandas_rolling(blocks):
+    mean, std = rolling_mean_std(CLOSE, GOLDEN['bollinger_periods'])
+    assert_matches(mean, GOLDEN['bollinger_mean'], CLOSE)
+    assert_matches(std, GOLDEN['bollinger_std'], CLOSE, STD_TOLERANCE)
+    # The fixture's flat stretch, 300 to 359
+    assert (std[:, 359] == 0).all()
+
+
+def test_macd_matches_pandas_ewm(blocks):
+    macd, signal = macd_matrix(CLOSE, GOLDEN['macd_params'])
+    assert_matches(macd, GOLDEN['macd'], CLOSE)
+    assert_matches(signal, GOLDEN['macd_signal'], CLOSE)
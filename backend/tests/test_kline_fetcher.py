@@ -0,0 +1,22 @@
+from kline_fetcher import WeightBudget
+
+
+def test_weight_budget_is_shared_through_the_state_file(tmp_path):
+    state_path = str(tmp_path / 'weight.state')
+    # Two budgets on one file, as two gunicorn workers would have
+    first = WeightBudget(600, state_path)
+    second = WeightBudget(600, state_path)
+
+    first.acquire(600)
+
+    # The bucket the first worker emptied refills at 10 weight per second for the second one too
+    assert 0.4 < second._take_shared(5) <= 0.5
+
+
+def test_weight_budget_without_state_file_is_per_process():
+    first = WeightBudget(600)
+    second = WeightBudget(600)
+
+    first.acquire(600)
+
+    assert second._take(600) == 0.0
@@ -0,0 +1,162 @@
+import multiprocessing
+import os
+import time
+
+import numpy as np
+import pytest
+
+import kline_store
+from candles import Candles
+from kline_fetcher import fetch_klines
+from kline_store import KlineStore
+
+
+def series(n):
+    open_time = 1_700_000_000_000 + np.arange(n, dtype=np.int64) * 60_000
+    return Candles(open_time, np.tile(np.arange(n, dtype=np.float64), (5, 1)))
+
+
+def keep_saving(root_dir, lengths, rounds):
+    store = KlineStore(root_dir)
+    for _ in range(rounds):
+        for n in lengths:
+            store.save('BTCUSDT', '1m', series(n), 0)
+
+
+def test_concurrent_saves_from_processes_stay_consistent(tmp_path):
+    context = multiprocessing.get_context('fork')
+    writers = [context.Process(target=keep_saving, args=(str(tmp_path), lengths, 40))
+               for lengths in ((10, 2000, 500), (7, 3000), (1, 900, 4000))]
+    for writer in writers:
+        writer.start()
+    store = KlineStore(str(tmp_path))
+    loads = 0
+    while any(writer.is_alive() for writer in writers):
+        candles, _ = store.load('BTCUSDT', '1m')
+        if len(candles):
+            assert candles.ohlcv.shape == (5, len(candles.open_time))
+            np.testing.assert_array_equal(candles.close, np.arange(len(candles)))
+            loads += 1
+    for writer in writers:
+        writer.join()
+        assert writer.exitcode == 0
+    assert loads > 0
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_arrays_not_matching_the_meta_are_ignored(tmp_path):
+    store = KlineStore(str(tmp_path))
+    store.save('BTCUSDT', '1m', series(100), 0)
+    # Arrays of an unfinished write, the meta still describes the previous save
+    times_path = store._segment_paths('BTCUSDT', '1m', 0)[0]
+    np.save(times_path, series(150).open_time)
+
+    candles, covered_from = store.load('BTCUSDT', '1m')
+    assert len(candles) == 0 and covered_from is None
+
+
+class KlinesClient:
+    """Serves n one minute candles in Binance's row format, the last one opens next minute and can't close during a test"""
+
+    def __init__(self, n, seed=1):
+        rng = np.random.default_rng(seed)
+        self.start = (int(time.time() * 1000) // 60_000 - n + 2) * 60_000
+        self.ohlcv = np.round(20000 + np.cumsum(rng.normal(0, 10, (5, n)), axis=1), 2)
+        self.calls = 0
+
+    def get_klines(self, symbol, interval, limit=500, startTime=None, endTime=None):
+        self.calls += 1
+        first = max(0, -(-(startTime - self.start) // 60_000))
+        last = min(self.ohlcv.shape[1], (endTime - self.start) // 60_000 + 1, first + limit)
+        return [[self.start + i * 60_000, *map(str, self.ohlcv[:, i]), self.start + i * 60_000 + 59_999, '0', 0, '0', '0', '0']
+                for i in range(first, last)]
+
+
+@pytest.fixture(params=[10_000, 300])
+def segment_rows(request, monkeypatch):
+    """Series in one segment and in many"""
+    monkeypatch.setattr(kline_store, 'SEGMENT_ROWS', request.param)
+    return request.param
+
+
+def test_incremental_fills_match_a_direct_fetch(tmp_path, segment_rows):
+    client = KlinesClient(5000)
+    store = KlineStore(str(tmp_path))
+    # Cold read, tail and head extensions, both at once, a range already stored and the unclosed candle
+    for first, last in ((2000, 2500), (2200, 3100), (500, 2100), (100, 4999), (700, 800), (4990, 4999)):
+        start_time = client.start + first * 60_000
+        end_time = client.start + last * 60_000 + 30_000
+        calls = client.calls
+        stored = store.get_klines(client, 'BTCUSDT', '1m', start_time, end_time)
+        if (first, last) == (700, 800):
+            assert client.calls == calls
+        direct = Candles.from_klines(fetch_klines(client, 'BTCUSDT', '1m', start_time, end_time))
+        np.testing.assert_array_equal(stored.open_time, direct.open_time)
+        np.testing.assert_array_equal(stored.ohlcv, direct.ohlcv)
+
+    # Only closed candles are kept on disk, without gaps between the merged ranges
+    candles, covered_from = store.load('BTCUSDT', '1m')
+    assert covered_from == candles.open_time[0] == client.start + 100 * 60_000
+    assert candles.open_time[-1] < client.start + 4999 * 60_000
+    np.testing.assert_array_equal(np.diff(candles.open_time), 60_000)
+
+
+def test_new_candles_only_rewrite_the_last_segment(tmp_path, monkeypatch):
+    monkeypatch.setattr(kline_store, 'SEGMENT_ROWS', 300)
+    client = KlinesClient(1000)
+    store = KlineStore(str(tmp_path))
+    store.get_klines(client, 'BTCUSDT', '1m', client.start, client.start + 900 * 60_000)
+    segments = store._meta('BTCUSDT', '1m')['segments']
+    assert [segment[1] for segment in segments] == [300, 300, 300, 1]
+    sealed = {path: os.stat(path).st_mtime_ns for segment in segments[:3]
+              for path in store._segment_paths('BTCUSDT', '1m', segment[0])}
+
+    store.get_klines(client, 'BTCUSDT', '1m', client.start + 800 * 60_000, client.start + 950 * 60_000)
+
+    segments = store._meta('BTCUSDT', '1m')['segments']
+    assert [segment[1] for segment in segments] == [300, 300, 300, 51]
+    assert {path: os.stat(path).st_mtime_ns for path in sealed} == sealed
+    # The replaced last segment's files are gone
+    assert len(list(tmp_path.glob('*.npy'))) == 2 * len(segments)
+
+
+def test_read_klines_downloads_only_the_range_and_never_writes(tmp_path, segment_rows):
+    client = KlinesClient(5000)
+    store = KlineStore(str(tmp_path))
+    store.get_klines(client, 'BTCUSDT', '1m', client.start + 2000 * 60_000, client.start + 3000 * 60_000)
+    meta = store._meta('BTCUSDT', '1m')
+
+    # Before the stored range, inside it, across its end and past it
+    for first, last in ((0, 400), (2100, 2900), (2800, 3300), (4500, 4999)):
+        start_time = client.start + first * 60_000
+        end_time = client.start + last * 60_000 + 30_000
+        requested = []
+        get_klines = client.get_klines
+        client.get_klines = lambda symbol, interval, **kwargs: requested.append(kwargs) or get_klines(symbol, interval, **kwargs)
+        candles = store.read_klines(client, 'BTCUSDT', '1m', start_time, end_time)
+        client.get_klines = get_klines
+
+        direct = Candles.from_klines(fetch_klines(client, 'BTCUSDT', '1m', start_time, end_time))
+        np.testing.assert_array_equal(candles.open_time, direct.open_time)
+        np.testing.assert_array_equal(candles.ohlcv, direct.ohlcv)
+        assert all(start_time <= page['startTime'] and page['endTime'] <= end_time for page in requested)
+        if (first, last) == (2100, 2900):
+            assert not requested
+
+    assert store._meta('BTCUSDT', '1m') == meta
+
+
+def test_missing_ms_is_what_get_klines_downloads(tmp_path):
+    client = KlinesClient(5000)
+    store = KlineStore(str(tmp_path))
+
+    def minutes(first, last):
+        return client.start + first * 60_000, client.start + last * 60_000
+
+    assert store.missing_ms('BTCUSDT', '1m', *minutes(2000, 3000)) == 1000 * 60_000
+
+    store.get_klines(client, 'BTCUSDT', '1m', *minutes(2000, 3000))
+    assert store.missing_ms('BTCUSDT', '1m', *minutes(2100, 2900)) == 0
+    assert store.missing_ms('BTCUSDT', '1m', *minutes(2500, 3200)) == 200 * 60_000
+    assert store.missing_ms('BTCUSDT', '1m', *minutes(1500, 2500)) == 500 * 60_000
+    assert store.missing_ms('BTCUSDT', '1m', *minutes(3500, 4000)) == 500 * 60_000
@@ -0,0 +1,36 @@
+import pytest
+
+from live_store import MemoryLiveTestStore, SqliteLiveTestStore
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryLiveTestStore()
+    return SqliteLiveTestStore(str(tmp_path / 'live_tests.db'))
+
+
+def test_failed_update_leaves_the_session_unchanged(store):
+    session_id = store.create({'symbol': 'BTCUSDT', 'timeframe': '1h', 'trades': [], 'position': None})
+
+    def apply(live_test):
+        live_test['trades'].append({'type': 'BUY'})
+        live_test['position'] = 'long'
+        raise ValueError('signal failed')
+
+    with pytest.raises(ValueError):
+        store.update(session_id, apply)
+
+    assert store.get(session_id) == {'symbol': 'BTCUSDT', 'timeframe': '1h', 'trades': [], 'position': None}
+
+
+def test_update_returns_the_result_and_keeps_the_changes(store):
+    session_id = store.create({'symbol': 'BTCUSDT', 'timeframe': '1h', 'trades': []})
+
+    def apply(live_test):
+        live_test['trades'].append({'type': 'BUY'})
+        return len(live_test['trades'])
+
+    assert store.update(session_id, apply) == 1
+    assert store.update(session_id, apply) == 2
+    assert store.get(session_id)['trades'] == [{'type': 'BUY'}, {'type': 'BUY'}]
@@ -0,0 +1,60 @@
+import backend
+from kline_stream import Broadcaster
+
+
+class IdleHub:
+    def __init__(self):
+        self.subscriptions = set()
+
+    def ensure(self, symbol, interval):
+        self.subscriptions.add((symbol, interval))
+
+    def release(self, symbol, interval):
+        self.subscriptions.discard((symbol, interval))
+
+
+def test_broadcaster_refuses_subscribers_past_the_cap():
+    updates = Broadcaster(max_subscribers=2)
+    updates.subscribe('a')
+    second = updates.subscribe('b')
+    assert updates.subscribe('a') is None
+    updates.unsubscribe('b', second)
+    assert updates.subscribe('a') is not None
+    assert updates.count() == 2
+
+
+def test_streams_past_the_cap_get_a_503(monkeypatch):
+    hub = IdleHub()
+    monkeypatch.setattr(backend, 'live_updates', Broadcaster(max_subscribers=1))
+    monkeypatch.setattr(backend, 'kline_hub', hub)
+    session_id = backend.live_test_store.create({'symbol': 'BTCUSDT', 'timeframe': '1m'})
+    client = backend.app.test_client()
+    try:
+        first = client.get(f'/api/livetest/stream?session={session_id}', buffered=False)
+        assert first.status_code == 200
+        assert next(first.response) == b": connected\n\n"
+
+        refused = client.get(f'/api/livetest/stream?session={session_id}')
+        assert refused.status_code == 503
+        assert refused.headers['Retry-After'] == '30'
+        assert refused.get_json()['success'] is False
+
+        # Closing the first stream frees its slot and the kline subscription
+        first.close()
+        assert backend.live_updates.count() == 0 and not hub.subscriptions
+        second = client.get(f'/api/livetest/stream?session={session_id}', buffered=False)
+        assert second.status_code == 200
+        second.close()
+    finally:
+        backend.live_test_store.delete(session_id)
+
+
+def test_live_routes_answer_400_for_bad_input():
+    client = backend.app.test_client()
+    for url in ('/api/livetest/log?session=x&since=abc', '/api/livetest/replay/x?since=abc'):
+        response = client.get(url)
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
+    response = client.post('/api/livetest/stop', data='null', content_type='application/json')
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
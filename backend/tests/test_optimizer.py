@@ -0,0 +1,16 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import optimizer
+from optimizer import run_grid
+
+
+def test_unknown_sort_key_fails_before_any_indicator_is_computed(monkeypatch):
+    def prefetch(self, configs):
+        raise AssertionError("prefetch ran")
+
+    monkeypatch.setattr(optimizer.SeriesCache, 'prefetch', prefetch)
+    df = pd.DataFrame({'Close': np.linspace(100, 200, 500)})
+    with pytest.raises(ValueError, match='Unknown sort key: sharpe'):
+        run_grid(df, {'rsi': {'name': 'RSI', 'active': True, 'value': 30}}, {}, {'buy.rsi.value': [20, 30]}, sort_by='sharpe')
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from candles import Candles
+from resample import MINUTE_MS, RESAMPLED_INTERVALS, RollupCache, rollup
+
+START = 1_700_000_000_000 // 86_400_000 * 86_400_000
+
+
+def minute_candles(n, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 20000 + np.cumsum(rng.normal(0, 5, n))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    ohlcv = np.vstack([open_, np.maximum(open_, close) + 1, np.minimum(open_, close) - 1, close,
+                       rng.uniform(1, 10, n)])
+    return Candles(START + np.arange(n, dtype=np.int64) * MINUTE_MS, ohlcv)
+
+
+def assert_same(a, b):
+    np.testing.assert_array_equal(a.open_time, b.open_time)
+    np.testing.assert_array_equal(a.ohlcv, b.ohlcv)
+
+
+@pytest.mark.parametrize('interval', ['5m', '1h', '4h'])
+def test_warm_cache_matches_cold(interval):
+    minutes = minute_candles(3 * 24 * 60)
+    rng = np.random.default_rng(1)
+    for _ in range(100):
+        lo, hi = sorted(rng.integers(0, len(minutes), 2))
+        wide_lo, wide_hi = rng.integers(0, lo + 1), rng.integers(hi, len(minutes))
+        window = minutes.select(slice(lo, hi + 1))
+
+        cold = RollupCache().get('BTCUSDT', interval, window)
+        warm_cache = RollupCache()
+        warm_cache.get('BTCUSDT', interval, minutes.select(slice(wide_lo, wide_hi + 1)))
+        warm = warm_cache.get('BTCUSDT', interval, window)
+
+        assert_same(cold, rollup(window, RESAMPLED_INTERVALS[interval]))
+        assert_same(warm, cold)
+
+
+def test_cached_buckets_stop_at_last_minute():
+    interval_ms = RESAMPLED_INTERVALS['1h']
+    minutes = minute_candles(24 * 60)
+    cache = RollupCache()
+    cache.get('BTCUSDT', '1h', minutes)
+    # Ends 30 minutes into a bucket the cache holds complete
+    window = minutes.select(slice(0, 5 * 60 + 30))
+    rolled = cache.get('BTCUSDT', '1h', window)
+
+    assert cache.hits == 1
+    assert rolled.open_time[-1] == START + 5 * interval_ms
+    assert rolled.close[-1] == window.close[-1]
+    assert rolled.volume[-1] == pytest.approx(window.volume[-30:].sum())
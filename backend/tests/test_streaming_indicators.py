@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from indicators import ema_series, macd_lines, rolling_mean_std, rsi_series, sma_series
+from streaming_indicators import IndicatorState
+
+# Errors are relative to the indicator's scale, the price or RSI's 0-100
+TOLERANCE = 1e-12
+FLAT = slice(9000, 9060)
+
+BUY = {
+    'rsi': {'name': 'RSI', 'active': True, 'value': 35, 'period': 14},
+    'sma': {'name': 'SMA', 'active': True, 'value': 20},
+    'ema': {'name': 'EMA', 'active': True, 'value': 20},
+    'bollinger': {'name': 'Bollinger Bands', 'active': True, 'value': 20, 'std_dev': 2.0},
+    'macd': {'name': 'MACD', 'active': True, 'values': [12, 26, 9]}
+}
+SELL = {'sma': {'name': 'SMA', 'active': True, 'value': 50}}
+
+
+def flat_stretch_close(n=20000, seed=2):
+    """1m random walk with one 60 bar stretch of a repeated close"""
+    rng = np.random.default_rng(seed)
+    close = np.round(21000 * np.exp(np.cumsum(rng.normal(0, 0.002, n))), 2)
+    close[FLAT] = close[FLAT.start]
+    return close
+
+
+def assert_matches(values, expected, scale):
+    assert np.array_equal(np.isnan(values), np.isnan(expected))
+    valid = ~np.isnan(expected)
+    error = np.abs(values - expected)[valid] / np.broadcast_to(scale, expected.shape)[valid]
+    assert error.max() < TOLERANCE
+
+
+@pytest.mark.parametrize('chunk', [1, 5000])
+def test_indicator_state_matches_the_batch_kernels(chunk):
+    close = flat_stretch_close()
+    state = IndicatorState(BUY, SELL)
+    if chunk == 1:
+        rows = [state.update(value) for value in close]
+        columns = {name: np.array([row[name] for row in rows]) for name in rows[0]}
+    else:
+        parts = [state.columns(close[start:start + chunk]) for start in range(0, len(close), chunk)]
+        columns = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+    mean, std = rolling_mean_std(close, [20])
+    macd, signal = macd_lines(close, 12, 26, 9)
+    assert_matches(columns['RSI'], rsi_series(close, 14), 100.0)
+    assert_matches(columns['SMA_20'], sma_series(close, 20), close)
+    assert_matches(columns['SMA_50'], sma_series(close, 50), close)
+    assert_matches(columns['EMA_20'], ema_series(close, 20), close)
+    assert_matches(columns['middle_band'], mean[0], close)
+    assert_matches(columns['std'], std[0], close)
+    assert_matches(columns['MACD'], macd, close)
+    assert_matches(columns['MACD_signal'], signal, close)
+
+    # Windows inside the flat stretch are exact, as in indicators._rolling
+    flat = slice(FLAT.start + 49, FLAT.stop)
+    assert (columns['SMA_20'][flat] == close[flat]).all()
+    assert (columns['SMA_50'][flat] == close[flat]).all()
+    assert (columns['middle_band'][flat] == close[flat]).all()
+    assert (columns['std'][flat] == 0).all()
+    assert (columns['upper_band'][flat] == close[flat]).all()
+
+
+def test_peek_matches_the_next_update():
+    close = flat_stretch_close()[8000:10000]
+    state = IndicatorState(BUY, SELL)
+    for value in close:
+        peeked = state.peek(value)
+        updated = state.update(value)
+        assert peeked.keys() == updated.keys()
+        assert all(peeked[name] == updated[name] or np.isnan(peeked[name]) and np.isnan(updated[name])
+                   for name in updated)
@@ -0,0 +1,171 @@
+import os
+import tempfile
+
+import numpy as np
+
+from backtest_engine import INITIAL_BALANCE, WARMUP_BARS, resolve_trades, trade_stats
+from batch import _worker_cache, get_pool, write_candles
+from optimizer import MAX_COMBINATIONS, SORT_KEYS, SeriesCache, grid_combinations, parse_grid
+from signal_plan import SignalPlan
+
+# Worker processes of the shared batch pool the folds are spread over, 1 runs them in the request's process
+WALK_FORWARD_WORKERS = int(os.getenv('WALK_FORWARD_WORKERS', os.cpu_count() or 1))
+MAX_FOLDS = 500
+
+
+def walk_forward_windows(n, train_bars, test_bars, step_bars=None, anchored=False):
+    """[(train_start, test_start, test_end), ...] bar ranges rolling forward by step_bars (default test_bars).
+
+    Anchored windows keep training from bar 0 and only grow.
+    """
+    if train_bars <= 0 or test_bars <= 0:
+        raise ValueError("trainBars and testBars must be positive")
+    step_bars = step_bars or test_bars
+    windows = []
+    offset = 0
+    while offset + train_bars + test_bars <= n:
+        train_start = 0 if anchored else offset
+        windows.append((train_start, offset + train_bars, offset + train_bars + test_bars))
+        offset += step_bars
+    if not windows:
+        raise ValueError(f"Not enough candles ({n}) for a {train_bars} bar train and {test_bars} bar test window")
+    if len(windows) > MAX_FOLDS:
+        raise ValueError(f"{len(windows)} folds, the limit is {MAX_FOLDS}")
+    return windows
+
+
+def window_stats(cache, plan, lo, hi):
+    """Backtest one compiled config on bars [lo, hi).
+
+    Conditions and close are views into arrays computed over the full
+    history, so indicators at the window edge are already warmed up. Only the
+    global warm-up bars are skipped, and a position open at the window end is
+    closed at its last bar.
+    """
+    close = cache.close[lo:hi]
+    buy_condition = cache.condition(plan, 'buy', lo, hi)
+    sell_condition = cache.condition(plan, 'sell', lo, hi)
+    trade_bars = resolve_trades(buy_condition, sell_condition, start=max(WARMUP_BARS - lo, 0))
+    balance, trades, wins = trade_stats(close, trade_bars, INITIAL_BALANCE)
+    profit = float(balance - INITIAL_BALANCE)
+    return {
+        'profit': profit,
+        'returnPct': round(profit / INITIAL_BALANCE * 100, 4),
+        'trades': trades,
+        'wins': wins,
+        'winRate': round((wins / trades * 100) if trades > 0 else 0, 2)
+    }
+
+
+def prepare_combinations(cache, buy_indicators, sell_indicators, axes):
+    """[(params, plan), ...] for every grid point, with their conditions computed over the full history"""
+    # Plans keyed by grid point, SeriesCache keeps their rule conditions and the shared plan cache isn't flooded
+    combinations = [(params, SignalPlan(number, buy, sell, copy=False))
+                    for number, (params, buy, sell) in enumerate(grid_combinations(buy_indicators, sell_indicators, axes))]
+
+    # Every indicator series and condition is computed once over the full history
+    # before the folds run, the folds only slice and combine them
+    cache.prefetch((indicator, config) for _, plan in combinations
+                   for configs in (plan.buy_indicators, plan.sell_indicators) for indicator, config in configs.items())
+    for _, plan in combinations:
+        cache.condition(plan, 'buy')
+        cache.condition(plan, 'sell')
+    return combinations
+
+
+def run_folds(cache, times, combinations, folds, sort_by):
+    """Pick the best grid point on each (number, window) fold's train bars and score it on its test bars"""
+    results = []
+    for number, (train_start, test_start, test_end) in folds:
+        best = None
+        for params, plan in combinations:
+            stats = window_stats(cache, plan, train_start, test_start)
+            if best is None or stats[sort_by] > best[1][sort_by]:
+                best = (params, stats, plan)
+        params, train, plan = best
+        results.append({
+            'fold': number,
+            'trainStart': int(times[train_start]),
+            'testStart': int(times[test_start]),
+            'testEnd': int(times[test_end - 1]),
+            'params': params,
+            'train': train,
+            'test': window_stats(cache, plan, test_start, test_end)
+        })
+    return results
+
+
+def run_fold_job(base, buy_indicators, sell_indicators, axes, folds, sort_by):
+    """Worker entry point, runs a share of the folds on one memory-mapped candle series.
+
+    The worker computes the grid's conditions once per series and keeps them
+    with its cached frame for the rest of the folds.
+    """
+    frame, cache = _worker_cache(base)
+    combinations = prepare_combinations(cache, buy_indicators, sell_indicators, axes)
+    times = frame.index.values.astype('datetime64[ms]').astype(np.int64)
+    return run_folds(cache, times, combinations, folds, sort_by), len(cache.series)
+
+
+def run_walk_forward(df, buy_indicators, sell_indicators, grid, train_bars, test_bars, step_bars=None,
+                     anchored=False, sort_by='profit', workers=WALK_FORWARD_WORKERS):
+    """Optimize the grid on every train window and score the winner on the following test window.
+
+    Folds are Python loops over many small slices, so they are spread over
+    the batch process pool rather than threads. Each worker gets every
+    workers-th fold, which evens out anchored windows that grow fold by fold.
+    """
+    if sort_by not in SORT_KEYS:
+        raise ValueError(f"Unknown sort key: {sort_by}")
+    axes = parse_grid(grid) if grid else []
+    total = int(np.prod([len(values) for _, _, _, values in axes])) if axes else 1
+    if total > MAX_COMBINATIONS:
+        raise ValueError(f"Grid has {total} combinations, the limit is {MAX_COMBINATIONS}")
+
+    windows = walk_forward_windows(len(df), train_bars, test_bars, step_bars, anchored)
+    folds = list(enumerate(windows, 1))
+    workers = max(1, min(workers, len(folds)))
+
+    if workers == 1:
+        cache = SeriesCache(df)
+        combinations = prepare_combinations(cache, buy_indicators, sell_indicators, axes)
+        times = df.index.values.astype('datetime64[ms]').astype(np.int64)
+        results = run_folds(cache, times, combinations, folds, sort_by)
+        series_computed = len(cache.series)
+    else:
+        pool = get_pool()
+        with tempfile.TemporaryDirectory(prefix='walk-forward-') as directory:
+            base = write_candles(directory, 'candles', df)
+            futures = [pool.submit(run_fold_job, base, buy_indicators, sell_indicators, axes, folds[i::workers], sort_by)
+                       for i in range(workers)]
+            shares = [future.result() for future in futures]
+        results = sorted((fold for share, _ in shares for fold in share), key=lambda fold: fold['fold'])
+        series_computed = shares[0][1]
+
+    return {
+        'success': True,
+        'combinations': total,
+        'series_computed': series_computed,
+        'folds': results,
+        'outOfSample': aggregate_out_of_sample(results)
+    }
+
+
+def aggregate_out_of_sample(folds):
+    """Chain the test windows: compounded return, trade totals and walk-forward efficiency"""
+    test_returns = np.array([fold['test']['returnPct'] for fold in folds]) / 100
+    train_returns = np.array([fold['train']['returnPct'] for fold in folds]) / 100
+    trades = sum(fold['test']['trades'] for fold in folds)
+    wins = sum(fold['test']['wins'] for fold in folds)
+    mean_train = float(train_returns.mean())
+    return {
+        'folds': len(folds),
+        'compoundedReturnPct': round(float(np.prod(1 + test_returns) - 1) * 100, 4),
+        'meanReturnPct': round(float(test_returns.mean()) * 100, 4),
+        'medianReturnPct': round(float(np.median(test_returns)) * 100, 4),
+        'profitableFolds': round(float((test_returns > 0).mean()) * 100, 2),
+        'trades': trades,
+        'winRate': round((wins / trades * 100) if trades > 0 else 0, 2),
+        # Out-of-sample return per unit of in-sample return, near 1 means the optimum carries over
+        'efficiency': round(float(test_returns.mean()) / mean_train, 4) if mean_train != 0 else None
+    }
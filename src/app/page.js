@@ -10,6 +10,44 @@ const apiUrl = process.env.NEXT_PUBLIC_API_URL;
 // Remove any trailing slash from apiUrl if it exists
 const baseUrl = apiUrl?.endsWith('/') ? apiUrl.slice(0, -1) : apiUrl;
 
+// Trade history rows rendered in the log panel, the rest is summarized
+const TRADE_LOG_ROWS = 500;
+
+const formatTradeTime = (ms) => new Date(ms).toISOString().replace('T', ' ').slice(0, 19);
+
+// One trade ({time, side, price, amount, pnl, balance}) as a log line
+const formatTrade = (trade, coin = '') => {
+  const date = formatTradeTime(trade.time);
+  const price = trade.price.toFixed(2);
+  if (trade.side === 'buy') {
+    return `<span style='color: #22c55e'>Buy Signal: Date: ${date}, Price: ${price}, Amount: ${trade.amount.toFixed(8)}${coin ? ` ${coin}` : ''}</span>`;
+  }
+  if (trade.side === 'close') {
+    return `<span style='color: #ef4444'>Position Closed: Date: ${date}, Exit Price: ${price}, Profit: ${trade.pnl.toFixed(2)}%, Final Value: $${trade.balance.toFixed(2)}</span>`;
+  }
+  return `<span style='color: #ef4444'>Sell Signal: Date: ${date}, Price: ${price}, Profit: ${trade.pnl.toFixed(2)}%, Balance: $${trade.balance.toFixed(2)}</span>`;
+};
+
+// The backend sends the trade log as columns, rows are assembled here
+const formatTradeLog = (tradeLog) => {
+  const rows = [];
+  const shown = Math.min(tradeLog.time.length, TRADE_LOG_ROWS);
+  for (let i = 0; i < shown; i++) {
+    rows.push(formatTrade({
+      time: tradeLog.time[i],
+      side: tradeLog.side[i],
+      price: tradeLog.price[i],
+      amount: tradeLog.amount[i],
+      pnl: tradeLog.pnl[i],
+      balance: tradeLog.balance[i],
+    }));
+  }
+  if (tradeLog.total > shown) {
+    rows.push(`<span style='color: #94a3b8'>... ${tradeLog.total - shown} more trades</span>`);
+  }
+  return rows.join('\n');
+};
+
 export default function Home() {
   useEffect(() => {
     if (!baseUrl) {
@@ -333,7 +371,11 @@ export default function Home() {
 <span style="color: ${data.profit >= 0 ? '#22c55e' : '#ef4444'}">Profit: $${data.profit.toFixed(2)}</span>
 ${data.trades ? `\n<b>Total Trades:</b> ${data.trades}` : ''}
 ${data.winRate ? `\n<b>Win Rate:</b> ${data.winRate}%` : ''}
-${Array.isArray(data.logs) ? '\n<b>Trade History:</b>\n' + data.logs.join('\n') : ''}`;
+${data.maxDrawdown !== undefined ? `\n<b>Max Drawdown:</b> ${data.maxDrawdown}%` : ''}
+${data.sharpe != null ? `\n<b>Sharpe / Sortino:</b> ${data.sharpe} / ${data.sortino ?? '-'}` : ''}
+${data.exposure ? `\n<b>Exposure:</b> ${data.exposure}%` : ''}
+${data.avgTradeDuration ? `\n<b>Avg Trade Duration:</b> ${(data.avgTradeDuration / 3600000).toFixed(1)} h` : ''}
+${data.tradeLog ? '\n<b>Trade History:</b>\n' + formatTradeLog(data.tradeLog) : ''}`;
 
             setResults(prevResults => ({
                 message: (prevResults?.message || '') + formattedMessage
@@ -535,6 +577,12 @@ ${Array.isArray(data.logs) ? '\n<b>Trade History:</b>\n' + data.logs.join('\n')
 
   // Create a ref to track the running state
   const isRunningRef = useRef(false);
+  // Server-sent events connection pushing live test updates on every closed candle
+  const eventSourceRef = useRef(null);
+  // Backend session of the running live test
+  const liveSessionRef = useRef(null);
+  // Last log entry received while polling the session log
+  const liveLogSeqRef = useRef(0);
 
   // Update the useEffect to use the ref
   useEffect(() => {
@@ -547,49 +595,19 @@ ${Array.isArray(data.logs) ? '\n<b>Trade History:</b>\n' + data.logs.join('\n')
       return;
     }
     
-    console.log('Making API call to check live test...'); // Debug log
+    console.log('Making API call to read live test log...'); // Debug log
     try {
-      const response = await fetch(`${baseUrl}/api/livetest/check`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          coin: liveTestCoin,
-        }),
-      });
+      // The backend evaluates the session on every candle close, polling only reads the new log entries
+      const response = await fetch(
+        `${baseUrl}/api/livetest/log?session=${liveSessionRef.current}&since=${liveLogSeqRef.current}`
+      );
 
       const data = await response.json();
-      console.log('Received response from check API:', data); // Debug log
+      console.log('Received response from log API:', data); // Debug log
       
       if (data.success) {
-        // Log indicator values
-        if (data.indicator_values) {
-          console.log('\n=== Current Indicator Values ===');
-          console.log(`Time: ${data.indicator_values.time}`);
-          console.log(`Price: ${data.indicator_values.price}`);
-          
-          if (Object.keys(data.indicator_values.buy_indicators).length > 0) {
-            console.log('\nBuy Indicators:');
-            Object.entries(data.indicator_values.buy_indicators).forEach(([indicator, values]) => {
-              console.log(`${indicator.toUpperCase()}:`, values);
-            });
-          }
-          
-          if (Object.keys(data.indicator_values.sell_indicators).length > 0) {
-            console.log('\nSell Indicators:');
-            Object.entries(data.indicator_values.sell_indicators).forEach(([indicator, values]) => {
-              console.log(`${indicator.toUpperCase()}:`, values);
-            });
-          }
-          console.log('============================\n');
-        }
-
-        if (data.trade_executed && data.message) {
-          setResults(prevResults => ({
-            message: (prevResults?.message || '') + `\n${data.message}`
-          }));
-        }
+        data.entries.forEach(entry => handleLiveTestUpdate(entry));
+        liveLogSeqRef.current = data.seq;
       } else {
         throw new Error(data.error);
       }
@@ -603,15 +621,94 @@ ${Array.isArray(data.logs) ? '\n<b>Trade History:</b>\n' + data.logs.join('\n')
     }
   };
 
+  const handleLiveTestUpdate = (data) => {
+    // Log indicator values
+    if (data.indicator_values) {
+      console.log('\n=== Current Indicator Values ===');
+      console.log(`Time: ${data.indicator_values.time}`);
+      console.log(`Price: ${data.indicator_values.price}`);
+      
+      if (Object.keys(data.indicator_values.buy_indicators).length > 0) {
+        console.log('\nBuy Indicators:');
+        Object.entries(data.indicator_values.buy_indicators).forEach(([indicator, values]) => {
+          console.log(`${indicator.toUpperCase()}:`, values);
+        });
+      }
+      
+      if (Object.keys(data.indicator_values.sell_indicators).length > 0) {
+        console.log('\nSell Indicators:');
+        Object.entries(data.indicator_values.sell_indicators).forEach(([indicator, values]) => {
+          console.log(`${indicator.toUpperCase()}:`, values);
+        });
+      }
+      console.log('============================\n');
+    }
+
+    if (data.trade_executed && data.trade) {
+      setResults(prevResults => ({
+        message: (prevResults?.message || '') + `\n${formatTrade(data.trade, data.status?.coin)}`
+      }));
+    }
+  };
+
+  const startLiveTestPolling = () => {
+    console.log('Setting up interval for checking...'); // Debug log
+    const newInterval = setInterval(() => {
+      checkLiveTest();
+    }, 5000);
+    setLiveTestInterval(newInterval);
+  };
+
+  const startLiveTestStream = () => {
+    // Fall back to polling if the browser or the backend can't stream
+    if (typeof EventSource === 'undefined') {
+      startLiveTestPolling();
+      return;
+    }
+    const source = new EventSource(`${baseUrl}/api/livetest/stream?session=${liveSessionRef.current}`);
+    source.onmessage = (event) => {
+      if (isRunningRef.current) {
+        handleLiveTestUpdate(JSON.parse(event.data));
+      }
+    };
+    source.onerror = () => {
+      console.error('Live test stream failed, falling back to polling');
+      source.close();
+      eventSourceRef.current = null;
+      if (isRunningRef.current) {
+        startLiveTestPolling();
+      }
+    };
+    eventSourceRef.current = source;
+  };
+
   const handleStopLivetest = () => {
     isRunningRef.current = false; // Update ref first
     setIsLiveTestRunning(false);
     
+    if (eventSourceRef.current) {
+      eventSourceRef.current.close();
+      eventSourceRef.current = null;
+    }
+    
     if (liveTestInterval) {
       clearInterval(liveTestInterval);
       setLiveTestInterval(null);
     }
     
+    if (liveSessionRef.current) {
+      fetch(`${baseUrl}/api/livetest/stop`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+          sessionId: liveSessionRef.current,
+        }),
+      }).catch(error => console.error('Error stopping live test:', error));
+      liveSessionRef.current = null;
+    }
+    
     setResults(prevResults => ({
       message: (prevResults?.message || '') + 
         `\n<span style='color: #94a3b8'>[${new Date().toLocaleTimeString()}] Live test stopped</span>`
@@ -640,15 +737,14 @@ ${Array.isArray(data.logs) ? '\n<b>Trade History:</b>\n' + data.logs.join('\n')
       
       if (data.success) {
         console.log('Live test started successfully'); // Debug log
+        liveSessionRef.current = data.sessionId;
+        liveLogSeqRef.current = 0;
         setIsLiveTestRunning(true); // Set running state
         
-        // Start periodic checking
-        console.log('Setting up interval for checking...'); // Debug log
-        const newInterval = setInterval(() => {
-          console.log('Checking live test...', isLiveTestRunning); // Debug log with state
-          checkLiveTest();
-        }, 5000);
-        setLiveTestInterval(newInterval);
+        isRunningRef.current = true;
+        
+        // Receive updates pushed by the backend on every closed candle
+        startLiveTestStream();
         
         setResults(prevResults => ({
           message: (prevResults?.message || '') + 
@@ -672,6 +768,9 @@ ${Array.isArray(data.logs) ? '\n<b>Trade History:</b>\n' + data.logs.join('\n')
       if (liveTestInterval) {
         clearInterval(liveTestInterval);
       }
+      if (eventSourceRef.current) {
+        eventSourceRef.current.close();
+      }
     };
   }, [liveTestInterval]);
 